@@ -0,0 +1,191 @@
+import os
+import pickle
+import hashlib
+import sqlite3
+import argparse
+import numpy as np
+import pandas as pd
+import constants
+from results_store import load_results
+
+# bump when the aggregates change, so cached ones are recomputed
+analytics_version = 2
+default_groupings = [["player_name"], ["skill", "player_name"], ["map", "player_name"]]
+
+
+def results_hash(path, chunk_size=1 << 24):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def bootstrap_mean_ci(frame, keys, column, n_resamples=1000, confidence=0.95, rng=None):
+    """Percentile bootstrap confidence interval of the mean of column in every group.
+
+    Resamples the value counts of each group instead of its rows: a resample of n rows is a multinomial draw of
+    n over the distinct values, so a group costs n_resamples times its number of distinct values. Scores,
+    penalties and successes take a handful of values, which keeps this fast at millions of games.
+
+    Args:
+        frame (pd.DataFrame): results, see results_store.columns
+        keys (list): columns to group by
+        column (str): numeric or boolean column
+        n_resamples (int): bootstrap resamples per group
+        confidence (float): coverage of the interval
+        rng (np.random.Generator): generator of the resamples
+
+    Returns:
+        Tuple[pd.Series, pd.Series]: lower and upper bounds indexed by group
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    counts = frame.groupby(keys + [column], observed=True, sort=True).size()
+    counts = counts[counts > 0]
+    values = counts.index.get_level_values(-1).to_numpy(np.float64)
+    group_index = counts.index.droplevel(-1)
+    starts = np.flatnonzero(~group_index.duplicated())
+    ends = np.append(starts[1:], len(counts))
+    counts = counts.to_numpy()
+    alpha = (1 - confidence)/2
+    bounds = np.empty((len(starts), 2))
+    for idx, (start, end) in enumerate(zip(starts, ends)):
+        n = counts[start:end].sum()
+        draws = rng.multinomial(n, counts[start:end]/n, size=n_resamples)
+        bounds[idx] = np.quantile(draws @ values[start:end]/n, [alpha, 1 - alpha])
+    index = group_index[starts]
+    return pd.Series(bounds[:, 0], index=index), pd.Series(bounds[:, 1], index=index)
+
+
+def aggregate(frame, keys, n_resamples=1000, confidence=0.95, seed=0):
+    """Leaderboard statistics of every group of keys, ranked by mean strokes within the other keys.
+
+    A game that doesn't end in "S" counts as constants.max_tries strokes, also when an invalid action ended it
+    with a lower score, so failing early never ranks above finishing. penalty_rate is penalties per shot played,
+    timeout_rate and error_rate are the shares of games with any timeout or error.
+
+    Args:
+        frame (pd.DataFrame): results, see results_store.load_results
+        keys (list): columns to group by, ending with the ranked column, e.g. ["map", "player_name"]
+        n_resamples (int): bootstrap resamples for the confidence intervals, 0 to skip them
+        confidence (float): coverage of the confidence intervals
+        seed (int): seed of the bootstrap resamples
+
+    Returns:
+        pd.DataFrame: one row per group
+    """
+    success = frame["player_state"].to_numpy() == "S"
+    frame = frame.assign(success=success, strokes=np.where(success, frame["score"].to_numpy(), constants.max_tries),
+                         timed_out=frame["timeout_count"].to_numpy() > 0, errored=frame["error_count"].to_numpy() > 0)
+    table = frame.groupby(keys, observed=True, sort=True).agg(
+        games=("strokes", "size"),
+        success_rate=("success", "mean"),
+        mean_strokes=("strokes", "mean"),
+        median_strokes=("strokes", "median"),
+        shots=("score", "sum"),
+        penalties=("penalties", "sum"),
+        timeout_rate=("timed_out", "mean"),
+        error_rate=("errored", "mean"),
+        win_rate=("winner", "mean"),
+        mean_distance_from_target=("distance_from_target", "mean"),
+    )
+    penalty_rate = table.pop("penalties")/table.pop("shots")
+    table.insert(table.columns.get_loc("timeout_rate"), "penalty_rate", penalty_rate)
+    if n_resamples:
+        rng = np.random.default_rng(seed)
+        for column, source in [("mean_strokes", "strokes"), ("success_rate", "success")]:
+            low, high = bootstrap_mean_ci(frame, keys, source, n_resamples, confidence, rng)
+            position = table.columns.get_loc(column) + 1
+            table.insert(position, column + "_high", high.reindex(table.index).to_numpy())
+            table.insert(position, column + "_low", low.reindex(table.index).to_numpy())
+    table = table.reset_index()
+    rank_keys = keys[:-1]
+    table = table.sort_values(rank_keys + ["mean_strokes", "success_rate"], ascending=[True]*len(rank_keys) + [True, False], kind="stable")
+    table.insert(len(keys), "rank", table.groupby(rank_keys, observed=True, sort=False).cumcount() + 1 if rank_keys else np.arange(1, len(table) + 1))
+    return table.reset_index(drop=True)
+
+
+class AggregateCache:
+    """SQLite cache of aggregate tables keyed by the hash of the results file and the aggregation parameters."""
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS aggregates (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        self.connection.commit()
+
+    @staticmethod
+    def key(file_hash, keys, n_resamples, confidence, seed):
+        return hashlib.sha256("|".join([file_hash, ",".join(keys), str(n_resamples), str(confidence), str(seed), str(analytics_version)]).encode()).hexdigest()
+
+    def get(self, key):
+        row = self.connection.execute("SELECT value FROM aggregates WHERE key = ?", (key,)).fetchone()
+        return pickle.loads(row[0]) if row is not None else None
+
+    def put(self, key, table):
+        self.connection.execute("INSERT OR REPLACE INTO aggregates (key, value) VALUES (?, ?)", (key, pickle.dumps(table, protocol=pickle.HIGHEST_PROTOCOL)))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def analyze(path, groupings=None, n_resamples=1000, confidence=0.95, seed=0, cache_path=None):
+    """Aggregates a results file for every grouping, reusing cached aggregates of the same file content.
+
+    Args:
+        path (str): results store or aggregate_results.csv, see results_store.load_results
+        groupings (list): lists of group keys, defaults to default_groupings
+        n_resamples (int): bootstrap resamples, 0 to skip the confidence intervals
+        confidence (float): coverage of the confidence intervals
+        seed (int): seed of the bootstrap resamples
+        cache_path (str): SQLite aggregate cache, None to always compute
+
+    Returns:
+        list: (keys, table) per grouping, see aggregate
+    """
+    if groupings is None:
+        groupings = default_groupings
+    cache = AggregateCache(cache_path) if cache_path else None
+    file_hash = results_hash(path) if cache is not None else None
+    frame = None
+    tables = []
+    for keys in groupings:
+        key = AggregateCache.key(file_hash, keys, n_resamples, confidence, seed) if cache is not None else None
+        table = cache.get(key) if cache is not None else None
+        if table is None:
+            if frame is None:
+                frame = load_results(path)
+            table = aggregate(frame, keys, n_resamples, confidence, seed)
+            if cache is not None:
+                cache.put(key, table)
+        tables.append((keys, table))
+    if cache is not None:
+        cache.close()
+    return tables
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("results", help="Results store of a tournament, results.parquet or results.jsonl, or an aggregate_results.csv")
+    parser.add_argument("--by", nargs="+", action="append", help="Columns to group by, the last one is ranked, repeat for several tables. Defaults to player, skill and player, map and player")
+    parser.add_argument("--bootstrap", default=1000, type=int, help="Bootstrap resamples for the confidence intervals, 0 to skip them")
+    parser.add_argument("--confidence", default=0.95, type=float, help="Coverage of the confidence intervals")
+    parser.add_argument("--seed", default=0, type=int, help="Seed of the bootstrap resamples")
+    parser.add_argument("--cache_path", help="SQLite cache of the aggregates, defaults to analytics_cache.sqlite next to the results")
+    parser.add_argument("--no_cache", action="store_true", help="Compute the aggregates even if they are cached")
+    parser.add_argument("--out_dir", help="Directory to also write every table to as csv")
+    args = parser.parse_args()
+
+    cache_path = None if args.no_cache else (args.cache_path or os.path.join(os.path.dirname(args.results), "analytics_cache.sqlite"))
+    tables = analyze(args.results, args.by, args.bootstrap, args.confidence, args.seed, cache_path)
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    pd.set_option("display.width", 200)
+    pd.set_option("display.max_columns", None)
+    for keys, table in tables:
+        print("By {}".format(", ".join(keys)))
+        print(table.to_string(index=False, float_format="{:.3f}".format))
+        print()
+        if args.out_dir:
+            table.to_csv(os.path.join(args.out_dir, "by_{}.csv".format("_".join(keys))), index=False)
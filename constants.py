@@ -1,6 +1,6 @@
 import os
 
-timeout = 10*60 # 10 min aggregate time limit
+timeout = 10*60 # 10 min aggregate time limit in seconds, fractions are enforced
 
 default_map = os.path.join("maps", "default", "simple.json")
 possible_players = ["d"] + list(map(str, range(1, 10)))
@@ -19,3 +19,19 @@ max_skill = 100
 extra_roll = 0.1
 min_putter_dist = 20
 max_dist = 200
+
+# shot resolution engines, numeric uses float64 geometry within geometry_tolerance map units of sympy's exact answer
+engines = ["numeric", "sympy"]
+default_headless_engine = "numeric"
+default_gui_engine = "sympy"
+geometry_tolerance = 1e-9
+# map edges shorter than this are rejected by map_validator as degenerate
+min_edge_length = 1e-6
+# part of the result cache key, bump when a referee change alters game results
+engine_version = 2
+
+# referee step phases timed by phase_timer.PhaseTimer
+timing_phases = ["think", "validation", "move", "logging", "gui"]
+
+# raster resolutions of compiled maps, cells along the longer side of the map bounding box
+compiled_map_resolutions = [64, 256, 1024]
@@ -5,6 +5,7 @@ import numpy as np
 import argparse
 import os
 import constants
+import map_validator
 
 args = None
 FILE = None
@@ -87,6 +88,9 @@ def save():
     with open(FILE, "w") as f:
         json.dump(save_dict, f)
     print("Auto-saved file {}".format(FILE))
+    errors, warnings = map_validator.validate_map(save_dict)
+    for message in errors + warnings:
+        print("Map not valid yet: {}".format(message))
 
 
 def mouse_pressed():
@@ -0,0 +1,294 @@
+import numpy as np
+import constants
+
+
+def polygon_edges(vertices):
+    """Builds the closed edge array of a polygon.
+
+    Args:
+        vertices (array-like): (n, 2) polygon vertices in order
+
+    Returns:
+        np.ndarray: (n, 4) float64 array, each row x1, y1, x2, y2 of one edge
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    return np.hstack([vertices, np.roll(vertices, -1, axis=0)])
+
+
+def _sq_distance(px, py, ax, ay, bx, by):
+    # squared point to segment distance on separate coordinate arrays, a size 2 trailing axis is much slower to reduce
+    dx = bx - ax
+    dy = by - ay
+    wx = px - ax
+    wy = py - ay
+    dd = dx*dx + dy*dy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(dd > 0, (wx*dx + wy*dy)/dd, 0.)
+    t = np.clip(t, 0., 1.)
+    ex = wx - t*dx
+    ey = wy - t*dy
+    return ex*ex + ey*ey
+
+
+def _cross(ox, oy, ux, uy, vx, vy):
+    return (ux - ox)*(vy - oy) - (uy - oy)*(vx - ox)
+
+
+def point_segment_distance(points, seg_start, seg_end):
+    """Euclidean distance between points and segments, broadcast over leading dimensions.
+
+    Args:
+        points (np.ndarray): (..., 2) points
+        seg_start (np.ndarray): (..., 2) segment start points
+        seg_end (np.ndarray): (..., 2) segment end points
+
+    Returns:
+        np.ndarray: (...) distances
+    """
+    points = np.asarray(points, dtype=np.float64)
+    seg_start = np.asarray(seg_start, dtype=np.float64)
+    seg_end = np.asarray(seg_end, dtype=np.float64)
+    return np.sqrt(_sq_distance(points[..., 0], points[..., 1], seg_start[..., 0], seg_start[..., 1], seg_end[..., 0], seg_end[..., 1]))
+
+
+def project_point_to_line(point, line_start, line_end):
+    """Orthogonal projection of a point onto the infinite line through a segment, same as sympy's LinearEntity.projection."""
+    d = line_end - line_start
+    dd = np.sum(d*d, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(dd > 0, np.sum((point - line_start)*d, axis=-1)/dd, 0.)
+    return line_start + t[..., None]*d
+
+
+def points_in_polygon(points, edges, tol=constants.geometry_tolerance):
+    """Strict point in polygon test by crossing number.
+
+    Points within tol of the boundary count as outside, matching sympy's Polygon.encloses_point.
+
+    Args:
+        points (np.ndarray): (m, 2) query points
+        edges (np.ndarray): (n, 4) polygon edges from polygon_edges
+        tol (float): boundary tolerance in map units
+
+    Returns:
+        np.ndarray: (m,) boolean array
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    px = points[:, 0:1]
+    py = points[:, 1:2]
+    x1, y1, x2, y2 = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+    straddles = (y1 > py) != (y2 > py)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_cross = x1 + (py - y1)*(x2 - x1)/(y2 - y1)
+    crossings = np.count_nonzero(straddles & (px < x_cross), axis=1)
+    inside = (crossings % 2) == 1
+    on_boundary = np.any(_sq_distance(px, py, x1, y1, x2, y2) <= tol*tol, axis=1)
+    return inside & ~on_boundary
+
+
+def segments_touch_edges(seg_start, seg_end, edges, tol=constants.geometry_tolerance):
+    """Checks whether segments touch or cross any polygon edge.
+
+    Proper crossings are found with orientation signs, touching and collinear overlap with endpoint distances
+    within tol, so a non-empty sympy intersection maps to True.
+
+    Args:
+        seg_start (np.ndarray): (m, 2) segment start points
+        seg_end (np.ndarray): (m, 2) segment end points
+        edges (np.ndarray): (n, 4) polygon edges from polygon_edges
+        tol (float): contact tolerance in map units
+
+    Returns:
+        np.ndarray: (m,) boolean array
+    """
+    seg_start = np.asarray(seg_start, dtype=np.float64).reshape(-1, 2)
+    seg_end = np.asarray(seg_end, dtype=np.float64).reshape(-1, 2)
+    px, py = seg_start[:, 0:1], seg_start[:, 1:2]
+    qx, qy = seg_end[:, 0:1], seg_end[:, 1:2]
+    x1, y1, x2, y2 = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+    touching = _sq_distance(px, py, x1, y1, x2, y2) <= tol*tol
+    touching |= _sq_distance(qx, qy, x1, y1, x2, y2) <= tol*tol
+    touching |= _vertices_touch_or_cross(px, py, qx, qy, x1, y1, x2, y2, tol)
+    return np.any(touching, axis=1)
+
+
+def _vertices_touch_or_cross(px, py, qx, qy, x1, y1, x2, y2, tol):
+    proper = (_cross(x1, y1, x2, y2, px, py)*_cross(x1, y1, x2, y2, qx, qy) < 0) \
+        & (_cross(px, py, qx, qy, x1, y1)*_cross(px, py, qx, qy, x2, y2) < 0)
+    # edge ends are the polygon vertices, so checking each edge start covers every vertex once
+    return proper | (_sq_distance(x1, y1, px, py, qx, qy) <= tol*tol)
+
+
+def segments_admissible(seg_start, seg_end, edges, tol=constants.geometry_tolerance):
+    """Numeric equivalent of polygon.encloses(segment) and not polygon.intersection(segment).
+
+    Args:
+        seg_start (np.ndarray): (m, 2) segment start points
+        seg_end (np.ndarray): (m, 2) segment end points
+        edges (np.ndarray): (n, 4) polygon edges from polygon_edges
+        tol (float): boundary tolerance in map units
+
+    Returns:
+        np.ndarray: (m,) boolean array
+    """
+    seg_start = np.asarray(seg_start, dtype=np.float64).reshape(-1, 2)
+    seg_end = np.asarray(seg_end, dtype=np.float64).reshape(-1, 2)
+    enclosed = points_in_polygon(seg_start, edges, tol) & points_in_polygon(seg_end, edges, tol)
+    # enclosed endpoints are already further than tol from every edge, only crossings and vertices remain
+    px, py = seg_start[:, 0:1], seg_start[:, 1:2]
+    qx, qy = seg_end[:, 0:1], seg_end[:, 1:2]
+    crossing = np.any(_vertices_touch_or_cross(px, py, qx, qy, edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3], tol), axis=1)
+    return enclosed & ~crossing
+
+
+def _expand_ranges(owners, starts, counts):
+    # flattens variable length ranges [start, start+count) into parallel (owner, position) arrays
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(owners, counts), np.repeat(starts, counts) + offsets
+
+
+class EdgeGridIndex:
+    """Uniform grid over the bounding boxes of polygon edges.
+
+    Every edge is registered in each cell its bounding box, grown by tol, overlaps, and in each grid row it spans.
+    Segment queries only test edges registered in the cells under the segment's bounding box, point in polygon
+    queries only the edges of the point's row, so the cost per query follows the local edge density instead of
+    the total vertex count. All queries are batched and return the same answers as the brute force functions above.
+    """
+    def __init__(self, edges, tol=constants.geometry_tolerance):
+        self.edges = np.asarray(edges, dtype=np.float64).reshape(-1, 4)
+        self.tol = tol
+        n = len(self.edges)
+        ex0 = np.minimum(self.edges[:, 0], self.edges[:, 2]) - tol
+        ex1 = np.maximum(self.edges[:, 0], self.edges[:, 2]) + tol
+        ey0 = np.minimum(self.edges[:, 1], self.edges[:, 3]) - tol
+        ey1 = np.maximum(self.edges[:, 1], self.edges[:, 3]) + tol
+        self.xmin, self.ymin = ex0.min(), ey0.min()
+        width = ex1.max() - self.xmin
+        height = ey1.max() - self.ymin
+        # about one cell per edge, shaped like the map
+        self.nx = max(1, int(np.ceil(np.sqrt(n*width/height))))
+        self.ny = max(1, int(np.ceil(np.sqrt(n*height/width))))
+        self.cell_width = width/self.nx
+        self.cell_height = height/self.ny
+
+        i0, i1 = self.__cols(ex0), self.__cols(ex1)
+        j0, j1 = self.__rows(ey0), self.__rows(ey1)
+        edge_ids = np.arange(n)
+        spans = i1 - i0 + 1
+        owners, offsets = _expand_ranges(edge_ids, np.zeros(n, dtype=np.int64), spans*(j1 - j0 + 1))
+        cells = (j0[owners] + offsets//spans[owners])*self.nx + i0[owners] + offsets % spans[owners]
+        order = np.argsort(cells, kind="stable")
+        self.cell_edges = owners[order]
+        self.cell_start = np.searchsorted(cells[order], np.arange(self.nx*self.ny + 1))
+
+        owners, rows = _expand_ranges(edge_ids, j0, j1 - j0 + 1)
+        order = np.argsort(rows, kind="stable")
+        self.row_edges = owners[order]
+        self.row_start = np.searchsorted(rows[order], np.arange(self.ny + 1))
+
+    @classmethod
+    def from_arrays(cls, edges, tol, xmin, ymin, nx, ny, cell_width, cell_height, cell_edges, cell_start, row_edges, row_start):
+        """Rebuilds an index from the arrays of a built one, as stored by map_compiler, without copying them."""
+        index = cls.__new__(cls)
+        index.edges = edges
+        index.tol = tol
+        index.xmin, index.ymin = xmin, ymin
+        index.nx, index.ny = nx, ny
+        index.cell_width, index.cell_height = cell_width, cell_height
+        index.cell_edges, index.cell_start = cell_edges, cell_start
+        index.row_edges, index.row_start = row_edges, row_start
+        return index
+
+    def __cols(self, x):
+        return np.clip(((x - self.xmin)/self.cell_width).astype(np.int64), 0, self.nx - 1)
+
+    def __rows(self, y):
+        return np.clip(((y - self.ymin)/self.cell_height).astype(np.int64), 0, self.ny - 1)
+
+    def candidate_pairs(self, x0, y0, x1, y1):
+        """Edges registered in the cells under each query box.
+
+        Args:
+            x0, y0, x1, y1 (np.ndarray): (m,) query box corners, any order
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: parallel query and edge index arrays, an edge may repeat for a query
+        """
+        i0, i1 = self.__cols(np.minimum(x0, x1)), self.__cols(np.maximum(x0, x1))
+        j0, j1 = self.__rows(np.minimum(y0, y1)), self.__rows(np.maximum(y0, y1))
+        spans = i1 - i0 + 1
+        queries, offsets = _expand_ranges(np.arange(len(i0)), np.zeros(len(i0), dtype=np.int64), spans*(j1 - j0 + 1))
+        cells = (j0[queries] + offsets//spans[queries])*self.nx + i0[queries] + offsets % spans[queries]
+        queries, positions = _expand_ranges(queries, self.cell_start[cells], self.cell_start[cells + 1] - self.cell_start[cells])
+        return queries, self.cell_edges[positions]
+
+    def query_box(self, x0, y0, x1, y1):
+        """Sorted unique ids of edges that may intersect one axis aligned box."""
+        _, edge_ids = self.candidate_pairs(np.array([x0]), np.array([y0]), np.array([x1]), np.array([y1]))
+        return np.unique(edge_ids)
+
+    def points_in_polygon(self, points):
+        """Indexed equivalent of points_in_polygon."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        m = len(points)
+        px, py = points[:, 0], points[:, 1]
+        rows = self.__rows(py)
+        queries, positions = _expand_ranges(np.arange(m), self.row_start[rows], self.row_start[rows + 1] - self.row_start[rows])
+        e = self.edges[self.row_edges[positions]]
+        qx, qy = px[queries], py[queries]
+        straddles = (e[:, 1] > qy) != (e[:, 3] > qy)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            x_cross = e[:, 0] + (qy - e[:, 1])*(e[:, 2] - e[:, 0])/(e[:, 3] - e[:, 1])
+        crossings = np.bincount(queries, weights=straddles & (qx < x_cross), minlength=m)
+        inside = (crossings.astype(np.int64) % 2) == 1
+
+        queries, edge_ids = self.candidate_pairs(px, py, px, py)
+        e = self.edges[edge_ids]
+        near = _sq_distance(px[queries], py[queries], e[:, 0], e[:, 1], e[:, 2], e[:, 3]) <= self.tol*self.tol
+        on_boundary = np.bincount(queries, weights=near, minlength=m) > 0
+        return inside & ~on_boundary
+
+    def segments_admissible(self, seg_start, seg_end):
+        """Indexed equivalent of segments_admissible."""
+        seg_start = np.asarray(seg_start, dtype=np.float64).reshape(-1, 2)
+        seg_end = np.asarray(seg_end, dtype=np.float64).reshape(-1, 2)
+        m = len(seg_start)
+        enclosed = self.points_in_polygon(seg_start) & self.points_in_polygon(seg_end)
+        px, py, qx, qy = seg_start[:, 0], seg_start[:, 1], seg_end[:, 0], seg_end[:, 1]
+        queries, edge_ids = self.candidate_pairs(px, py, qx, qy)
+        e = self.edges[edge_ids]
+        hits = _vertices_touch_or_cross(px[queries], py[queries], qx[queries], qy[queries], e[:, 0], e[:, 1], e[:, 2], e[:, 3], self.tol)
+        crossing = np.bincount(queries, weights=hits, minlength=m) > 0
+        return enclosed & ~crossing
+
+
+_edge_index_cache = dict()
+
+
+def get_edge_index(vertices, tol=constants.geometry_tolerance):
+    """Returns the EdgeGridIndex of a polygon, built once per process for each distinct vertex array.
+
+    GolfMap builds its index through this cache, so players calling it with the map vertices they receive share
+    the referee's index instead of building another one.
+
+    Args:
+        vertices (array-like): (n, 2) polygon vertices in order, sympy points are accepted
+        tol (float): boundary tolerance in map units
+
+    Returns:
+        EdgeGridIndex: index over the polygon edges
+    """
+    vertices = np.array([[float(x), float(y)] for x, y in vertices], dtype=np.float64).reshape(-1, 2)
+    key = (vertices.tobytes(), tol)
+    if key not in _edge_index_cache:
+        _edge_index_cache[key] = EdgeGridIndex(polygon_edges(vertices), tol)
+    return _edge_index_cache[key]
+
+
+def set_edge_index(vertices, edge_index):
+    """Registers an already built index, e.g. a compiled map's, as the one get_edge_index returns for vertices."""
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    _edge_index_cache[(vertices.tobytes(), edge_index.tol)] = edge_index
@@ -4,7 +4,19 @@ import numpy as np
 import sympy
 import constants
 
-from remi import App, gui
+from remi import App, gui, start
+
+
+def start_gui(golf_game, args, logger):
+    """Serves GolfApp for golf_game, a GolfGame or a replay.ReplayGame, until the server stops."""
+    config = dict()
+    config["address"] = args.address
+    config["start_browser"] = not(args.no_browser)
+    config["update_interval"] = 0.5
+    config["userdata"] = (golf_game, args.automatic, logger)
+    if args.port != -1:
+        config["port"] = args.port
+    start(GolfApp, **config)
 
 
 class GolfApp(App):
@@ -74,6 +86,10 @@ class GolfApp(App):
         self.view_drop_down.onchange.do(self.view_drop_down_changed)
 
         bt_hbox.append([play_step_bt, play_turn_bt, play_all_bt, self.automatic_play, self.view_drop_down])
+        if self.golf_game.checkpoint_path:
+            save_bt = gui.Button("Save Checkpoint")
+            save_bt.onclick.do(self.save_bt_press)
+            bt_hbox.append(save_bt)
 
         play_step_bt.onclick.do(self.play_step_bt_press)
         play_turn_bt.onclick.do(self.play_turn_bt_press)
@@ -164,8 +180,8 @@ class GolfApp(App):
     def display_player(self, player_idx, full_refresh=False):
         self.reset_svgplot(full_refresh)
         if player_idx is not None:
-            for idx, step_play_dict in enumerate(self.golf_game.played[player_idx]):
-                self.plot(step_play_dict, idx+1)
+            for idx, shot in enumerate(self.golf_game.played[player_idx]):
+                self.plot(shot, idx+1)
 
             self.set_label_text("Displaying {}".format(self.golf_game.player_names[player_idx]), 1)
             self.view_drop_down.select_by_key(player_idx)
@@ -197,36 +213,41 @@ class GolfApp(App):
     def play_all_bt_press(self, widget):
         self.golf_game.play_all()
 
-    def plot(self, step_play_dict, idx):
+    def save_bt_press(self, widget):
+        if self.automatic_play.get_value():
+            self.automatic_play.set_value(False)
+        self.golf_game.save_checkpoint()
+        self.set_label_text("Saved checkpoint {}".format(self.golf_game.checkpoint_path), label_num=1)
+
+    def plot(self, shot, idx):
         base_stroke_color = "0,0,0"
-        if not step_play_dict["admissible"]:
+        if not shot.admissible:
             base_stroke_color = "255,0,0"
         stroke_color_air = "rgba({}, 0.2)".format(base_stroke_color)
         stroke_color_land = "rgba({}, 1)".format(base_stroke_color)
 
-        if isinstance(step_play_dict["segment_air"], sympy.geometry.Segment2D):
-            sa = self.draw_line(step_play_dict["segment_air"])
-            sa.set_stroke(3, stroke_color_air)
-            self.svgplot.append(sa)
-        elif isinstance(step_play_dict["segment_air"], sympy.geometry.Point2D):
-            sa = self.draw_point(step_play_dict["segment_air"])
-            sa.set_stroke(3, stroke_color_air)
-            self.svgplot.append(sa)
-
-        if isinstance(step_play_dict["segment_land"], sympy.geometry.Segment2D):
-            sl = self.draw_line(step_play_dict["segment_land"])
-            sl.set_stroke(3, stroke_color_land)
-            self.svgplot.append(sl)
-            text = self.draw_text(step_play_dict["segment_land"].midpoint, str(idx))
-            text.set_stroke(1, stroke_color_land)
-            self.svgplot.append(text)
-        elif isinstance(step_play_dict["segment_land"], sympy.geometry.Point2D):
-            sl = self.draw_point(step_play_dict["segment_land"])
-            sl.set_stroke(3, stroke_color_land)
-            self.svgplot.append(sl)
-            text = self.draw_text(step_play_dict["segment_land"], str(idx))
-            text.set_stroke(1, stroke_color_land)
-            self.svgplot.append(text)
+        start = sympy.Point2D(*shot.start, evaluate=False)
+        landing = sympy.Point2D(*shot.landing, evaluate=False)
+        final = sympy.Point2D(*shot.final, evaluate=False)
+
+        if start != landing:
+            sa = self.draw_line(sympy.geometry.Segment2D(start, landing, evaluate=False))
+        else:
+            sa = self.draw_point(landing)
+        sa.set_stroke(3, stroke_color_air)
+        self.svgplot.append(sa)
+
+        if landing != final:
+            segment_land = sympy.geometry.Segment2D(landing, final, evaluate=False)
+            sl = self.draw_line(segment_land)
+            text = self.draw_text(segment_land.midpoint, str(idx))
+        else:
+            sl = self.draw_point(landing)
+            text = self.draw_text(landing, str(idx))
+        sl.set_stroke(3, stroke_color_land)
+        self.svgplot.append(sl)
+        text.set_stroke(1, stroke_color_land)
+        self.svgplot.append(text)
 
     def update_score_table(self):
         for player_idx, score in enumerate(self.golf_game.scores):
@@ -1,12 +1,19 @@
+import argparse
 import logging
 import os
-import time
-import signal
+import pickle
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import sympy
-from remi import start
-from golf_app import GolfApp
-from golf_map import GolfMap
+from sympy.geometry.entity import GeometryEntity
+from golf_app import start_gui
+from golf_map import GolfMap, FrozenPoint2D, freeze_point
+from trajectory import Trajectory
+from time_budget import TimeBudget
+from player_worker import RemotePlayer
+from phase_timer import PhaseTimer
+import replay
 import constants
 from utils import *
 from players.default_player import Player as DefaultPLayer
@@ -21,16 +28,67 @@ from players.g8_player import Player as G8_Player
 from players.g9_player import Player as G9_Player
 
 
-return_vals = ["player_names", "map", "skills", "scores", "player_states", "distances_from_target", "distance_source_to_target", "start", "target", "penalties", "timeout_count", "error_count", "winner_list", "total_time_sorted",]
+checkpoint_version = 3
+player_vals = ["skills", "player_states", "prev_admissibles", "scores", "penalties", "time_taken", "init_times", "time_budgets", "step_time_totals", "step_counts", "max_step_times", "timeout_count", "error_count", "validation_counts", "played"]
+player_point_vals = ["curr_locs", "prev_locs", "prev_landing_points"]
+checkpoint_vals = player_vals + ["next_player", "processing_turn", "seed"]
+
+return_vals = ["player_names", "map", "skills", "scores", "player_states", "distances_from_target", "distance_source_to_target", "start", "target", "penalties", "timeout_count", "error_count", "winner_list", "total_time_sorted", "validation_counts", "phase_timings",]
+
+def get_player_class(player_name):
+    """Returns the player class and base player name of a name in constants.possible_players."""
+    if player_name.lower() == "d":
+        return DefaultPLayer, "Default Player"
+    return eval("G{}_Player".format(player_name)), "Group {}".format(player_name)
+
+
+def _play_player_alone(args, player_key, player_name, base_player_name, skill):
+    # runs in a process pool worker for GolfGame.__play_parallel
+    golf_game = GolfGame((), args)
+    return golf_game.play_player_alone(player_key, player_name, base_player_name, skill)
+
+
+def _point_args(point):
+    return None if point is None else tuple(point.args)
+
+
+def _point_from_args(args):
+    # rebuilt from the exact coordinates, pickling the point itself would re-evaluate and rationalize floats
+    return None if args is None else GeometryEntity.__new__(FrozenPoint2D, *args)
+
 
 class GolfGame:
-    def __init__(self, player_list, args):
+    def __init__(self, player_list, args, golf_map=None):
+        checkpoint = None
+        if getattr(args, "resume", None):
+            with open(args.resume, "rb") as f:
+                checkpoint = pickle.load(f)
+            if checkpoint.get("version") != checkpoint_version:
+                raise ValueError("Unsupported checkpoint version {} in {}".format(checkpoint.get("version"), args.resume))
+            args.map = checkpoint["map"]
+            args.engine = checkpoint["engine"]
+            args.summary_only = checkpoint["summary_only"]
+            player_list = checkpoint["player_list"]
+        self.checkpoint_path = getattr(args, "checkpoint_path", None)
+        # players never interact, so each one can play its whole game in its own process, resumes run in process
+        self.parallel_players = getattr(args, "parallel_players", False) and checkpoint is None
+
         self.use_gui = not(args.no_gui)
         self.do_logging = not(args.disable_logging)
         if not self.use_gui:
             self.use_timeout = not(args.disable_timeout)
         else:
             self.use_timeout = False
+        self.replay_path = getattr(args, "replay_path", None)
+        # summary mode keeps running aggregates only, no per shot history, for headless tournament runs
+        self.summary_only = getattr(args, "summary_only", False) and not self.use_gui and not self.replay_path
+        self.engine = getattr(args, "engine", None)
+        if self.engine is None:
+            self.engine = constants.default_gui_engine if self.use_gui else constants.default_headless_engine
+        if self.engine not in constants.engines:
+            raise ValueError("Invalid engine {}, should be one of {}".format(self.engine, constants.engines))
+        # sandboxed players run in reusable worker processes that are killed when they overrun their budget
+        self.sandbox = getattr(args, "sandbox", False)
 
         self.logger = logging.getLogger(__name__)
         # create file handler which logs even debug messages
@@ -72,22 +130,45 @@ class GolfGame:
         else:
             self.logger.info("Initialise random number generator with seed {}".format(args.seed))
 
-        self.rng = np.random.default_rng(args.seed)
+        self.seed = args.seed
+        # every player gets its own streams spawned from this sequence, see __player_seed_sequences
+        self.seed_sequence = np.random.SeedSequence(args.seed)
+        self.logger.info("Resolving shots with {} engine".format(self.engine))
 
-        self.golf = GolfMap(args.map, self.logger)
+        if golf_map is not None and golf_map.map_filepath == args.map:
+            self.logger.info("Using shared map {}".format(args.map))
+            self.golf = golf_map
+        else:
+            self.golf = GolfMap(args.map, self.logger)
+        self.map_hash = self.golf.vertices_hash
+        if checkpoint is not None and checkpoint["map_hash"] != self.map_hash:
+            raise ValueError("Map {} changed since the checkpoint was saved".format(args.map))
+        self.player_list = tuple(player_list)
+        self.phase_timer = PhaseTimer(self.golf.map_filepath, getattr(args, "trace_path", None))
         self.players = []
+        self.noise_rngs = []
+        self.player_rngs = []
         self.player_names = []
         self.skills = []
         self.player_states = []
         self.played = []
         self.curr_locs = []
+        self.prev_locs = []
+        self.prev_landing_points = []
+        self.prev_admissibles = []
         self.scores = []
         self.penalties = []
         self.next_player = None
 
         self.time_taken = []
+        self.init_times = []
+        self.time_budgets = []
+        self.step_time_totals = []
+        self.step_counts = []
+        self.max_step_times = []
         self.timeout_count = []
         self.error_count = []
+        self.validation_counts = []
 
         self.winner_list = None
         self.total_time_sorted = None
@@ -100,21 +181,95 @@ class GolfGame:
         self.processing_turn = False
         self.end_message_printed = False
 
-        self.__add_players(player_list, args.skill)
-        self.next_player = self.__assign_next_player()
+        if self.parallel_players:
+            self.__play_parallel(player_list, args)
+        elif checkpoint is None:
+            self.__add_players(player_list, args.skill)
+            self.next_player = self.__assign_next_player()
+        else:
+            self.logger.info("Resuming from checkpoint {}".format(args.resume))
+            self.__add_players(player_list, skills=checkpoint["skills"])
+            self.__restore(checkpoint)
 
         if self.use_gui:
-            config = dict()
-            config["address"] = args.address
-            config["start_browser"] = not(args.no_browser)
-            config["update_interval"] = 0.5
-            config["userdata"] = (self, args.automatic, self.logger)
-            if args.port != -1:
-                config["port"] = args.port
-            start(GolfApp, **config)
+            start_gui(self, args, self.logger)
         else:
             self.logger.debug("No GUI flag specified")
 
+    def save_checkpoint(self, path=None):
+        """Writes the referee state to a checkpoint file, resumed with args.resume.
+
+        The checkpoint holds the seed, the rng states, per player scores, locations, states, time budgets,
+        counters, phase timings and trajectories. Player objects aren't saved, they are constructed again on
+        resume, so state a player keeps outside its precomp_dir starts over. The rng states are restored after
+        they are constructed, in place, so players see the saved state of their generator.
+
+        Args:
+            path (str): checkpoint file, defaults to args.checkpoint_path
+        """
+        path = path or self.checkpoint_path
+        checkpoint = dict()
+        checkpoint["version"] = checkpoint_version
+        checkpoint["map"] = self.golf.map_filepath
+        checkpoint["map_hash"] = self.map_hash
+        checkpoint["engine"] = self.engine
+        checkpoint["summary_only"] = self.summary_only
+        checkpoint["player_list"] = self.player_list
+        checkpoint["skills"] = [int(skill) for skill in self.skills]
+        checkpoint["seed_entropy"] = self.seed_sequence.entropy
+        checkpoint["noise_rng_states"] = [rng.bit_generator.state for rng in self.noise_rngs]
+        checkpoint["player_rng_states"] = [rng.bit_generator.state for rng in self.player_rngs]
+        for val in checkpoint_vals:
+            checkpoint[val] = getattr(self, val)
+        for val in player_point_vals:
+            checkpoint[val] = [_point_args(point) for point in getattr(self, val)]
+        checkpoint["phase_timer_phases"] = self.phase_timer.phases
+
+        tmp_path = "{}.tmp".format(path)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.logger.info("Saved checkpoint {}".format(path))
+
+    def __restore(self, checkpoint):
+        for val in checkpoint_vals:
+            setattr(self, val, checkpoint[val])
+        for val in player_point_vals:
+            setattr(self, val, [_point_from_args(args) for args in checkpoint[val]])
+        self.phase_timer.phases = checkpoint["phase_timer_phases"]
+        self.seed_sequence = np.random.SeedSequence(checkpoint["seed_entropy"])
+        for rng, state in zip(self.noise_rngs, checkpoint["noise_rng_states"]):
+            rng.bit_generator.state = state
+        for rng, state in zip(self.player_rngs, checkpoint["player_rng_states"]):
+            rng.bit_generator.state = state
+
+    def save_replay(self, path=None):
+        """Writes the shots of the game to a binary replay, played back in GolfApp with replay.ReplayGame.
+
+        Args:
+            path (str): replay file, defaults to args.replay_path
+        """
+        path = path or self.replay_path
+        replay.write_replay(path, self.golf.map_filepath, self.map_hash, self.player_names, self.skills, self.seed, self.engine, self.scores, self.player_states, self.played)
+        self.logger.info("Saved replay {}".format(path))
+
+    def reseed(self, seed):
+        """Reseeds the noise and player rngs in place, to fork different continuations from one checkpoint."""
+        self.seed_sequence = np.random.SeedSequence(seed)
+        for player_idx, player_name in enumerate(self.player_names):
+            noise_seed, player_seed, _ = self.__player_seed_sequences(player_name)
+            self.noise_rngs[player_idx].bit_generator.state = np.random.default_rng(noise_seed).bit_generator.state
+            self.player_rngs[player_idx].bit_generator.state = np.random.default_rng(player_seed).bit_generator.state
+
+    def __player_seed_sequences(self, player_name):
+        """Shot noise, player and skill seed sequences of a player.
+
+        They are keyed by the player name instead of the position in the line-up, so a player's outcomes don't
+        depend on which other players are in the game or how many random numbers they draw.
+        """
+        player_key = zlib.crc32(player_name.encode())
+        return np.random.SeedSequence(self.seed_sequence.entropy, spawn_key=(player_key,)).spawn(3)
+
     def set_app(self, golf_app):
         self.golf_app = golf_app
 
@@ -126,68 +281,146 @@ class GolfGame:
     def get_current_player_idx(self):
         return self.next_player
 
-    def __add_players(self, player_list, skill=None):
+    def __player_specs(self, player_list):
+        """Returns (player key, player name, base player name) of the valid entries of player_list."""
         player_count = dict()
         for player_name in player_list:
             if player_name not in player_count:
                 player_count[player_name] = 0
             player_count[player_name] += 1
 
+        specs = []
         count_used = {k: 0 for k in player_count}
         for player_name in player_list:
             if player_name in constants.possible_players:
-                if player_name.lower() == "d":
-                    player_class = DefaultPLayer
-                    base_player_name = "Default Player"
-                else:
-                    player_class = eval("G{}_Player".format(player_name))
-                    base_player_name = "Group {}".format(player_name)
+                _, base_player_name = get_player_class(player_name)
                 count_used[player_name] += 1
                 if player_count[player_name] == 1:
-                    self.__add_player(player_class, "{}".format(base_player_name), base_player_name=base_player_name, skill=skill)
+                    specs.append((player_name, "{}".format(base_player_name), base_player_name))
                 else:
-                    self.__add_player(player_class, "{}.{}".format(base_player_name, count_used[player_name]), base_player_name=base_player_name, skill=skill)
+                    specs.append((player_name, "{}.{}".format(base_player_name, count_used[player_name]), base_player_name))
             else:
                 self.logger.error("Failed to insert player {} since invalid player name provided.".format(player_name))
+        return specs
+
+    def __add_players(self, player_list, skill=None, skills=None):
+        for player_key, player_name, base_player_name in self.__player_specs(player_list):
+            if skills is not None:
+                skill = skills[len(self.players)]
+            self.__add_player(get_player_class(player_key)[0], player_name, base_player_name=base_player_name, skill=skill)
+
+    def __play_parallel(self, player_list, args):
+        """Initializes and plays every player in its own pool process, then merges the results in line-up order.
+
+        Each player draws from its own name keyed streams, so the results equal those of a sequential game with
+        the same seed. Player log files aren't written in this mode.
+        """
+        player_args = argparse.Namespace(**vars(args))
+        player_args.no_gui = True
+        player_args.disable_logging = True
+        player_args.log_path = None
+        player_args.disable_timeout = not self.use_timeout
+        player_args.engine = self.engine
+        player_args.summary_only = self.summary_only
+        player_args.parallel_players = False
+        player_args.replay_path = None
+        player_args.checkpoint_path = None
+        # an unseeded game still has to give every player streams from the same entropy
+        player_args.seed = self.seed_sequence.entropy
+        specs = self.__player_specs(player_list)
+        if not specs:
+            return
+        self.logger.info("Playing {} players in parallel".format(len(specs)))
+        with ProcessPoolExecutor(max_workers=min(len(specs), os.cpu_count() or 1)) as executor:
+            futures = [executor.submit(_play_player_alone, player_args, player_key, player_name, base_player_name, args.skill) for player_key, player_name, base_player_name in specs]
+            for future in futures:
+                self.__append_player_state(future.result())
+        self.next_player = self.__assign_next_player()
+
+    def play_player_alone(self, player_key, player_name, base_player_name, skill=None):
+        """Plays one player in this otherwise empty game, returns its state for __append_player_state."""
+        self.__add_player(get_player_class(player_key)[0], player_name, base_player_name=base_player_name, skill=skill)
+        self.next_player = self.__assign_next_player()
+        self.play_all()
+        player_state = dict()
+        player_state["player_name"] = player_name
+        for val in player_vals:
+            player_state[val] = getattr(self, val)[0]
+        for val in player_point_vals:
+            player_state[val] = _point_args(getattr(self, val)[0])
+        player_state["phase_timer_phases"] = self.phase_timer.phases[0]
+        player_state["noise_rng_state"] = self.noise_rngs[0].bit_generator.state
+        player_state["player_rng_state"] = self.player_rngs[0].bit_generator.state
+        return player_state
+
+    def __append_player_state(self, player_state):
+        self.players.append(None)
+        self.player_names.append(player_state["player_name"])
+        for val in player_vals:
+            getattr(self, val).append(player_state[val])
+        for val in player_point_vals:
+            getattr(self, val).append(_point_from_args(player_state[val]))
+        self.phase_timer.add_player()
+        self.phase_timer.phases[-1] = player_state["phase_timer_phases"]
+        noise_rng = np.random.default_rng()
+        noise_rng.bit_generator.state = player_state["noise_rng_state"]
+        self.noise_rngs.append(noise_rng)
+        player_rng = np.random.default_rng()
+        player_rng.bit_generator.state = player_state["player_rng_state"]
+        self.player_rngs.append(player_rng)
 
     def __add_player(self, player_class, player_name, base_player_name, skill=None):
         if player_name not in self.player_names:
+            noise_seed, player_seed, skill_seed = self.__player_seed_sequences(player_name)
+            player_rng = np.random.default_rng(player_seed)
             if skill is None or skill < constants.min_skill or skill > constants.max_skill:
-                skill = self.rng.integers(constants.min_skill, constants.max_skill+1)
+                skill = int(np.random.default_rng(skill_seed).integers(constants.min_skill, constants.max_skill+1))
             self.logger.info("Adding player {} from class {} with skill {}".format(player_name, player_class.__module__, skill))
             precomp_dir = os.path.join("precomp", base_player_name)
             os.makedirs(precomp_dir, exist_ok=True)
             player_map_path = slugify(self.golf.map_filepath)
 
             is_timeout = False
-            if self.use_timeout:
-                signal.signal(signal.SIGALRM, timeout_handler)
-                signal.alarm(constants.timeout)
+            budget = TimeBudget(constants.timeout)
             try:
-                start_time = time.time()
-                player = player_class(skill=skill, rng=self.rng, logger=self.__get_player_logger(player_name), golf_map=self.golf.golf_map.copy(), start=self.golf.start.copy(), target=self.golf.target.copy(), map_path=player_map_path, precomp_dir=precomp_dir)
-                if self.use_timeout:
-                    signal.alarm(0)      # Clear alarm
+                player_logger = self.__get_player_logger(player_name)
+                if self.sandbox:
+                    log_file = os.path.join(self.log_dir, "{}.log".format(player_name)) if self.do_logging else None
+                    player = self.__call_player(budget, RemotePlayer, player_class, skill=skill, rng=player_rng, golf_map=self.golf.golf_map, start=self.golf.start, target=self.golf.target, map_path=player_map_path, precomp_dir=precomp_dir, logger_name=player_logger.name, log_file=log_file)
+                else:
+                    player = self.__call_player(budget, player_class, skill=skill, rng=player_rng, logger=player_logger, golf_map=self.golf.golf_map, start=self.golf.start, target=self.golf.target, map_path=player_map_path, precomp_dir=precomp_dir)
             except TimeoutException:
                 is_timeout = True
                 player = None
                 self.logger.error("Initialization Timeout {} since {:.3f}s reached.".format(player_name, constants.timeout))
 
-            init_time = time.time() - start_time
+            init_time = budget.last_wall
             
             if not is_timeout:
                 self.logger.info("Initializing player {} took {:.3f}s".format(player_name, init_time))
             self.players.append(player)
+            self.noise_rngs.append(np.random.default_rng(noise_seed))
+            self.player_rngs.append(player_rng)
             self.player_names.append(player_name)
             self.skills.append(skill)
             self.player_states.append("NP")
-            self.played.append([])
-            self.curr_locs.append(self.golf.start.copy())
+            self.played.append(None if self.summary_only else Trajectory())
+            self.curr_locs.append(self.golf.start)
+            self.prev_locs.append(None)
+            self.prev_landing_points.append(None)
+            self.prev_admissibles.append(None)
             self.scores.append(0)
             self.penalties.append(0)
-            self.time_taken.append([init_time])
+            self.time_taken.append(None if self.summary_only else [init_time])
+            self.init_times.append(init_time)
+            self.time_budgets.append(budget)
+            self.step_time_totals.append(0.)
+            self.step_counts.append(0)
+            self.max_step_times.append(0.)
             self.timeout_count.append(0)
             self.error_count.append(0)
+            self.validation_counts.append({"numeric": 0, "sympy": 0})
+            self.phase_timer.add_player()
             
             if is_timeout:
                 player_idx = len(self.players) - 1
@@ -214,29 +447,45 @@ class GolfGame:
 
         return player_logger
 
+    def __call_player(self, budget, func, *args, **kwargs):
+        if self.sandbox:
+            # a RemotePlayer enforces the deadline itself and kills its worker, the budget only measures
+            timeout = budget.remaining() if self.use_timeout else None
+            return budget.run(func, *args, enforce=False, timeout=timeout, **kwargs)
+        return budget.run(func, *args, enforce=self.use_timeout, **kwargs)
+
+    def __release_players(self):
+        for player in self.players:
+            if isinstance(player, RemotePlayer):
+                player.release()
+
     def is_game_ended(self):
         return np.all([x in constants.end_player_states for x in self.player_states])
 
     def __game_end(self):
         if not self.end_message_printed and self.is_game_ended():
             self.end_message_printed = True
+            self.__release_players()
+            self.phase_timer.close()
+            if self.replay_path:
+                self.save_replay()
             self.logger.info("Game ended as each player finished playing")
             if self.use_gui:
                 self.golf_app.set_label_text("Game ended as each player finished playing")
 
             total_time = np.zeros(len(self.players))
-            for player_idx, player_time_taken in enumerate(self.time_taken):
-                player_time_taken_flatten = np.array(player_time_taken)
-                
-                if player_time_taken_flatten.size == 0:
-                    player_time_taken_flatten = np.zeros(2)
-                elif player_time_taken_flatten.size == 1:
-                    player_time_taken_flatten = np.append(player_time_taken_flatten, 0)
-                
-                self.logger.info("{} total time {:.3f}s, init time {:.3f}s, total step time: {:.3f}s".format(self.player_names[player_idx], np.sum(player_time_taken_flatten), player_time_taken_flatten[0], np.sum(player_time_taken_flatten[1:])))
-
-                self.logger.info("{} took {} steps, avg time {:.3f}s, avg step time {:.3f}s, max step time {:.3f}s".format(self.player_names[player_idx], player_time_taken_flatten.size - 1, np.mean(player_time_taken_flatten), np.mean(player_time_taken_flatten[1:]), np.amax(player_time_taken_flatten[1:])))
-                total_time[player_idx] = np.sum(player_time_taken_flatten)
+            for player_idx in range(len(self.players)):
+                init_time = self.init_times[player_idx]
+                step_time_total = self.step_time_totals[player_idx]
+                # a player without steps is reported as one step of 0s
+                step_count = max(self.step_counts[player_idx], 1)
+                player_total_time = init_time + step_time_total
+
+                self.logger.info("{} total time {:.3f}s, init time {:.3f}s, total step time: {:.3f}s".format(self.player_names[player_idx], player_total_time, init_time, step_time_total))
+
+                self.logger.info("{} took {} steps, avg time {:.3f}s, avg step time {:.3f}s, max step time {:.3f}s".format(self.player_names[player_idx], step_count, player_total_time/(step_count+1), step_time_total/step_count, self.max_step_times[player_idx]))
+                self.logger.info("{} cpu time {:.3f}s".format(self.player_names[player_idx], self.time_budgets[player_idx].cpu_used))
+                total_time[player_idx] = player_total_time
             self.logger.info("Total time taken by all players {:.3f}s".format(np.sum(total_time)))
             total_time_sort_idx = np.argsort(total_time)[::-1]
             self.total_time_sorted = [(self.player_names[player_idx], total_time[player_idx]) for player_idx in total_time_sort_idx]
@@ -252,6 +501,10 @@ class GolfGame:
                 if player_error_count > 0:
                     self.logger.info("{} had exceptions {} times".format(self.player_names[player_idx], player_error_count))
 
+            for player_idx, player_validation_counts in enumerate(self.validation_counts):
+                if player_validation_counts["sympy"] > 0:
+                    self.logger.info("{} returned {} numeric and {} sympy values needing sympy validation".format(self.player_names[player_idx], player_validation_counts["numeric"], player_validation_counts["sympy"]))
+
             for player_idx, penalty in enumerate(self.penalties):
                 if penalty != 0:
                     self.logger.info("{} had {} {}".format(self.player_names[player_idx], penalty, "penalties" if penalty != 1 else "penalty"))
@@ -267,13 +520,13 @@ class GolfGame:
             
 
             self.logger.info("Distance from source to target {:.3f}".format(self.distance_source_to_target))
-            self.distances_from_target = [float(self.curr_locs[player_idx].distance(self.golf.target)) if self.player_states[player_idx] != "S" else 0.0 for player_idx in range(len(self.player_names))]
+            self.distances_from_target = [float(np.linalg.norm(np.subtract(to_numeric_point(self.curr_locs[player_idx]), self.golf.target_np))) if self.player_states[player_idx] != "S" else 0.0 for player_idx in range(len(self.player_names))]
             for player_idx, distance_from_target in enumerate(self.distances_from_target):
                 self.logger.info("{} final distance from target: {:.3f}".format(self.player_names[player_idx], distance_from_target))
 
             winner_list_idx = [idx for idx in range(len(self.player_names)) if self.player_states[idx] == "S"] # winner(s) should solve the game
             if len(winner_list_idx):
-                scores_array = np.array([self.scores[idx] for idx in winner_list_idx], dtype=np.int)
+                scores_array = np.array([self.scores[idx] for idx in winner_list_idx], dtype=int)
                 modified_winner_list_idx = np.argwhere(scores_array == np.amin(scores_array)).squeeze(axis=1) # winner(s) should have min score too
                 final_winner_list_idx = [winner_list_idx[i] for i in modified_winner_list_idx]
                 self.winner_list = [self.player_names[i] for i in final_winner_list_idx]
@@ -301,13 +554,19 @@ class GolfGame:
             if self.use_gui:
                 self.golf_app.set_label_text("Next turn {}".format(self.player_names[self.next_player]))
 
-    def get_state(self):
+    @property
+    def phase_timings(self):
+        return self.phase_timer.get_state(self.player_names)
+
+    def get_state(self, include_trajectories=False):
         return_dict = dict()
         for val in return_vals:
             value = getattr(self, val)
             if isinstance(value, np.ndarray):
                 value = value.tolist()
             return_dict[val] = value
+        if include_trajectories and not self.summary_only:
+            return_dict["trajectories"] = [trajectory.to_list() for trajectory in self.played]
         return return_dict
     
     def play_all(self):
@@ -326,21 +585,23 @@ class GolfGame:
         elif not self.end_message_printed:
             self.__game_end()
 
-    def play(self, run_stepwise=False, do_update=True, display_end=True):
-        if not self.processing_turn:
-            if not self.is_game_ended():
-                if self.player_states[self.next_player] in constants.end_player_states:
-                    self.logger.debug("Can't pass to the {}, as the player's game finished".format(self.player_names[self.next_player]))
-                    self.next_player = self.__assign_next_player()
-                    self.logger.debug("Assigned new player {}".format(self.player_names[self.next_player]))
+    def __begin_turn(self):
+        if self.player_states[self.next_player] in constants.end_player_states:
+            self.logger.debug("Can't pass to the {}, as the player's game finished".format(self.player_names[self.next_player]))
+            self.next_player = self.__assign_next_player()
+            self.logger.debug("Assigned new player {}".format(self.player_names[self.next_player]))
 
-                self.logger.debug("Current turn {}".format(self.player_names[self.next_player]))
-                if self.use_gui:
-                    self.golf_app.set_label_text("Current turn {}".format(self.player_names[self.next_player]))
+        self.logger.debug("Current turn {}".format(self.player_names[self.next_player]))
+        if self.use_gui:
+            self.golf_app.set_label_text("Current turn {}".format(self.player_names[self.next_player]))
 
-                self.processing_turn = True
-                self.player_states[self.next_player] = "P"
+        self.processing_turn = True
+        self.player_states[self.next_player] = "P"
 
+    def play(self, run_stepwise=False, do_update=True, display_end=True):
+        if not self.processing_turn:
+            if not self.is_game_ended():
+                self.__begin_turn()
             else:
                 if display_end and not self.end_message_printed:
                     self.__game_end()
@@ -368,63 +629,122 @@ class GolfGame:
         if display_end and self.is_game_ended() and not self.end_message_printed:
             self.__game_end()
 
-    def __check_action(self, returned_action):
+    def next_action(self):
+        """Plays up to the next shot and returns the action to resolve, for GolfGameBatch.
+
+        Steps that end without a shot, like invalid actions and timeouts, are handled here, the shot itself is
+        resolved by the caller and passed to apply_shot.
+
+        Returns:
+            tuple: (player_idx, (distance, angle, step_time)), None once the game ended
+        """
+        while not self.is_game_ended():
+            if not self.processing_turn:
+                self.__begin_turn()
+            player_idx = self.next_player
+            pass_next, action = self.__request_action(player_idx, do_update=False)
+            if action is not None:
+                return player_idx, action
+            if pass_next:
+                self.__turn_end()
+        if not self.end_message_printed:
+            self.__game_end()
+        return None
+
+    def apply_shot(self, player_idx, action, step_play_dict, move_ns=0):
+        """Completes the step started by next_action with its resolved shot.
+
+        Args:
+            player_idx (int): player returned by next_action
+            action (tuple): action returned by next_action
+            step_play_dict (dict): shot from step_play_dict_from_shot
+            move_ns (int): shot resolution time charged to the move phase
+        """
+        self.phase_timer.add(player_idx, "move", move_ns)
+        self.phase_timer.resume()
+        if self.__complete_step(player_idx, action, step_play_dict, do_update=False):
+            self.__turn_end()
+
+    def __check_value(self, x, player_idx):
+        if x is None:
+            return False
+        # plain numbers only need a finite check, sympy.simplify is kept for sympy expressions and anything else
+        if isinstance(x, (int, float, np.integer, np.floating)) and not isinstance(x, (bool, np.bool_)):
+            self.validation_counts[player_idx]["numeric"] += 1
+            try:
+                return bool(np.isfinite(float(x)))
+            except OverflowError:
+                # python ints beyond the float range
+                return False
+        self.validation_counts[player_idx]["sympy"] += 1
+        return sympy.simplify(x).is_real
+
+    def __check_action(self, returned_action, player_idx):
         if not returned_action:
             return False
         is_valid = False
         if isiterable(returned_action) and count_iterable(returned_action) == 2:
-            if np.all([x is not None and sympy.simplify(x).is_real for x in returned_action]):
+            if np.all([self.__check_value(x, player_idx) for x in returned_action]):
                 is_valid = True
 
         return is_valid
 
     def __step(self, player_idx, do_update=True):
-        pass_next = False
+        pass_next, action = self.__request_action(player_idx, do_update)
+        if action is not None:
+            step_play_dict = self.__move(action[0], action[1], player_idx)
+            self.phase_timer.lap(player_idx, "move")
+            pass_next = self.__complete_step(player_idx, action, step_play_dict, do_update)
+        return pass_next
+
+    def __request_action(self, player_idx, do_update):
+        """First part of a step, asks the player for an action and validates it.
+
+        Returns:
+            tuple: (pass_next, action), action is (distance, angle, step_time) if a shot has to be resolved
+        """
         if self.player_states[player_idx] in ["F", "S"] or self.scores[player_idx] >= constants.max_tries:
-            pass_next = True
+            if do_update and self.use_gui:
+                self.golf_app.update_score_table()
+            return True, None
         else:
             self.scores[player_idx] += 1
+            budget = self.time_budgets[player_idx]
+            step = self.scores[player_idx]
+            timer = self.phase_timer
+            timer.mark()
             try:
-                time_limit_already_exceeded = False
-                if self.use_timeout:
-                    remaining_time = np.ceil(constants.timeout - np.sum(self.time_taken[player_idx])).astype(int)
-                    if remaining_time > 0:
-                        signal.signal(signal.SIGALRM, timeout_handler)
-                        signal.alarm(remaining_time)
-                    else:
-                        time_limit_already_exceeded = True
+                time_limit_already_exceeded = self.use_timeout and budget.exhausted()
                 if not time_limit_already_exceeded:
                     try:
-                        start_time = time.time()
-                        prev_loc = None
-                        prev_landing_point = None
-                        prev_admissible = None
-                        if len(self.played[player_idx]):
-                            last_step_play_dict = self.played[player_idx][-1]
-                            prev_loc = last_step_play_dict["last_location"].copy()
-                            prev_landing_point = last_step_play_dict["observed_landing_point"].copy()
-                            prev_admissible = last_step_play_dict["admissible"]
-                        returned_action = self.players[player_idx].play(
+                        returned_action = self.__call_player(
+                            budget,
+                            self.players[player_idx].play,
                             score=self.scores[player_idx],
-                            golf_map=self.golf.golf_map.copy(),
-                            target=self.golf.target.copy(),
-                            curr_loc=self.curr_locs[player_idx].copy(),
-                            prev_loc=prev_loc,
-                            prev_landing_point=prev_landing_point,
-                            prev_admissible=prev_admissible)
-                        if self.use_timeout:
-                            signal.alarm(0)      # Clear alarm
+                            golf_map=self.golf.golf_map,
+                            target=self.golf.target,
+                            curr_loc=self.curr_locs[player_idx],
+                            prev_loc=self.prev_locs[player_idx],
+                            prev_landing_point=self.prev_landing_points[player_idx],
+                            prev_admissible=self.prev_admissibles[player_idx])
                     except TimeoutException:
+                        timer.lap(player_idx, "think")
                         self.logger.error("Timeout {} since {:.3f}s reached.".format(self.player_names[player_idx], constants.timeout))
                         returned_action = None
                         self.timeout_count[player_idx] += 1
                         self.scores[player_idx] = constants.max_tries
-                    
-                    step_time = time.time() - start_time
-                    self.time_taken[player_idx].append(step_time)
+                    else:
+                        timer.lap(player_idx, "think")
+
+                    step_time = budget.last_wall
+                    if not self.summary_only:
+                        self.time_taken[player_idx].append(step_time)
+                    self.step_time_totals[player_idx] += step_time
+                    self.step_counts[player_idx] += 1
+                    self.max_step_times[player_idx] = max(self.max_step_times[player_idx], step_time)
                 
                 else:                    
-                    self.logger.error("Skipping {} since time limit of {:.3f}s already exceeded and already ran for {:.3f}s.".format(self.player_names[player_idx], constants.timeout, np.sum(self.time_taken[player_idx])))
+                    self.logger.error("Skipping {} since time limit of {:.3f}s already exceeded and already ran for {:.3f}s.".format(self.player_names[player_idx], constants.timeout, budget.wall_used))
                     returned_action = None
                     self.timeout_count[player_idx] += 1
                     self.scores[player_idx] = constants.max_tries
@@ -434,51 +754,136 @@ class GolfGame:
                 self.error_count[player_idx] += 1
                 self.scores[player_idx] = constants.max_tries
 
-            is_valid_action = self.__check_action(returned_action)
+            timer.lap(player_idx, "logging")
+            is_valid_action = self.__check_action(returned_action, player_idx)
+            timer.lap(player_idx, "validation")
             if is_valid_action:
                 distance, angle = returned_action
                 self.logger.debug("Received Distance: {:.3f}, Angle: {:.3f} from {} in {:.3f}s".format(float(distance), float(angle), self.player_names[player_idx], step_time))
+                timer.lap(player_idx, "logging")
                 if self.use_gui:
                     self.golf_app.set_label_text("{}, ({:.2f},{:.2f})".format(self.golf_app.get_label_text(), float(distance), float(angle)))
-                step_play_dict = self.__move(distance, angle, player_idx)
-                
-                self.curr_locs[player_idx] = step_play_dict["observed_final_point"]
-                if not step_play_dict["admissible"]:
-                    self.penalties[player_idx] += 1
+                    timer.lap(player_idx, "gui")
+                return False, (distance, angle, step_time)
 
-                self.played[player_idx].append(step_play_dict)
+            self.logger.info("{} failed since provided invalid action {}".format(self.player_names[player_idx], returned_action))
+            if self.use_gui:
+                self.golf_app.set_label_text("{} failed since provided invalid action {}".format(self.player_names[player_idx], returned_action))
+            self.player_states[player_idx] = "F"
+            self.__end_step(player_idx, step, do_update)
+            return True, None
 
-                if do_update and self.use_gui:
-                    self.golf_app.plot(step_play_dict, len(self.played[player_idx]))
-                
-                if step_play_dict["reached_target"]:
-                    self.logger.info("{} reached Target with score {}".format(self.player_names[player_idx], self.scores[player_idx]))
-                    if self.use_gui:
-                        self.golf_app.set_label_text("{} reached Target with score {}".format(self.player_names[player_idx], self.scores[player_idx]))
-                    self.player_states[player_idx] = "S"
-                    pass_next = True
-                elif self.scores[player_idx] >= constants.max_tries:
-                    self.logger.info("{} failed since it used {} max tries".format(self.player_names[player_idx], constants.max_tries))
-                    if self.use_gui:
-                        self.golf_app.set_label_text("{} failed since it used {} max tries".format(self.player_names[player_idx], constants.max_tries))
-                    self.player_states[player_idx] = "F"
-                    pass_next = True
-            else:
-                self.logger.info("{} failed since provided invalid action {}".format(self.player_names[player_idx], returned_action))
-                if self.use_gui:
-                    self.golf_app.set_label_text("{} failed since provided invalid action {}".format(self.player_names[player_idx], returned_action))
-                self.player_states[player_idx] = "F"
-                pass_next = True
+    def __complete_step(self, player_idx, action, step_play_dict, do_update):
+        """Second part of a step, records the resolved shot and updates the player's state.
+
+        Returns:
+            bool: whether the turn passes to the next player
+        """
+        pass_next = False
+        timer = self.phase_timer
+        distance, angle, step_time = action
+
+        self.prev_locs[player_idx] = step_play_dict["last_location"]
+        self.prev_landing_points[player_idx] = step_play_dict["observed_landing_point"]
+        self.prev_admissibles[player_idx] = step_play_dict["admissible"]
+        self.curr_locs[player_idx] = step_play_dict["observed_final_point"]
+        if not step_play_dict["admissible"]:
+            self.penalties[player_idx] += 1
+
+        if not self.summary_only:
+            self.played[player_idx].append(
+                start=to_numeric_point(step_play_dict["last_location"]),
+                landing=to_numeric_point(step_play_dict["landing_point"]),
+                final=to_numeric_point(step_play_dict["final_point"]),
+                admissible=step_play_dict["admissible"],
+                reached_target=step_play_dict["reached_target"],
+                intended_distance=float(distance),
+                intended_angle=float(angle),
+                actual_distance=step_play_dict["actual_distance"],
+                actual_angle=step_play_dict["actual_angle"],
+                think_time=step_time)
+        timer.lap(player_idx, "logging")
 
         if do_update and self.use_gui:
-            self.golf_app.update_score_table()
+            self.golf_app.plot(self.played[player_idx][-1], len(self.played[player_idx]))
+            timer.lap(player_idx, "gui")
+
+        if step_play_dict["reached_target"]:
+            self.logger.info("{} reached Target with score {}".format(self.player_names[player_idx], self.scores[player_idx]))
+            if self.use_gui:
+                self.golf_app.set_label_text("{} reached Target with score {}".format(self.player_names[player_idx], self.scores[player_idx]))
+            self.player_states[player_idx] = "S"
+            pass_next = True
+        elif self.scores[player_idx] >= constants.max_tries:
+            self.logger.info("{} failed since it used {} max tries".format(self.player_names[player_idx], constants.max_tries))
+            if self.use_gui:
+                self.golf_app.set_label_text("{} failed since it used {} max tries".format(self.player_names[player_idx], constants.max_tries))
+            self.player_states[player_idx] = "F"
+            pass_next = True
 
+        self.__end_step(player_idx, self.scores[player_idx], do_update)
         return pass_next
 
+    def __end_step(self, player_idx, step, do_update):
+        self.phase_timer.lap(player_idx, "logging")
+        if do_update and self.use_gui:
+            self.golf_app.update_score_table()
+            self.phase_timer.lap(player_idx, "gui")
+        self.phase_timer.end_step(self.player_names[player_idx], step)
+
     def __move(self, distance, angle, player_idx):
+        if self.engine == "numeric":
+            return self.__move_numeric(distance, angle, player_idx)
+        return self.__move_sympy(distance, angle, player_idx)
+
+    def __move_numeric(self, distance, angle, player_idx):
+        """Float64 counterpart of __move_sympy, a batch of one shot through GolfMap.resolve_shots.
+
+        Draws the same random numbers in the same order, admissibility and target checks agree with the sympy
+        engine except for shots within constants.geometry_tolerance of the map boundary or target circle.
+        """
+        curr_loc = self.curr_locs[player_idx]
+        shot = self.golf.resolve_shots([to_numeric_point(curr_loc)], float(distance), float(angle), self.skills[player_idx], self.noise_rngs[player_idx])
+        return self.step_play_dict_from_shot(player_idx, float(distance), shot)
+
+    def step_play_dict_from_shot(self, player_idx, distance, shot, shot_idx=0):
+        """Converts row shot_idx of a GolfMap.resolve_shots result for the player's current location to the
+        step_play_dict of __move.
+        """
+        curr_loc = self.curr_locs[player_idx]
+        if distance > constants.max_dist+self.skills[player_idx]:
+            self.logger.debug("Provide invalid distance {:.3f}, distance should be < {}".format(distance, constants.max_dist+self.skills[player_idx]))
+        elif distance < constants.min_putter_dist:
+            self.logger.debug("Using Putter as provided distance {:.3f} less than {}".format(distance, constants.min_putter_dist))
+        self.logger.debug("Observed Distance: {:.3f}, Angle: {:.3f}".format(shot["actual_distances"][shot_idx], shot["actual_angles"][shot_idx]))
+
+        admissible = bool(shot["admissible"][shot_idx])
+        # float coordinates are kept as sympy Floats, rationalizing them costs more than the whole numeric check
+        landing_point = FrozenPoint2D(*shot["landing_points"][shot_idx], evaluate=False)
+        final_point = FrozenPoint2D(*shot["final_points"][shot_idx], evaluate=False)
+        if admissible:
+            observed_final_point = final_point
+            observed_landing_point = landing_point
+        else:
+            observed_final_point = curr_loc
+            observed_landing_point = curr_loc
+
+        step_play_dict = dict()
+        step_play_dict["landing_point"]= landing_point
+        step_play_dict["final_point"]= final_point
+        step_play_dict["actual_distance"]= float(shot["actual_distances"][shot_idx])
+        step_play_dict["actual_angle"]= float(shot["actual_angles"][shot_idx])
+        step_play_dict["last_location"]= curr_loc
+        step_play_dict["observed_final_point"]= observed_final_point
+        step_play_dict["observed_landing_point"]= observed_landing_point
+        step_play_dict["admissible"]= admissible
+        step_play_dict["reached_target"]= bool(shot["reached_target"][shot_idx])
+        return step_play_dict
+
+    def __move_sympy(self, distance, angle, player_idx):
         curr_loc = self.curr_locs[player_idx]
-        actual_distance = self.rng.normal(distance, distance/self.skills[player_idx])
-        actual_angle = self.rng.normal(angle, 1/(2*self.skills[player_idx]))
+        actual_distance = self.noise_rngs[player_idx].normal(distance, distance/self.skills[player_idx])
+        actual_angle = self.noise_rngs[player_idx].normal(angle, 1/(2*self.skills[player_idx]))
 
         if distance <= constants.max_dist+self.skills[player_idx] and distance >= constants.min_putter_dist:
             landing_point = sympy.Point2D(curr_loc.x+actual_distance*sympy.cos(actual_angle), curr_loc.y+actual_distance*sympy.sin(actual_angle))
@@ -496,7 +901,6 @@ class GolfGame:
         
         self.logger.debug("Observed Distance: {:.3f}, Angle: {:.3f}".format(actual_distance, actual_angle))
 
-        segment_air = sympy.geometry.Segment2D(curr_loc, landing_point)
         segment_land = sympy.geometry.Segment2D(landing_point, final_point)
 
         if segment_land.distance(self.golf.target) <= constants.target_radius:
@@ -509,17 +913,19 @@ class GolfGame:
         admissible = False
         if self.golf.golf_map.encloses(segment_land) and not self.golf.golf_map.intersection(segment_land):
             admissible = True
-            observed_final_point = final_point
-            observed_landing_point = landing_point
+            observed_final_point = freeze_point(final_point)
+            observed_landing_point = freeze_point(landing_point)
         else:
             observed_final_point = curr_loc
             observed_landing_point = curr_loc
 
         reached_target = reached_target and admissible
 
-        step_play_dict = dict()                
-        step_play_dict["segment_air"]= segment_air
-        step_play_dict["segment_land"]= segment_land
+        step_play_dict = dict()
+        step_play_dict["landing_point"]= landing_point
+        step_play_dict["final_point"]= final_point
+        step_play_dict["actual_distance"]= float(actual_distance)
+        step_play_dict["actual_angle"]= float(actual_angle)
         step_play_dict["last_location"]= self.curr_locs[player_idx]
         step_play_dict["observed_final_point"]= observed_final_point
         step_play_dict["observed_landing_point"]= observed_landing_point
@@ -0,0 +1,64 @@
+import logging
+import time
+import numpy as np
+from golf_map import GolfMap
+from golf_game import GolfGame
+from utils import to_numeric_point
+
+
+class GolfGameBatch:
+    """Runs K headless games of one map side by side, resolving the shots of each round in one call.
+
+    The map is loaded once and shared by every game. Each game keeps its own players and rngs seeded from its
+    args, and the noise of a shot is drawn from its player's noise rng in the same order as in GolfGame.__move,
+    so every game ends exactly as it would when run alone. Only the numeric engine is supported.
+    """
+    def __init__(self, player_list, args_list):
+        self.logger = logging.getLogger(__name__)
+        maps = set(args.map for args in args_list)
+        if len(maps) != 1:
+            raise ValueError("All games of a batch should use the same map, got {}".format(sorted(maps)))
+        for args in args_list:
+            if not args.no_gui:
+                raise ValueError("Batched games can't use the GUI")
+            if getattr(args, "engine", None) not in [None, "numeric"]:
+                raise ValueError("Batched games need the numeric engine, got {}".format(args.engine))
+        self.golf = GolfMap(args_list[0].map, self.logger)
+        self.games = [GolfGame(player_list, args, golf_map=self.golf) for args in args_list]
+
+    def play_all(self):
+        """Plays every game to its end, one shot per unfinished game and round."""
+        active = list(self.games)
+        while active:
+            requests = []
+            for game in active:
+                request = game.next_action()
+                if request is not None:
+                    requests.append((game, request))
+            if not requests:
+                break
+
+            starts = np.empty((len(requests), 2))
+            distances = np.empty(len(requests))
+            skills = np.empty(len(requests))
+            actual_distances = np.empty(len(requests))
+            actual_angles = np.empty(len(requests))
+            for shot_idx, (game, (player_idx, action)) in enumerate(requests):
+                starts[shot_idx] = to_numeric_point(game.curr_locs[player_idx])
+                distances[shot_idx] = float(action[0])
+                skills[shot_idx] = game.skills[player_idx]
+                actual_distance, actual_angle = self.golf.draw_shot_noise(distances[shot_idx], float(action[1]), skills[shot_idx], game.noise_rngs[player_idx])
+                actual_distances[shot_idx] = actual_distance
+                actual_angles[shot_idx] = actual_angle
+
+            start_ns = time.perf_counter_ns()
+            shots = self.golf.resolve_noisy_shots(starts, distances, actual_distances, actual_angles, skills)
+            move_ns = (time.perf_counter_ns() - start_ns)//len(requests)
+
+            for shot_idx, (game, (player_idx, action)) in enumerate(requests):
+                step_play_dict = game.step_play_dict_from_shot(player_idx, distances[shot_idx], shots, shot_idx)
+                game.apply_shot(player_idx, action, step_play_dict, move_ns)
+            active = [game for game, _ in requests]
+
+    def get_states(self, include_trajectories=False):
+        return [game.get_state(include_trajectories) for game in self.games]
@@ -1,20 +1,206 @@
 import logging
 import os
+import hashlib
 import numpy as np
 import sympy
 import json
+from sympy.geometry.entity import GeometryEntity
 import constants
+import geometry
+import map_compiler
+import map_validator
+
+class ReadOnly:
+    """Mixin rejecting public attribute assignment, sympy's own underscore caches stay writable."""
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        if not name.startswith("_"):
+            raise AttributeError("{} is read-only, can't set {}".format(type(self).__name__, name))
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        if not name.startswith("_"):
+            raise AttributeError("{} is read-only, can't delete {}".format(type(self).__name__, name))
+        super().__delattr__(name)
+
+
+class FrozenPoint2D(ReadOnly, sympy.geometry.Point2D):
+    """sympy Point2D that is safe to share by reference between the referee and players."""
+    pass
+
+
+def freeze_point(point):
+    """Wraps a sympy point as FrozenPoint2D reusing its coordinates, without the re-evaluation of Point2D.copy()."""
+    if isinstance(point, FrozenPoint2D):
+        return point
+    return GeometryEntity.__new__(FrozenPoint2D, *point.args)
+
+
+def exact_point(cls, coords):
+    """Builds a point of cls from the rational strings of its coordinates, see map_compiler.exact_coords."""
+    return GeometryEntity.__new__(cls, *[sympy.Rational(coord) for coord in coords])
+
+
+class MapView(ReadOnly, sympy.Polygon):
+    """Read-only golf map shared by reference with the referee and every player instead of per call copies.
+
+    It is a sympy Polygon, so existing player code keeps working, and adds a frozen float64 vertex array plus
+    shapely and edge index forms that are built lazily, once per map.
+    """
+
+    @classmethod
+    def from_polygon(cls, polygon):
+        # vertices were already validated by sympy.Polygon, skip its collinearity and duplicate checks
+        return GeometryEntity.__new__(cls, *polygon.args)
+
+    @property
+    def vertices_array(self):
+        """np.ndarray: read-only (n, 2) float64 vertices"""
+        if getattr(self, "_vertices_array", None) is None:
+            vertices_array = np.array([[float(v.x), float(v.y)] for v in self.vertices], dtype=np.float64)
+            vertices_array.flags.writeable = False
+            self._vertices_array = vertices_array
+        return self._vertices_array
+
+    @property
+    def edge_index(self):
+        """geometry.EdgeGridIndex: spatial index over the map edges"""
+        if getattr(self, "_edge_index", None) is None:
+            self._edge_index = geometry.get_edge_index(self.vertices_array)
+        return self._edge_index
+
+    @property
+    def compiled(self):
+        """map_compiler.CompiledMap: precomputed rasters and triangulation, None if the map isn't compiled"""
+        return getattr(self, "_compiled", None)
+
+    def attach_compiled(self, compiled):
+        """Backs the vertex array and edge index with the memory mapped arrays of a compiled map."""
+        self._compiled = compiled
+        self._vertices_array = compiled.vertices
+        self._edge_index = compiled.edge_index
+        geometry.set_edge_index(compiled.vertices, compiled.edge_index)
+
+    @property
+    def shapely(self):
+        """shapely.geometry.Polygon: shapely form of the map"""
+        if getattr(self, "_shapely", None) is None:
+            from shapely.geometry import Polygon as ShapelyPolygon
+            self._shapely = ShapelyPolygon(self.vertices_array)
+        return self._shapely
+
 
 class GolfMap:
-    def __init__(self, map_filepath, logger) -> None:
+    def __init__(self, map_filepath, logger, use_compiled=True) -> None:
         self.logger = logger
 
         self.logger.info("Map file loaded: {}".format(map_filepath))
-        with open(map_filepath, "r") as f:
-            json_obj = json.load(f)
+        with open(map_filepath, "rb") as f:
+            map_bytes = f.read()
+        json_obj = json.loads(map_bytes)
         self.map_filepath = map_filepath
-        self.start = sympy.geometry.Point2D(*json_obj["start"])
-        self.target = sympy.geometry.Point2D(*json_obj["target"])
-        self.golf_map = sympy.Polygon(*json_obj["map"])
-        assert self.golf_map.encloses(self.start), "Start point doesn't lie inside map polygon"
-        assert self.golf_map.encloses(self.target), "Target point doesn't lie inside map polygon"
\ No newline at end of file
+        self.compiled = map_compiler.load_compiled(map_filepath, map_compiler.source_hash(map_bytes), logger) if use_compiled else None
+        if self.compiled is None:
+            # numeric sweep line checks instead of sympy's encloses, maps that aren't simple polygons still load
+            polygon_errors, warnings = map_validator.polygon_problems(json_obj["map"])
+            for message in warnings + polygon_errors:
+                self.logger.warning("Map {}: {}".format(map_filepath, message))
+            point_errors = map_validator.point_problems(json_obj["map"], {"start": json_obj["start"], "target": json_obj["target"]})
+            if point_errors:
+                raise map_validator.MapValidationError(map_filepath, point_errors)
+            self.start = freeze_point(sympy.geometry.Point2D(*json_obj["start"]))
+            self.target = freeze_point(sympy.geometry.Point2D(*json_obj["target"]))
+            self.golf_map = MapView.from_polygon(sympy.Polygon(*json_obj["map"]))
+        else:
+            # validated when compiled from the same content, rebuild the exact points without sympy's float conversion and checks
+            self.logger.info("Compiled map loaded: {}".format(self.compiled.path))
+            self.start = exact_point(FrozenPoint2D, self.compiled.meta["exact_start"])
+            self.target = exact_point(FrozenPoint2D, self.compiled.meta["exact_target"])
+            self.golf_map = GeometryEntity.__new__(MapView, *[exact_point(sympy.geometry.Point2D, vertex) for vertex in self.compiled.meta["exact_vertices"]])
+            self.golf_map.attach_compiled(self.compiled)
+
+        # float64 forms used by the numeric shot resolution engine, shared with players through the map view
+        self.edge_index = self.golf_map.edge_index
+        self.edges = self.edge_index.edges
+        self.vertices = self.golf_map.vertices_array
+        self.vertices_hash = hashlib.sha256(self.vertices.tobytes()).hexdigest()
+        self.start_np = np.array(json_obj["start"], dtype=np.float64)
+        self.target_np = np.array(json_obj["target"], dtype=np.float64)
+
+    def resolve_shots(self, starts, distances, angles, skills, rng, chunk_size=4096):
+        """Resolves N shots in one call with the same noise model and rules as GolfGame.__move.
+
+        Distances are drawn for all shots before angles, so a batch of one shot consumes rng exactly like
+        __move while larger batches follow the same distribution but not the same stream as sequential calls.
+
+        Args:
+            starts (array-like): (N, 2) shot start locations
+            distances (array-like): (N,) intended distances
+            angles (array-like): (N,) intended angles in radians
+            skills (array-like): (N,) or scalar player skills
+            rng (np.random.Generator): generator for the shot noise
+            chunk_size (int): shots resolved per vectorized geometry call, bounds memory of the candidate edge pairs
+
+        Returns:
+            dict: arrays "actual_distances", "actual_angles", "landing_points", "final_points", "admissible",
+            "reached_target", "observed_landing_points" and "observed_final_points"
+        """
+        starts = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+        n = starts.shape[0]
+        distances = np.broadcast_to(np.asarray(distances, dtype=np.float64), (n,))
+        angles = np.broadcast_to(np.asarray(angles, dtype=np.float64), (n,))
+        skills = np.broadcast_to(np.asarray(skills, dtype=np.float64), (n,))
+        actual_distances, actual_angles = self.draw_shot_noise(distances, angles, skills, rng)
+        return self.resolve_noisy_shots(starts, distances, actual_distances, actual_angles, skills, chunk_size)
+
+    @staticmethod
+    def draw_shot_noise(distances, angles, skills, rng):
+        """Draws the actual distances and then the actual angles of shots, like GolfGame.__move.
+
+        Returns:
+            tuple: arrays of actual distances and actual angles
+        """
+        actual_distances = rng.normal(distances, distances/skills)
+        actual_angles = rng.normal(angles, 1/(2*skills))
+        return actual_distances, actual_angles
+
+    def resolve_noisy_shots(self, starts, distances, actual_distances, actual_angles, skills, chunk_size=4096):
+        """Resolves N shots whose noise was already drawn, see resolve_shots for the arguments and result.
+
+        Lets callers draw the noise of each shot from a different generator and still resolve them in one call.
+        """
+        starts = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+        n = starts.shape[0]
+        distances = np.broadcast_to(np.asarray(distances, dtype=np.float64), (n,))
+        skills = np.broadcast_to(np.asarray(skills, dtype=np.float64), (n,))
+        actual_distances = np.broadcast_to(np.asarray(actual_distances, dtype=np.float64), (n,))
+        actual_angles = np.broadcast_to(np.asarray(actual_angles, dtype=np.float64), (n,))
+        directions = np.stack([np.cos(actual_angles), np.sin(actual_angles)], axis=-1)
+
+        full_shot = (distances <= constants.max_dist+skills) & (distances >= constants.min_putter_dist)
+        putter = distances < constants.min_putter_dist
+        landing_points = np.where(full_shot[:, None], starts + actual_distances[:, None]*directions, starts)
+        roll = np.where(full_shot, 1.+constants.extra_roll, 1.)*actual_distances
+        final_points = np.where((full_shot | putter)[:, None], starts + roll[:, None]*directions, starts)
+
+        target = np.broadcast_to(self.target_np, landing_points.shape)
+        reached_target = geometry.point_segment_distance(target, landing_points, final_points) <= constants.target_radius
+        final_points[reached_target] = geometry.project_point_to_line(target[reached_target], landing_points[reached_target], final_points[reached_target])
+
+        admissible = np.zeros(n, dtype=bool)
+        for chunk_start in range(0, n, chunk_size):
+            chunk = slice(chunk_start, chunk_start+chunk_size)
+            admissible[chunk] = self.edge_index.segments_admissible(landing_points[chunk], final_points[chunk])
+        reached_target &= admissible
+
+        result = dict()
+        result["actual_distances"] = actual_distances
+        result["actual_angles"] = actual_angles
+        result["landing_points"] = landing_points
+        result["final_points"] = final_points
+        result["admissible"] = admissible
+        result["reached_target"] = reached_target
+        result["observed_landing_points"] = np.where(admissible[:, None], landing_points, starts)
+        result["observed_final_points"] = np.where(admissible[:, None], final_points, starts)
+        return result
@@ -3,6 +3,8 @@ import os
 import argparse
 import constants
 from golf_game import GolfGame
+from golf_app import start_gui
+from replay import ReplayGame
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
@@ -17,6 +19,15 @@ if __name__ == '__main__':
     parser.add_argument("--log_path", default="log", help="Directory path to dump log files, filepath if disable_logging is false")
     parser.add_argument("--disable_timeout", "-time", action="store_true", help="Disable Timeout in non GUI mode")
     parser.add_argument("--disable_logging", action="store_true", help="Disable Logging, log_path becomes path to file")
+    parser.add_argument("--engine", choices=constants.engines, help="Shot resolution engine, defaults to {} without GUI and {} with GUI".format(constants.default_headless_engine, constants.default_gui_engine))
+    parser.add_argument("--summary_only", action="store_true", help="Keep only running aggregates instead of per shot history in non GUI mode")
+    parser.add_argument("--trace_path", help="Append the phase timings of every step as JSON lines to this file")
+    parser.add_argument("--sandbox", action="store_true", help="Run each player in a worker process that is killed when it exceeds its time budget")
+    parser.add_argument("--parallel_players", action="store_true", help="Initialize and play every player in its own process, the GUI then shows the finished game")
+    parser.add_argument("--checkpoint_path", help="Checkpoint file written by the Save Checkpoint button in GUI mode or at the end of the game otherwise")
+    parser.add_argument("--resume", help="Resume the game saved in this checkpoint file, its map and players replace --map and --players")
+    parser.add_argument("--replay_path", help="Write a binary replay of the game to this .npz file")
+    parser.add_argument("--playback", help="Play back this replay file in the GUI instead of running players")
     parser.add_argument("--players", "-p", default=["d"], nargs="+", help="List of players space separated")
     args = parser.parse_args()
     player_list = tuple(args.players)
@@ -26,8 +37,13 @@ if __name__ == '__main__':
         if args.log_path == "log":
             args.log_path = "results.log"
 
-    golf_game = GolfGame(player_list, args)
-    if not golf_game.use_gui:
-        golf_game.play_all()
-        result = golf_game.get_state()
-        print(result)
+    if args.playback:
+        start_gui(ReplayGame(args.playback), args, logging.getLogger(__name__))
+    else:
+        golf_game = GolfGame(player_list, args)
+        if not golf_game.use_gui:
+            golf_game.play_all()
+            if golf_game.checkpoint_path:
+                golf_game.save_checkpoint()
+            result = golf_game.get_state()
+            print(result)
@@ -0,0 +1,292 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import logging
+import argparse
+import numpy as np
+import constants
+import geometry
+
+compiled_version = 1
+
+
+def source_hash(map_bytes):
+    return hashlib.sha256(map_bytes).hexdigest()
+
+
+def sidecar_path(map_path):
+    """Directory holding the compiled form of a map json, next to it."""
+    return os.path.splitext(map_path)[0] + ".compiled"
+
+
+def exact_coords(point):
+    """Rational strings of the coordinates of a sympy point, exactly as sympy converted them from the json floats."""
+    return [str(coord) for coord in point.args]
+
+
+def triangulate(vertices):
+    """Triangulates a simple polygon with shapely's constrained Delaunay triangulation.
+
+    Args:
+        vertices (np.ndarray): (n, 2) polygon vertices in order
+
+    Returns:
+        np.ndarray: (t, 3) int64 vertex indices of each triangle
+
+    Raises:
+        ImportError: if shapely is older than 2.1, an unconstrained triangulation is wrong for non-convex maps
+    """
+    import shapely
+    if not hasattr(shapely, "constrained_delaunay_triangles"):
+        raise ImportError("Compiling maps needs shapely >= 2.1 for constrained triangulation, found {}".format(shapely.__version__))
+    vertex_ids = {tuple(vertex): idx for idx, vertex in enumerate(vertices.tolist())}
+    triangles = shapely.get_parts(shapely.constrained_delaunay_triangles(shapely.Polygon(vertices)))
+    coords = [shapely.get_coordinates(triangle)[:3] for triangle in triangles]
+    return np.array([[vertex_ids[tuple(point)] for point in triangle.tolist()] for triangle in coords], dtype=np.int64).reshape(-1, 3)
+
+
+def rasterize(edge_index, bbox, resolution):
+    """Inside mask and distance-to-water field sampled at cell centres.
+
+    Args:
+        edge_index (geometry.EdgeGridIndex): index over the map edges
+        bbox (np.ndarray): xmin, ymin, xmax, ymax of the map
+        resolution (int): cells along the longer side of the bounding box
+
+    Returns:
+        Tuple[float, np.ndarray, np.ndarray]: cell size, (rows, cols) bool inside mask and float32 distance
+        from each inside cell centre to the nearest outside cell centre, 0 outside
+    """
+    from scipy.ndimage import distance_transform_edt
+    cell_size = max(bbox[2] - bbox[0], bbox[3] - bbox[1])/resolution
+    cols = max(1, int(np.ceil((bbox[2] - bbox[0])/cell_size)))
+    rows = max(1, int(np.ceil((bbox[3] - bbox[1])/cell_size)))
+    xs = bbox[0] + (np.arange(cols) + 0.5)*cell_size
+    ys = bbox[1] + (np.arange(rows) + 0.5)*cell_size
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    mask = np.zeros(rows*cols, dtype=bool)
+    points = np.stack([grid_x.ravel(), grid_y.ravel()], axis=-1)
+    for chunk_start in range(0, len(points), 65536):
+        mask[chunk_start:chunk_start+65536] = edge_index.points_in_polygon(points[chunk_start:chunk_start+65536])
+    mask = mask.reshape(rows, cols)
+    # pad with water so cells on the bounding box border measure to the outside
+    water_distance = distance_transform_edt(np.pad(mask, 1), sampling=cell_size)[1:-1, 1:-1].astype(np.float32)
+    return cell_size, mask, water_distance
+
+
+def build_compiled(map_path, resolutions=constants.compiled_map_resolutions, logger=None):
+    """Computes the arrays and metadata of a compiled map, see CompiledMap for its contents.
+
+    The map is loaded and validated once through GolfMap, so the compiled vertices match the ones of the
+    sympy polygon exactly, and the exact rational vertices let GolfMap rebuild the polygon without sympy's
+    float conversion.
+
+    Args:
+        map_path (str): path of the map json
+        resolutions (list): raster resolutions, cells along the longer side of the bounding box
+        logger (logging.Logger): logger, defaults to the module logger
+
+    Returns:
+        Tuple[dict, dict]: array name to np.ndarray and the json serializable metadata
+    """
+    from golf_map import GolfMap
+    logger = logger or logging.getLogger(__name__)
+    with open(map_path, "rb") as f:
+        map_bytes = f.read()
+    golf = GolfMap(map_path, logger, use_compiled=False)
+    edge_index = golf.edge_index
+    vertices = np.array(golf.vertices)
+    bbox = np.concatenate([vertices.min(axis=0), vertices.max(axis=0)])
+
+    arrays = dict()
+    arrays["vertices"] = vertices
+    arrays["edges"] = edge_index.edges
+    arrays["cell_edges"] = edge_index.cell_edges
+    arrays["cell_start"] = edge_index.cell_start
+    arrays["row_edges"] = edge_index.row_edges
+    arrays["row_start"] = edge_index.row_start
+    arrays["triangles"] = triangulate(vertices)
+    arrays["bbox"] = bbox
+    arrays["start"] = golf.start_np
+    arrays["target"] = golf.target_np
+    cell_sizes = dict()
+    for resolution in resolutions:
+        cell_size, mask, water_distance = rasterize(edge_index, bbox, resolution)
+        cell_sizes[str(resolution)] = cell_size
+        arrays["mask_{}".format(resolution)] = mask
+        arrays["water_distance_{}".format(resolution)] = water_distance
+
+    meta = {
+        "version": compiled_version,
+        "source_hash": source_hash(map_bytes),
+        "vertices_hash": golf.vertices_hash,
+        "tol": edge_index.tol,
+        "grid": [edge_index.xmin, edge_index.ymin, edge_index.nx, edge_index.ny, edge_index.cell_width, edge_index.cell_height],
+        "cell_sizes": cell_sizes,
+        "exact_vertices": [exact_coords(vertex) for vertex in golf.golf_map.vertices],
+        "exact_start": exact_coords(golf.start),
+        "exact_target": exact_coords(golf.target),
+    }
+    return arrays, meta
+
+
+def compile_map(map_path, resolutions=constants.compiled_map_resolutions, logger=None):
+    """Writes the compiled sidecar of a map json, one .npy file per array plus meta.json.
+
+    The sidecar is written to a temporary directory and renamed into place.
+
+    Args:
+        map_path (str): path of the map json
+        resolutions (list): raster resolutions, cells along the longer side of the bounding box
+        logger (logging.Logger): logger, defaults to the module logger
+
+    Returns:
+        str: path of the sidecar directory
+    """
+    logger = logger or logging.getLogger(__name__)
+    arrays, meta = build_compiled(map_path, resolutions, logger)
+    path = sidecar_path(map_path)
+    tmp_path = "{}.tmp{}".format(path, os.getpid())
+    if os.path.isdir(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, "{}.npy".format(name)), array)
+    # meta.json is written last, a sidecar without it is incomplete and ignored
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=1)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.rename(tmp_path, path)
+    logger.info("Compiled {} to {}".format(map_path, path))
+    return path
+
+
+class CompiledMap:
+    """Precomputed geometry of a map over read-only arrays, memory mapped from a sidecar or in shared memory.
+
+    Attributes:
+        vertices (np.ndarray): (n, 2) float64 vertices, equal to GolfMap.vertices
+        edges (np.ndarray): (n, 4) float64 edges from geometry.polygon_edges
+        edge_index (geometry.EdgeGridIndex): index over the edges, backed by the mapped arrays
+        triangles (np.ndarray): (t, 3) vertex indices of a triangulation of the map
+        bbox (np.ndarray): xmin, ymin, xmax, ymax
+        start (np.ndarray): start point
+        target (np.ndarray): target point
+        resolutions (list): available raster resolutions, cells along the longer bounding box side
+        cell_sizes (dict): resolution to cell size in map units, rasters start at bbox xmin, ymin
+        masks (dict): resolution to (rows, cols) bool array, True where the cell centre is inside the map
+        water_distances (dict): resolution to (rows, cols) float32 distance from the cell centre to the nearest
+            outside cell centre, 0 outside
+    """
+    def __init__(self, arrays, meta, path):
+        self.arrays = arrays
+        self.meta = meta
+        self.path = path
+        self.source_hash = self.meta["source_hash"]
+        self.vertices_hash = self.meta["vertices_hash"]
+        self.vertices = arrays["vertices"]
+        self.edges = arrays["edges"]
+        self.triangles = arrays["triangles"]
+        self.bbox = arrays["bbox"]
+        self.start = arrays["start"]
+        self.target = arrays["target"]
+        xmin, ymin, nx, ny, cell_width, cell_height = self.meta["grid"]
+        self.edge_index = geometry.EdgeGridIndex.from_arrays(self.edges, self.meta["tol"], xmin, ymin, int(nx), int(ny), cell_width, cell_height,
+                                                             arrays["cell_edges"], arrays["cell_start"], arrays["row_edges"], arrays["row_start"])
+        self.cell_sizes = {int(resolution): cell_size for resolution, cell_size in self.meta["cell_sizes"].items()}
+        self.resolutions = sorted(self.cell_sizes)
+        self.masks = {resolution: arrays["mask_{}".format(resolution)] for resolution in self.resolutions}
+        self.water_distances = {resolution: arrays["water_distance_{}".format(resolution)] for resolution in self.resolutions}
+
+    @classmethod
+    def from_sidecar(cls, path):
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            meta = json.load(f)
+        names = [os.path.splitext(file_name)[0] for file_name in os.listdir(path) if file_name.endswith(".npy")]
+        arrays = {name: np.load(os.path.join(path, "{}.npy".format(name)), mmap_mode="r", allow_pickle=False) for name in names}
+        return cls(arrays, meta, path)
+
+    def sample(self, field, points, resolution=None):
+        """Values of a raster at the cells holding points, points outside the rasters read as water.
+
+        Args:
+            field (dict): masks or water_distances
+            points (array-like): (m, 2) query points
+            resolution (int): raster resolution, defaults to the finest
+
+        Returns:
+            np.ndarray: (m,) raster values
+        """
+        resolution = resolution or self.resolutions[-1]
+        raster = field[resolution]
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        cols = np.floor((points[:, 0] - self.bbox[0])/self.cell_sizes[resolution]).astype(np.int64)
+        rows = np.floor((points[:, 1] - self.bbox[1])/self.cell_sizes[resolution]).astype(np.int64)
+        valid = (cols >= 0) & (cols < raster.shape[1]) & (rows >= 0) & (rows < raster.shape[0])
+        values = np.zeros(len(points), dtype=raster.dtype)
+        values[valid] = raster[rows[valid], cols[valid]]
+        return values
+
+
+_shared_maps = dict()
+
+
+def register_shared(map_path, compiled):
+    """Makes load_compiled return compiled for map_path in this process instead of reading its sidecar."""
+    _shared_maps[os.path.abspath(map_path)] = compiled
+
+
+def find_shared(vertices_hash):
+    """Registered compiled map with the given vertices hash, None if there is none."""
+    for compiled in _shared_maps.values():
+        if compiled.vertices_hash == vertices_hash:
+            return compiled
+    return None
+
+
+def is_current(meta, map_source_hash):
+    return meta.get("version") == compiled_version and meta.get("source_hash") == map_source_hash and meta.get("tol") == constants.geometry_tolerance
+
+
+def load_compiled(map_path, map_source_hash, logger=None):
+    """Returns the compiled map registered with register_shared, otherwise loads the sidecar of a map if it
+    exists and was compiled from the same map content by this version.
+
+    Args:
+        map_path (str): path of the map json
+        map_source_hash (str): source_hash of the current map json content
+        logger (logging.Logger): logger, defaults to the module logger
+
+    Returns:
+        CompiledMap: compiled map, None if missing, stale or unreadable
+    """
+    logger = logger or logging.getLogger(__name__)
+    shared = _shared_maps.get(os.path.abspath(map_path))
+    if shared is not None and is_current(shared.meta, map_source_hash):
+        return shared
+    path = sidecar_path(map_path)
+    if not os.path.isfile(os.path.join(path, "meta.json")):
+        return None
+    try:
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            meta = json.load(f)
+        if not is_current(meta, map_source_hash):
+            logger.warning("Ignoring stale compiled map {}, recompile it with map_compiler.py".format(path))
+            return None
+        return CompiledMap.from_sidecar(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Ignoring unreadable compiled map {}: {}".format(path, e))
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("maps", nargs="+", help="Map json files to compile")
+    parser.add_argument("--resolutions", type=int, nargs="+", default=constants.compiled_map_resolutions, help="Raster resolutions, cells along the longer side of the map bounding box")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout, format="%(message)s")
+    for map_path in args.maps:
+        compile_map(map_path, args.resolutions)
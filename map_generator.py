@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import logging
+import argparse
+import numpy as np
+import shapely
+from shapely.geometry import LineString, Point, Polygon
+import map_validator
+
+max_attempts = 20
+
+
+def _centerline(rng, distance, bends):
+    # start at the origin, the target at distance, bends wander sideways by up to a third of the distance
+    angle = rng.uniform(0, 2*np.pi)
+    direction = np.array([np.cos(angle), np.sin(angle)])
+    normal = np.array([-direction[1], direction[0]])
+    along = np.linspace(0, distance, bends + 2)
+    sideways = np.concatenate([[0.], rng.uniform(-distance/3, distance/3, bends), [0.]])
+    return along[:, None]*direction + sideways[:, None]*normal
+
+
+def _boundary_cut(rng, polygon, corridor_width, keep_clear, outward):
+    # thin triangle through a random boundary point, pointing out of the polygon for peninsulas and into it for hazards
+    boundary = polygon.exterior
+    position = rng.uniform(0, boundary.length)
+    point = np.array(boundary.interpolate(position).coords[0])
+    ahead = np.array(boundary.interpolate((position + 1e-3) % boundary.length).coords[0])
+    tangent = (ahead - point)/max(np.linalg.norm(ahead - point), 1e-12)
+    normal = np.array([tangent[1], -tangent[0]])
+    if polygon.contains(Point(point + normal*1e-2)) == outward:
+        normal = -normal
+    depth = rng.uniform(0.3, 0.6)*corridor_width
+    half_base = rng.uniform(0.1, 0.25)*corridor_width
+    cut = Polygon([point - tangent*half_base - normal*0.1*depth, point + normal*depth, point + tangent*half_base - normal*0.1*depth])
+    if cut.distance(keep_clear) < corridor_width/4:
+        return None
+    return cut
+
+
+def _resample(rng, ring, vertex_count, roughness):
+    # keeps the ring's corners and spreads the remaining vertices along its edges, jittered off the edge so
+    # sympy doesn't drop them as collinear
+    corners = ring[:-1]
+    if len(corners) > vertex_count:
+        return None
+    edges = np.roll(corners, -1, axis=0) - corners
+    lengths = np.linalg.norm(edges, axis=1)
+    extra = vertex_count - len(corners)
+    per_edge = np.floor(extra*lengths/lengths.sum()).astype(np.int64)
+    per_edge[np.argsort(-(extra*lengths/lengths.sum() - per_edge))[:extra - per_edge.sum()]] += 1
+    points = []
+    for corner, edge, length, count in zip(corners, edges, lengths, per_edge):
+        points.append(corner[None])
+        if count:
+            t = (np.arange(count) + 1)/(count + 1)
+            normal = np.array([-edge[1], edge[0]])/length
+            jitter = rng.uniform(-roughness, roughness, count)*length/(count + 1)
+            points.append(corner + t[:, None]*edge + jitter[:, None]*normal)
+    return np.concatenate(points)
+
+
+def generate_map(rng, vertex_count=50, corridor_width=80., hazards=2, peninsulas=2, distance=600., bends=2, roughness=0.2, margin=20.):
+    """Generates a random golf course as a simple polygon around a bent corridor from start to target.
+
+    The corridor is the centerline buffered by half its width. Hazards are thin water inlets cut into its
+    side, peninsulas thin spits of land added to it, both kept clear of the start and target. The boundary
+    is then resampled to exactly vertex_count vertices.
+
+    Args:
+        rng (np.random.Generator): generator for every random choice
+        vertex_count (int): number of polygon vertices
+        corridor_width (float): width of the corridor in map units
+        hazards (int): number of water inlets
+        peninsulas (int): number of land spits
+        distance (float): straight line distance from start to target
+        bends (int): number of bends of the corridor centerline
+        roughness (float): jitter of the added vertices off their edge, as a fraction of their spacing
+        margin (float): smallest coordinate of the map
+
+    Returns:
+        dict: map json with "map", "start" and "target"
+
+    Raises:
+        ValueError: if no valid polygon was found in max_attempts tries
+    """
+    for _ in range(max_attempts):
+        centerline = _centerline(rng, distance, bends)
+        polygon = LineString(centerline).buffer(corridor_width/2, quad_segs=4)
+        start, target = centerline[0], centerline[-1]
+        keep_clear = shapely.MultiPoint([start, target])
+        for count, outward in [(hazards, False), (peninsulas, True)]:
+            added = 0
+            for _ in range(count*max_attempts):
+                if added == count:
+                    break
+                cut = _boundary_cut(rng, polygon, corridor_width, keep_clear, outward)
+                if cut is None:
+                    continue
+                candidate = polygon.union(cut) if outward else polygon.difference(cut)
+                if candidate.geom_type == "Polygon" and not candidate.interiors and candidate.is_valid:
+                    polygon = candidate
+                    added += 1
+        polygon = shapely.set_precision(polygon.simplify(0), 1e-6)
+        if polygon.geom_type != "Polygon":
+            continue
+        ring = np.array(polygon.exterior.coords)
+        tolerance = 1e-3*corridor_width
+        while len(ring) - 1 > vertex_count and tolerance < corridor_width:
+            ring = np.array(polygon.simplify(tolerance).exterior.coords)
+            tolerance *= 2
+        vertices = _resample(rng, ring, vertex_count, roughness)
+        if vertices is None:
+            continue
+        offset = margin - np.minimum(vertices.min(axis=0), np.minimum(start, target)) + corridor_width
+        vertices = np.round(vertices + offset, 6)
+        start, target = np.round(start + offset, 6), np.round(target + offset, 6)
+        map_json = {"map": vertices.tolist(), "start": start.tolist(), "target": target.tolist()}
+        errors, warnings = map_validator.validate_map(map_json)
+        if not errors and not warnings:
+            return map_json
+    raise ValueError("No valid map with {} vertices found in {} attempts".format(vertex_count, max_attempts))
+
+
+def generate_maps(out_dir, vertex_counts, count, seed, manifest_name="generated", manifest_path=None, **params):
+    """Writes count maps per vertex count and a tournament maps manifest listing them.
+
+    Every map is seeded by its own child of the seed sequence, so a map only depends on seed, its position
+    and the parameters. The parameters are recorded under "generator" in each map json. The manifest
+    defaults to <out_dir>_maps.json beside out_dir, so globs over the map jsons don't pick it up.
+
+    Returns:
+        str: path of the manifest, usable as tournament.py --maps
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    seed_sequence = np.random.SeedSequence(seed)
+    child_seeds = iter(seed_sequence.spawn(len(vertex_counts)*count))
+    map_paths = []
+    for vertex_count in vertex_counts:
+        for idx in range(count):
+            map_json = generate_map(np.random.default_rng(next(child_seeds)), vertex_count=vertex_count, **params)
+            map_json["generator"] = dict(params, vertex_count=vertex_count, seed=seed_sequence.entropy, index=len(map_paths))
+            map_path = os.path.join(out_dir, "gen_v{}_{}.json".format(vertex_count, idx))
+            with open(map_path, "w") as f:
+                json.dump(map_json, f)
+            map_paths.append(map_path)
+    if manifest_path is None:
+        manifest_path = os.path.normpath(out_dir) + "_maps.json"
+    with open(manifest_path, "w") as f:
+        json.dump({manifest_name: map_paths}, f, indent=4)
+    return manifest_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out_dir", default=os.path.join("maps", "generated"), help="Directory to write the maps to")
+    parser.add_argument("--manifest", help="Tournament maps json listing the maps, defaults to <out_dir>_maps.json")
+    parser.add_argument("--vertices", type=int, nargs="+", default=[50], help="Vertex counts, count maps are generated for each")
+    parser.add_argument("--count", "-n", type=int, default=10, help="Maps per vertex count")
+    parser.add_argument("--seed", "-s", type=int, help="Seed entropy, a random one is printed if not given")
+    parser.add_argument("--corridor_width", type=float, default=80., help="Width of the corridor from start to target")
+    parser.add_argument("--hazards", type=int, default=2, help="Water inlets cut into the corridor")
+    parser.add_argument("--peninsulas", type=int, default=2, help="Land spits added to the corridor")
+    parser.add_argument("--distance", type=float, default=600., help="Straight line distance from start to target")
+    parser.add_argument("--bends", type=int, default=2, help="Bends of the corridor")
+    parser.add_argument("--compile", action="store_true", help="Also compile every map, see map_compiler.py")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout, format="%(message)s")
+
+    seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+    print("Using seed {}".format(seed))
+    manifest_path = generate_maps(args.out_dir, args.vertices, args.count, seed, manifest_path=args.manifest, corridor_width=args.corridor_width, hazards=args.hazards,
+                                  peninsulas=args.peninsulas, distance=args.distance, bends=args.bends)
+    print("Wrote manifest {}".format(manifest_path))
+    if args.compile:
+        import map_compiler
+        with open(manifest_path, "r") as f:
+            for map_path in json.load(f)["generated"]:
+                map_compiler.compile_map(map_path)
@@ -0,0 +1,263 @@
+import sys
+import json
+import argparse
+import numpy as np
+import constants
+import geometry
+
+
+class MapValidationError(ValueError):
+    """Raised for invalid maps, errors holds one message per problem found."""
+    def __init__(self, map_name, errors):
+        self.errors = errors
+        super().__init__("Invalid map {}:\n  {}".format(map_name, "\n  ".join(errors)))
+
+
+def _point_str(point):
+    return "({:.6g}, {:.6g})".format(point[0], point[1])
+
+
+def _edge_str(vertices, edge, kept):
+    # edges are numbered by their start vertex in the map json
+    return "edge {} {}-{}".format(kept[edge], _point_str(vertices[edge]), _point_str(vertices[(edge + 1) % len(vertices)]))
+
+
+def _cross(o, u, v):
+    return (u[0] - o[0])*(v[1] - o[1]) - (u[1] - o[1])*(v[0] - o[0])
+
+
+def _near(point, start, end, tol):
+    # scalar point to segment distance test, numpy calls on single values would dominate the sweep
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    wx, wy = point[0] - start[0], point[1] - start[1]
+    dd = dx*dx + dy*dy
+    t = min(max((wx*dx + wy*dy)/dd, 0.), 1.) if dd > 0 else 0.
+    ex, ey = wx - t*dx, wy - t*dy
+    return ex*ex + ey*ey <= tol*tol
+
+
+class _Sweep:
+    """Shamos-Hoey sweep over the polygon edges, finds one pair of edges that meet other than at a shared vertex.
+
+    Edges enter the sweep status at their left end and leave at their right end, the status is ordered by
+    height at the sweep position. Only edges that become neighbours in the status are tested, which finds an
+    intersection if there is any with O(n log n) comparisons. The status is a plain list, so each insert and
+    delete also shifts it in O(n), and a leaving edge whose key ties with another one is found by a linear
+    search. Both are cheap for the few edges a real map has across one x, but the worst case is O(n^2).
+    """
+    def __init__(self, vertices, tol):
+        self.points = [tuple(vertex) for vertex in vertices.tolist()]
+        self.n = len(self.points)
+        self.tol = tol
+        self.left = []
+        self.right = []
+        for edge in range(self.n):
+            a, b = self.points[edge], self.points[(edge + 1) % self.n]
+            self.left.append(min(a, b))
+            self.right.append(max(a, b))
+        self.status = []
+
+    def __key(self, edge, x):
+        (x1, y1), (x2, y2) = self.left[edge], self.right[edge]
+        if x2 == x1:
+            return (y1, float("inf"))
+        slope = (y2 - y1)/(x2 - x1)
+        return (y1 + (x - x1)*slope, slope)
+
+    def __position(self, key, x):
+        low, high = 0, len(self.status)
+        while low < high:
+            mid = (low + high)//2
+            if self.__key(self.status[mid], x) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def __intersect(self, a, b):
+        n = self.n
+        p, q = self.points[a], self.points[(a + 1) % n]
+        r, s = self.points[b], self.points[(b + 1) % n]
+        if (a + 1) % n == b:
+            # consecutive edges share q == r, they may only meet there
+            return _near(p, r, s, self.tol) or _near(s, p, q, self.tol)
+        if (b + 1) % n == a:
+            return _near(r, p, q, self.tol) or _near(q, r, s, self.tol)
+        if _cross(p, q, r)*_cross(p, q, s) < 0 and _cross(r, s, p)*_cross(r, s, q) < 0:
+            return True
+        return _near(p, r, s, self.tol) or _near(q, r, s, self.tol) or _near(r, p, q, self.tol) or _near(s, p, q, self.tol)
+
+    def __check(self, position_a, position_b):
+        if 0 <= position_a and position_b < len(self.status):
+            a, b = self.status[position_a], self.status[position_b]
+            if self.__intersect(a, b):
+                return (min(a, b), max(a, b))
+        return None
+
+    def find_intersection(self):
+        """Returns a pair of edge indices that intersect, None for a simple polygon."""
+        events = []
+        for edge in range(self.n):
+            # at equal x edges enter before others leave, so edges meeting at an x are in the status together
+            events.append((self.left[edge][0], 0, self.left[edge][1], edge))
+            events.append((self.right[edge][0], 1, self.right[edge][1], edge))
+        events.sort()
+        for x, leaving, _, edge in events:
+            if not leaving:
+                position = self.__position(self.__key(edge, x), x)
+                self.status.insert(position, edge)
+                found = self.__check(position - 1, position) or self.__check(position, position + 1)
+            else:
+                position = self.__position(self.__key(edge, x), x)
+                if position >= len(self.status) or self.status[position] != edge:
+                    position = self.status.index(edge)
+                del self.status[position]
+                found = self.__check(position - 1, position)
+            if found:
+                return found
+        return None
+
+
+def polygon_problems(vertices, tol=constants.geometry_tolerance):
+    """Checks that vertices form a simple polygon with a sweep line, see _Sweep for its cost.
+
+    A vertex repeating the previous one is only a warning, sympy drops it and so do the checks after it. Any
+    other repeated vertex, an edge shorter than constants.min_edge_length and edges meeting anywhere but at
+    their shared vertex are errors.
+
+    Args:
+        vertices (array-like): (n, 2) polygon vertices in order, as in the map json
+        tol (float): distance in map units below which points count as touching
+
+    Returns:
+        Tuple[list, list]: error and warning messages, no errors for a simple polygon
+    """
+    errors = []
+    warnings = []
+    try:
+        vertices = np.asarray(vertices, dtype=np.float64)
+    except (TypeError, ValueError):
+        return ["vertices should be a list of [x, y] pairs"], warnings
+    if vertices.ndim != 2 or vertices.shape[1] != 2:
+        return ["vertices should be a list of [x, y] pairs"], warnings
+    if not np.all(np.isfinite(vertices)):
+        return ["vertex {} {} isn't finite".format(idx, _point_str(vertices[idx])) for idx in np.flatnonzero(~np.all(np.isfinite(vertices), axis=1))], warnings
+
+    repeated = np.all(vertices == np.roll(vertices, 1, axis=0), axis=1)
+    repeated[0] &= len(vertices) > 1
+    for idx in np.flatnonzero(repeated):
+        warnings.append("vertex {} {} repeats the previous vertex and is dropped".format(idx, _point_str(vertices[idx])))
+    kept = np.flatnonzero(~repeated)
+    vertices = vertices[kept]
+    if len(vertices) < 3:
+        return ["a polygon needs at least 3 distinct vertices, got {}".format(len(vertices))], warnings
+
+    _, first, inverse = np.unique(vertices, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    for idx in np.flatnonzero(first[inverse] != np.arange(len(vertices))):
+        errors.append("vertex {} {} duplicates vertex {}".format(kept[idx], _point_str(vertices[idx]), kept[first[inverse[idx]]]))
+
+    lengths = np.linalg.norm(np.roll(vertices, -1, axis=0) - vertices, axis=1)
+    for edge in np.flatnonzero(lengths < constants.min_edge_length):
+        errors.append("{} is degenerate, length {:.3g}".format(_edge_str(vertices, edge, kept), lengths[edge]))
+    if errors:
+        return errors, warnings
+
+    area = 0.5*abs(np.sum(vertices[:, 0]*np.roll(vertices[:, 1], -1) - np.roll(vertices[:, 0], -1)*vertices[:, 1]))
+    if area <= tol:
+        return ["polygon has no area"], warnings
+
+    intersection = _Sweep(vertices, tol).find_intersection()
+    if intersection is not None:
+        errors.append("{} and {} intersect".format(_edge_str(vertices, intersection[0], kept), _edge_str(vertices, intersection[1], kept)))
+    return errors, warnings
+
+
+def point_problems(vertices, points, tol=constants.geometry_tolerance):
+    """Checks that named points lie strictly inside the polygon, like sympy's Polygon.encloses_point.
+
+    Args:
+        vertices (array-like): (n, 2) polygon vertices in order
+        points (dict): name to point, None points are skipped
+        tol (float): boundary tolerance in map units
+
+    Returns:
+        list: error messages
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    edge_index = geometry.EdgeGridIndex(geometry.polygon_edges(vertices), tol)
+    errors = []
+    for name, point in points.items():
+        if point is not None and not edge_index.points_in_polygon(np.asarray(point, dtype=np.float64))[0]:
+            errors.append("{} point {} doesn't lie inside map polygon".format(name, _point_str(point)))
+    return errors
+
+
+def _point_valid(point):
+    try:
+        point = np.asarray(point, dtype=np.float64)
+    except (TypeError, ValueError):
+        return False
+    return point.shape == (2,) and bool(np.all(np.isfinite(point)))
+
+
+def structure_problems(map_json):
+    """Checks that a loaded json has the "map", "start" and "target" keys of a map, with points as [x, y].
+
+    Returns:
+        list: error messages
+    """
+    if not isinstance(map_json, dict):
+        return ["map json should be an object with \"map\", \"start\" and \"target\""]
+    errors = ["missing \"{}\"".format(key) for key in ["map", "start", "target"] if key not in map_json]
+    for key in ["start", "target"]:
+        if key in map_json and not _point_valid(map_json[key]):
+            errors.append("{} should be a finite [x, y] pair".format(key))
+    return errors
+
+
+def validate_map(map_json, tol=constants.geometry_tolerance):
+    """Checks a map json, see structure_problems, polygon_problems and point_problems.
+
+    Returns:
+        Tuple[list, list]: error and warning messages, no errors for a valid map
+    """
+    errors = structure_problems(map_json)
+    if errors:
+        return errors, []
+    errors, warnings = polygon_problems(map_json["map"], tol)
+    if not errors:
+        errors = point_problems(map_json["map"], {"start": map_json["start"], "target": map_json["target"]}, tol)
+    return errors, warnings
+
+
+def check_map(map_json, map_name="map"):
+    """Raises MapValidationError if the map json isn't valid, see validate_map.
+
+    Returns:
+        list: warning messages
+    """
+    errors, warnings = validate_map(map_json)
+    if errors:
+        raise MapValidationError(map_name, errors)
+    return warnings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("maps", nargs="+", help="Map json files to validate")
+    args = parser.parse_args()
+    invalid = 0
+    for map_path in args.maps:
+        with open(map_path, "r") as f:
+            try:
+                errors, warnings = validate_map(json.load(f))
+            except ValueError as e:
+                errors, warnings = ["not valid json: {}".format(e)], []
+        invalid += bool(errors)
+        print("{}: {}".format(map_path, "invalid" if errors else "valid"))
+        for message in errors:
+            print("  error: {}".format(message))
+        for message in warnings:
+            print("  warning: {}".format(message))
+    sys.exit(1 if invalid else 0)
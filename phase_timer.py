@@ -0,0 +1,96 @@
+import json
+import time
+import constants
+
+
+def _empty_phases():
+    return {phase: {"total_ns": 0, "count": 0, "max_ns": 0} for phase in constants.timing_phases}
+
+
+def _add_phases(phases, other):
+    for phase, stats in other.items():
+        phases[phase]["total_ns"] += stats["total_ns"]
+        phases[phase]["count"] += stats["count"]
+        phases[phase]["max_ns"] = max(phases[phase]["max_ns"], stats["max_ns"])
+
+
+class PhaseTimer:
+    """Per player nanosecond timings of the phases of each step, measured with perf_counter_ns.
+
+    The caller calls mark() when a step starts and lap(player_idx, phase) after each phase, which charges the
+    time since the previous mark or lap to that phase. With a trace_path every step is appended to it as one
+    JSON line, so several games can trace into the same file.
+    """
+    def __init__(self, map_path, trace_path=None):
+        self.map_path = map_path
+        self.trace_path = trace_path
+        self.trace_file = None
+        self.phases = []
+        self.step_phases = None
+        self.last_ns = None
+
+    def add_player(self):
+        self.phases.append(_empty_phases())
+
+    def mark(self):
+        self.step_phases = dict.fromkeys(constants.timing_phases, 0)
+        self.last_ns = time.perf_counter_ns()
+
+    def resume(self):
+        """Restarts the lap clock without ending the step, for steps interleaved with other games."""
+        self.last_ns = time.perf_counter_ns()
+
+    def lap(self, player_idx, phase):
+        now = time.perf_counter_ns()
+        elapsed = now - self.last_ns
+        self.last_ns = now
+        self.add(player_idx, phase, elapsed)
+
+    def add(self, player_idx, phase, elapsed):
+        self.step_phases[phase] += elapsed
+        stats = self.phases[player_idx][phase]
+        stats["total_ns"] += elapsed
+        stats["count"] += 1
+        if elapsed > stats["max_ns"]:
+            stats["max_ns"] = elapsed
+
+    def end_step(self, player_name, step):
+        if self.trace_path is None:
+            return
+        if self.trace_file is None:
+            self.trace_file = open(self.trace_path, "a")
+        record = {"map": self.map_path, "player": player_name, "step": step}
+        for phase, elapsed in self.step_phases.items():
+            record["{}_ns".format(phase)] = elapsed
+        self.trace_file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
+
+    def get_state(self, player_names):
+        """Returns the totals per player and for the whole map, as exported by GolfGame.get_state."""
+        map_phases = _empty_phases()
+        for player_phases in self.phases:
+            _add_phases(map_phases, player_phases)
+        return {
+            "map": self.map_path,
+            "players": {name: player_phases for name, player_phases in zip(player_names, self.phases)},
+            "map_total": map_phases,
+        }
+
+
+def merge_by_map(phase_timings):
+    """Sums the map_total timings of several games per map.
+
+    Args:
+        phase_timings (list): phase_timings values from GolfGame.get_state
+
+    Returns:
+        dict: map path to phase to total_ns, count and max_ns
+    """
+    merged = dict()
+    for timings in phase_timings:
+        _add_phases(merged.setdefault(timings["map"], _empty_phases()), timings["map_total"])
+    return merged
@@ -0,0 +1,197 @@
+import atexit
+import importlib
+import logging
+import multiprocessing
+import traceback
+import map_compiler
+from golf_map import FrozenPoint2D
+from utils import TimeoutException
+
+
+class PlayerWorkerError(Exception):
+    pass
+
+
+def _to_point(xy):
+    if xy is None:
+        return None
+    return FrozenPoint2D(*xy, evaluate=False)
+
+
+def _to_xy(point):
+    if point is None:
+        return None
+    return (float(point.x), float(point.y))
+
+
+def _worker_main(conn, module_name, class_name):
+    player_class = getattr(importlib.import_module(module_name), class_name)
+    player = None
+    maps = dict()
+    while True:
+        message, payload = conn.recv()
+        if message == "close":
+            break
+        try:
+            if message == "init":
+                player_kwargs = payload["player_kwargs"]
+                # the map is sent once per map and kept for later games on it
+                map_key = payload["map_key"]
+                if map_key not in maps:
+                    # the compiled geometry doesn't travel with the pickled map, reattach a shared copy if there is one
+                    compiled = map_compiler.find_shared(payload["compiled_hash"]) if payload["compiled_hash"] else None
+                    if compiled is not None:
+                        payload["golf_map"].attach_compiled(compiled)
+                    maps[map_key] = (payload["golf_map"], payload["start"], payload["target"])
+                golf_map, start, target = maps[map_key]
+                logger = logging.getLogger(payload["logger_name"])
+                for handler in logger.handlers[:]:
+                    handler.close()
+                    logger.removeHandler(handler)
+                if payload["log_file"]:
+                    logger.disabled = False
+                    logger.setLevel(logging.INFO)
+                    fh = logging.FileHandler(payload["log_file"], mode="a")
+                    fh.setFormatter(logging.Formatter('%(message)s'))
+                    logger.addHandler(fh)
+                else:
+                    logger.setLevel(logging.ERROR)
+                    logger.disabled = True
+                player = player_class(logger=logger, golf_map=golf_map, start=start, target=target, **player_kwargs)
+                rng = player_kwargs["rng"]
+                conn.send(("ok", (None, rng.bit_generator.state)))
+            elif message == "play":
+                rng.bit_generator.state = payload["rng_state"]
+                returned_action = player.play(
+                    score=payload["score"],
+                    golf_map=golf_map,
+                    target=target,
+                    curr_loc=_to_point(payload["curr_loc"]),
+                    prev_loc=_to_point(payload["prev_loc"]),
+                    prev_landing_point=_to_point(payload["prev_landing_point"]),
+                    prev_admissible=payload["prev_admissible"])
+                try:
+                    returned_action = tuple(float(x) for x in returned_action)
+                except (TypeError, ValueError):
+                    # left for the referee to validate and reject
+                    pass
+                conn.send(("ok", (returned_action, rng.bit_generator.state)))
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+
+
+class PlayerProcess:
+    """Long-lived subprocess hosting players of one class, reused across games."""
+    def __init__(self, player_class):
+        self.key = (player_class.__module__, player_class.__name__)
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_worker_main, args=(child_conn, *self.key), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.sent_maps = set()
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def request(self, message, payload, timeout=None):
+        """Sends one message and waits for the reply, kills the worker if it doesn't answer within timeout."""
+        self.conn.send((message, payload))
+        try:
+            if timeout is not None and not self.conn.poll(timeout):
+                raise TimeoutException
+            status, value = self.conn.recv()
+        except BaseException:
+            self.kill()
+            raise
+        if status == "error":
+            raise PlayerWorkerError(value)
+        return value
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def close(self):
+        if self.process.is_alive():
+            try:
+                self.conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(1)
+        self.kill()
+
+
+_idle_workers = dict()
+
+
+def acquire_worker(player_class):
+    """Returns an idle live worker for player_class, starting one if none is available."""
+    idle = _idle_workers.setdefault((player_class.__module__, player_class.__name__), [])
+    while idle:
+        worker = idle.pop()
+        if worker.is_alive():
+            return worker
+    return PlayerProcess(player_class)
+
+
+def release_worker(worker):
+    if worker.is_alive():
+        _idle_workers.setdefault(worker.key, []).append(worker)
+
+
+@atexit.register
+def close_workers():
+    for idle in _idle_workers.values():
+        for worker in idle:
+            worker.close()
+    _idle_workers.clear()
+
+
+class RemotePlayer:
+    """Player proxy running the real player in a PlayerProcess.
+
+    Only float coordinates cross the pipe per step, the map is sent once per worker and map. The worker gets a
+    copy of the player's private rng, which the referee doesn't draw from, so the player behaves as in process.
+    The state of rng goes to the copy with every play and comes back with every reply, so a checkpoint saves
+    the state the player actually reached, and a restore or reseed of rng reaches the player. A call that
+    exceeds its timeout hard kills the worker and raises TimeoutException.
+    """
+    def __init__(self, player_class, skill, rng, golf_map, start, target, map_path, precomp_dir, logger_name, log_file=None, timeout=None):
+        self.worker = acquire_worker(player_class)
+        self.rng = rng
+        map_key = (map_path, hash(golf_map))
+        payload = dict()
+        payload["map_key"] = map_key
+        payload["golf_map"] = None
+        payload["compiled_hash"] = golf_map.compiled.vertices_hash if golf_map.compiled is not None else None
+        payload["start"] = None
+        payload["target"] = None
+        if map_key not in self.worker.sent_maps:
+            payload["golf_map"] = golf_map
+            payload["start"] = start
+            payload["target"] = target
+        payload["logger_name"] = logger_name
+        payload["log_file"] = log_file
+        payload["player_kwargs"] = dict(skill=skill, rng=rng, map_path=map_path, precomp_dir=precomp_dir)
+        self.__request("init", payload, timeout)
+        self.worker.sent_maps.add(map_key)
+
+    def __request(self, message, payload, timeout):
+        value, rng_state = self.worker.request(message, payload, timeout)
+        self.rng.bit_generator.state = rng_state
+        return value
+
+    def play(self, score, golf_map, target, curr_loc, prev_loc, prev_landing_point, prev_admissible, timeout=None):
+        payload = dict()
+        payload["score"] = score
+        payload["curr_loc"] = _to_xy(curr_loc)
+        payload["prev_loc"] = _to_xy(prev_loc)
+        payload["prev_landing_point"] = _to_xy(prev_landing_point)
+        payload["prev_admissible"] = prev_admissible
+        payload["rng_state"] = self.rng.bit_generator.state
+        return self.__request("play", payload, timeout)
+
+    def release(self):
+        release_worker(self.worker)
@@ -11,9 +11,9 @@ class Player:
 
         Args:
             skill (int): skill of your player
-            rng (np.random.Generator): numpy random number generator, use this for same player behvior across run
+            rng (np.random.Generator): numpy random number generator private to this player, use this for same player behvior across run
             logger (logging.Logger): logger use this like logger.info("message")
-            golf_map (sympy.Polygon): Golf Map polygon
+            golf_map (sympy.Polygon): Golf Map polygon, a read-only golf_map.MapView shared with the referee, also offering vertices_array, shapely and edge_index
             start (sympy.geometry.Point2D): Start location
             target (sympy.geometry.Point2D): Target location
             map_path (str): File path to map
@@ -24,18 +24,12 @@ class Player:
         # # if doesn't depend on skill
         # precomp_path = os.path.join(precomp_dir, "{}.pkl".format(map_path))
         
-        # # precompute check
-        # if os.path.isfile(precomp_path):
-        #     # Getting back the objects:
-        #     with open(precomp_path, "rb") as f:
-        #         self.obj0, self.obj1, self.obj2 = pickle.load(f)
-        # else:
+        # # precompute check, the first game of a map computes and dumps the objects, concurrent games wait and load them
+        # from precomp_cache import load_or_compute
+        # def precompute():
         #     # Compute objects to store
-        #     self.obj0, self.obj1, self.obj2 = _
-
-        #     # Dump the objects
-        #     with open(precomp_path, 'wb') as f:
-        #         pickle.dump([self.obj0, self.obj1, self.obj2], f)
+        #     return [obj0, obj1, obj2]
+        # self.obj0, self.obj1, self.obj2 = load_or_compute(precomp_path, precompute)
         self.skill = skill
         self.rng = rng
         self.logger = logger
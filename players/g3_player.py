@@ -12,6 +12,7 @@ from numba import njit
 from scipy.spatial import KDTree
 
 import constants
+from precomp_cache import load_or_compute
 
 SAMPLE_LIMIT = 3000  # approx. count of sampled points
 MINIMUM_SAMPLE_DISTANCE = 20  # minimum distance between sampled points
@@ -177,10 +178,8 @@ class Player:
         self.golf_map_f = np.asarray([(p.x, p.y) for p in golf_map_f], dtype=np.float64)
 
         precomp_path = os.path.join(precomp_dir, "{}_skill-{}.pkl".format(map_path, skill))
-        if os.path.isfile(precomp_path):
-            with open(precomp_path, "rb") as f:
-                self.sample_dist, self.sampled_points, self.scores, self.kdt = pickle.load(f)
-        else:
+
+        def precompute():
             self.sample_dist, self.sampled_points = sample_points_inside_polygon(golf_map, self.golf_map_f)
 
             # calculate scores
@@ -189,9 +188,9 @@ class Player:
 
             # build KD-Tree
             self.kdt = KDTree([(p.x, p.y) for p in self.sampled_points])
+            return [self.sample_dist, self.sampled_points, self.scores, self.kdt]
 
-            with open(precomp_path, 'wb') as f:
-                pickle.dump([self.sample_dist, self.sampled_points, self.scores, self.kdt], f)
+        self.sample_dist, self.sampled_points, self.scores, self.kdt = load_or_compute(precomp_path, precompute)
 
         self.logger.debug(f"# of sampled points: {len(self.sampled_points)}")
         self.logger.debug(f"max score: {max(self.scores.values())}")
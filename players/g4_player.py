@@ -7,6 +7,7 @@ import sympy
 import logging
 from typing import Tuple
 import constants
+from precomp_cache import load_or_compute
 
 from shapely import geometry
 from collections import defaultdict
@@ -58,18 +59,8 @@ class Player:
 
         self.allowed_distance = constants.max_dist + self.skill
 
-        # # precompute check
-        if os.path.isfile(precomp_path):
-            # Getting back the objects:
-            with open(precomp_path, "rb") as f:
-                grid_scores, point_map = pickle.load(f)
-        else:
-            # Compute objects to store
-            grid_scores, point_map = self.make_grid(golf_map, target)
-
-            # Dump the objects
-            with open(precomp_path, 'wb') as f:
-                pickle.dump([grid_scores, point_map], f)
+        # # precompute check, computed once per map and skill across processes
+        grid_scores, point_map = load_or_compute(precomp_path, lambda: list(self.make_grid(golf_map, target)))
 
         for x_index in range(len(point_map)):
             for y_index in range(len(point_map[0])):
@@ -12,6 +12,7 @@ import logging
 from typing import Tuple
 from collections import defaultdict
 import time
+from precomp_cache import load_or_compute
 
 DEBUG_MSG = False  # enable print messages
 
@@ -44,13 +45,8 @@ class Player:
         # # if doesn't depend on skill
         # precomp_path = os.path.join(precomp_dir, "{}.pkl".format(map_path))
         
-        # precompute check
-        if os.path.isfile(precomp_path):
-            # Getting back the objects:
-            with open(precomp_path, "rb") as f:
-                #self.obj0, self.obj1, self.obj2 = pickle.load(f)
-                self.shapely_poly, self.shapely_edges, self.graph, self.critical_pts = pickle.load(f)
-        else:
+        # precompute check, computed once per map and skill across processes
+        def precompute():
             # Compute objects to store
             #self.obj0, self.obj1, self.obj2 = _
             
@@ -87,10 +83,9 @@ class Player:
             if self.needs_edge_init:
                 self.construct_edges(start, target, only_construct_from_source=False)
                 self.needs_edge_init = False
+            return [self.shapely_poly, self.shapely_edges, self.graph, self.critical_pts]
 
-            # Dump the objects
-            with open(precomp_path, 'wb') as f:
-                pickle.dump([self.shapely_poly, self.shapely_edges, self.graph, self.critical_pts], f)
+        self.shapely_poly, self.shapely_edges, self.graph, self.critical_pts = load_or_compute(precomp_path, precompute)
         
 
     def draw_skeleton(self, polygon, skeleton, show_time=False):
@@ -9,6 +9,7 @@ from typing import Tuple
 from shapely.geometry import Polygon, Point, LineString
 import shapely.affinity
 from collections import defaultdict
+from precomp_cache import load_or_compute
 class Player:
     def __init__(self, skill: int, rng: np.random.Generator, logger: logging.Logger, golf_map: sympy.Polygon, start: sympy.geometry.Point2D, target: sympy.geometry.Point2D, map_path: str, precomp_dir: str) -> None:
         """Initialise the player with given skill.
@@ -38,17 +39,13 @@ class Player:
         self.angle_std = math.sqrt(1/(2 * skill))
 
 
-        # precompute check
-        if os.path.isfile(precomp_path):
-             # Getting back the objects:
-             with open(precomp_path, "rb") as f:
-                 self.grid, self.golf_map, self.graph = pickle.load(f)
-        else:
+        # precompute check, computed once per map and skill across processes
+        def precompute():
             self.create_grid(golf_map)
             self.value_estimation(Point(target.x, target.y))
-            # Compute objects to store
-            with open(precomp_path, 'wb') as f:
-                pickle.dump([self.grid, self.golf_map, self.graph], f)
+            return [self.grid, self.golf_map, self.graph]
+
+        self.grid, self.golf_map, self.graph = load_or_compute(precomp_path, precompute)
 
     def create_grid(self, polygon):
         self.grid = []
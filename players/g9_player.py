@@ -12,6 +12,7 @@ import math
 from queue import PriorityQueue
 import heapq
 from heapq import heappush, heappop
+from precomp_cache import load_or_compute
 
 class Player:
     def __init__(self, skill: int, rng: np.random.Generator, logger: logging.Logger, golf_map: sympy.Polygon, start: sympy.geometry.Point2D, target: sympy.geometry.Point2D, map_path: str, precomp_dir: str) -> None:
@@ -62,18 +63,12 @@ class Player:
         self.zero_center = shapely.geometry.Point(minx + self.cell_width / 2, maxy - self.cell_width / 2)
 
         precomp_path = os.path.join(precomp_dir, "{}.pkl".format(map_path))
-        # precompute check
-        if os.path.isfile(precomp_path):
-            # Getting back the objects:
-            with open(precomp_path, "rb") as f:
-                self.dmap = pickle.load(f)
-        else:
-            # Compute objects to store
+        # precompute check, computed once per map across processes
+        def precompute():
             self.precompute()
+            return self.dmap
 
-            # Dump the objects
-            with open(precomp_path, 'wb') as f:
-                pickle.dump(self.dmap, f)
+        self.dmap = load_or_compute(precomp_path, precompute)
         
     def get_landing_point(self, curr_loc: shapely.geometry.Point, distance: float, angle: float):
         """
@@ -0,0 +1,63 @@
+import os
+import pickle
+import tempfile
+import contextlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@contextlib.contextmanager
+def _locked(lock_path):
+    # an exclusive lock on a side file, released when the file is closed, also if the process dies
+    with open(lock_path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _load(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def dump_atomic(obj, path):
+    """Pickles obj to a temporary file next to path and renames it into place, so readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def load_or_compute(path, compute):
+    """Loads the precomputation pickled at path, or computes and pickles it if no other process has yet.
+
+    Computing is single-flight: the first caller holds a lock on path + ".lock" while it computes, concurrent
+    callers for the same path wait for it and load its result instead of computing it again. The pickle is
+    written with dump_atomic, so a file at path is always complete.
+
+    Args:
+        path (str): pickle path, e.g. os.path.join(precomp_dir, "{}_skill-{}.pkl".format(map_path, skill))
+        compute (callable): returns the object to store, called at most once per path across processes
+
+    Returns:
+        object: loaded or computed object
+    """
+    if os.path.isfile(path):
+        return _load(path)
+    with _locked(path + ".lock"):
+        if os.path.isfile(path):
+            return _load(path)
+        obj = compute()
+        dump_atomic(obj, path)
+        return obj
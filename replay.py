@@ -0,0 +1,145 @@
+import logging
+import numpy as np
+from golf_map import GolfMap
+from trajectory import Trajectory, shot_dtype
+
+replay_version = 1
+
+
+def write_replay(path, map_path, map_hash, player_names, skills, seed, engine, scores, player_states, trajectories):
+    """Writes one game as a compressed .npz replay holding only arrays, loadable without pickle.
+
+    Args:
+        path (str): replay file, numpy appends .npz if missing
+        map_path (str): path of the map json
+        map_hash (str): GolfMap.vertices_hash of the map
+        player_names (list): player names
+        skills (list): player skills
+        seed (int): seed of the game rng, None if unseeded
+        engine (str): shot resolution engine
+        scores (list): final scores
+        player_states (list): final player states
+        trajectories (list): Trajectory per player
+    """
+    shots = np.concatenate([trajectory.records for trajectory in trajectories]) if trajectories else np.zeros(0, dtype=shot_dtype)
+    shot_players = np.repeat(np.arange(len(trajectories)), [len(trajectory) for trajectory in trajectories])
+    np.savez_compressed(
+        path,
+        version=np.array(replay_version),
+        map=np.array(map_path),
+        map_hash=np.array(map_hash),
+        player_names=np.array(player_names, dtype=str),
+        skills=np.array(skills, dtype=np.int64),
+        seed=np.array("" if seed is None else str(seed)),
+        engine=np.array(engine),
+        scores=np.array(scores, dtype=np.int64),
+        player_states=np.array(player_states, dtype=str),
+        shots=shots,
+        shot_players=shot_players)
+
+
+class Replay:
+    """Contents of a replay file, trajectories are rebuilt per player from the shot records."""
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != replay_version:
+                raise ValueError("Unsupported replay version {} in {}".format(int(data["version"]), path))
+            self.map = str(data["map"])
+            self.map_hash = str(data["map_hash"])
+            self.player_names = data["player_names"].tolist()
+            self.skills = data["skills"].tolist()
+            seed = str(data["seed"])
+            self.seed = int(seed) if seed else None
+            self.engine = str(data["engine"])
+            self.scores = data["scores"].tolist()
+            self.player_states = data["player_states"].tolist()
+            shots = data["shots"]
+            shot_players = data["shot_players"]
+        self.trajectories = [Trajectory.from_records(shots[shot_players == idx]) for idx in range(len(self.player_names))]
+
+
+class ReplayGame:
+    """Stands in for GolfGame in GolfApp to play a replay back, revealing the recorded shots in game order.
+
+    No player is constructed or run, each step plots the next recorded shot.
+    """
+    def __init__(self, replay_path, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.replay = Replay(replay_path)
+        self.golf = GolfMap(self.replay.map, self.logger)
+        if self.golf.vertices_hash != self.replay.map_hash:
+            raise ValueError("Map {} changed since the replay was recorded".format(self.replay.map))
+        self.logger.info("Playing back {} with seed {} and {} engine".format(replay_path, self.replay.seed, self.replay.engine))
+        self.player_names = self.replay.player_names
+        self.skills = self.replay.skills
+        self.players = self.player_names
+        self.checkpoint_path = None
+        self.shown = [0]*len(self.player_names)
+        self.golf_app = None
+        self.next_player = self.__assign_next_player()
+
+    @property
+    def played(self):
+        return [trajectory[:shown] for trajectory, shown in zip(self.replay.trajectories, self.shown)]
+
+    @property
+    def scores(self):
+        return [self.replay.scores[idx] if self.__is_done(idx) else shown for idx, shown in enumerate(self.shown)]
+
+    @property
+    def player_states(self):
+        return [self.replay.player_states[idx] if self.__is_done(idx) else "NP" if shown == 0 else "P" for idx, shown in enumerate(self.shown)]
+
+    def __is_done(self, player_idx):
+        return self.shown[player_idx] == len(self.replay.trajectories[player_idx])
+
+    def __assign_next_player(self):
+        for player_idx in range(len(self.player_names)):
+            if not self.__is_done(player_idx):
+                return player_idx
+        return None
+
+    def set_app(self, golf_app):
+        self.golf_app = golf_app
+
+    def get_current_player(self):
+        if self.next_player is not None:
+            return self.player_names[self.next_player]
+        return None
+
+    def get_current_player_idx(self):
+        return self.next_player
+
+    def is_game_ended(self):
+        return self.next_player is None
+
+    def __step(self, do_update):
+        player_idx = self.next_player
+        self.golf_app.match_display_with_game()
+        shot = self.replay.trajectories[player_idx][self.shown[player_idx]]
+        self.shown[player_idx] += 1
+        if do_update:
+            self.golf_app.plot(shot, self.shown[player_idx])
+        if self.__is_done(player_idx):
+            self.golf_app.set_label_text("{} finished with score {}, state {}".format(self.player_names[player_idx], self.replay.scores[player_idx], self.replay.player_states[player_idx]))
+            self.next_player = self.__assign_next_player()
+
+    def play(self, run_stepwise=False, do_update=True, display_end=True):
+        if self.is_game_ended():
+            return
+        if run_stepwise:
+            self.__step(do_update)
+        else:
+            player_idx = self.next_player
+            while self.next_player == player_idx:
+                self.__step(do_update)
+        if do_update:
+            self.golf_app.update_score_table()
+        if self.is_game_ended():
+            self.golf_app.set_label_text("Replay ended", label_num=1)
+
+    def play_all(self):
+        while not self.is_game_ended():
+            self.play(do_update=False)
+        self.golf_app.display_player(len(self.player_names)-1)
+        self.golf_app.update_score_table()
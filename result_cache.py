@@ -0,0 +1,98 @@
+import hashlib
+import inspect
+import pickle
+import sqlite3
+import time
+import constants
+from golf_game import get_player_class
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def game_key(map_path, player_list, skill, seed, engine, file_hashes=None):
+    """Content hash of everything that determines a game's result.
+
+    Covers the map file content, the source of every player module, skill, seed, engine and
+    constants.engine_version. Referee changes that alter results should bump engine_version.
+
+    Args:
+        map_path (str): path of the map json
+        player_list (list): player names as passed to GolfGame
+        skill (int): skill of the players
+        seed (int): seed of the game
+        engine (str): shot resolution engine
+        file_hashes (dict): optional memo of file path to hash, shared between calls
+
+    Returns:
+        str: hex digest, None for unseeded games which aren't reproducible
+    """
+    if seed is None:
+        return None
+    if file_hashes is None:
+        file_hashes = dict()
+
+    def memo_hash(path):
+        if path not in file_hashes:
+            file_hashes[path] = file_hash(path)
+        return file_hashes[path]
+
+    player_hashes = [memo_hash(inspect.getsourcefile(get_player_class(player_name)[0])) for player_name in player_list]
+    key_parts = [memo_hash(map_path), ",".join(player_hashes), str(skill), str(seed), engine, str(constants.engine_version)]
+    return hashlib.sha256("|".join(key_parts).encode()).hexdigest()
+
+
+class ResultCache:
+    """On-disk SQLite cache of game results keyed by game_key, evicting least recently used results.
+
+    The stored size is tracked as results are put, once it exceeds max_bytes the least recently used results are
+    evicted down to evict_fraction of it, so the limit holds even for runs that never close the cache.
+    Only the process that opened it should write to it, tournament workers return results to the main process.
+    """
+    def __init__(self, path, max_bytes=1024**3, evict_fraction=0.9):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evict_fraction = evict_fraction
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self.connection.commit()
+        self.total_bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def get(self, key):
+        if key is None:
+            return None
+        row = self.connection.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        return pickle.loads(row[0])
+
+    def put(self, key, result):
+        if key is None:
+            return
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        replaced = self.connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        self.connection.execute("INSERT OR REPLACE INTO results (key, result, size, last_used) VALUES (?, ?, ?, ?)", (key, blob, len(blob), time.time()))
+        self.total_bytes += len(blob) - (replaced[0] if replaced is not None else 0)
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+        self.connection.commit()
+
+    def evict(self):
+        """Deletes least recently used results down to evict_fraction of max_bytes if the stored results exceed it."""
+        if self.total_bytes > self.max_bytes:
+            rows = self.connection.execute("SELECT key, size FROM results ORDER BY last_used").fetchall()
+            evicted = []
+            for key, size in rows:
+                if self.total_bytes <= self.max_bytes*self.evict_fraction:
+                    break
+                evicted.append((key,))
+                self.total_bytes -= size
+            self.connection.executemany("DELETE FROM results WHERE key = ?", evicted)
+        self.connection.commit()
+
+    def close(self):
+        self.evict()
+        self.connection.close()
@@ -0,0 +1,225 @@
+import os
+import ast
+import json
+import numpy as np
+import pandas as pd
+import constants
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# one row per player of each game, game columns are repeated for every player of the game
+columns = [
+    ("game", "int64"),
+    ("trial", "int64"),
+    ("seed", "uint64"),
+    ("map", "str"),
+    ("player_count", "int64"),
+    ("distance_source_to_target", "float64"),
+    ("start_x", "float64"),
+    ("start_y", "float64"),
+    ("target_x", "float64"),
+    ("target_y", "float64"),
+    ("player_index", "int64"),
+    ("player_name", "str"),
+    ("skill", "int64"),
+    ("score", "int64"),
+    ("player_state", "str"),
+    ("distance_from_target", "float64"),
+    ("penalties", "int64"),
+    ("timeout_count", "int64"),
+    ("error_count", "int64"),
+    ("winner", "bool"),
+    ("total_time", "float64"),
+    ("validation_numeric", "int64"),
+    ("validation_sympy", "int64"),
+] + [("{}_ns".format(phase), "int64") for phase in constants.timing_phases]
+column_names = [name for name, _ in columns]
+default_row_group_size = 65536
+
+
+def results_path(result_dir, results_format=None):
+    """Path of the results store in result_dir, results.parquet if pyarrow is installed, else results.jsonl."""
+    if results_format is None:
+        results_format = "parquet" if pq is not None else "jsonl"
+    return os.path.join(result_dir, "results.{}".format(results_format))
+
+
+def explode_result(result, game):
+    """Splits a tournament result into one row dict per player, see columns.
+
+    Args:
+        result (dict): GolfGame.get_state() with the trial and seed columns added by tournament.py
+        game (int): index of the game in the store
+
+    Returns:
+        list: row dicts
+    """
+    player_names = result["player_names"]
+    total_times = dict(result["total_time_sorted"] or [])
+    winners = set(result["winner_list"] or [])
+    player_timings = (result.get("phase_timings") or {}).get("players", {})
+    start = result["start"] if result["start"] is not None else [np.nan, np.nan]
+    target = result["target"] if result["target"] is not None else [np.nan, np.nan]
+    rows = []
+    for idx, player_name in enumerate(player_names):
+        validation_counts = result["validation_counts"][idx] if result.get("validation_counts") else {}
+        row = {
+            "game": game,
+            "trial": result["trial"],
+            "seed": result["seed"],
+            "map": result["map"],
+            "player_count": len(player_names),
+            "distance_source_to_target": result["distance_source_to_target"],
+            "start_x": start[0],
+            "start_y": start[1],
+            "target_x": target[0],
+            "target_y": target[1],
+            "player_index": idx,
+            "player_name": player_name,
+            "skill": result["skills"][idx],
+            "score": result["scores"][idx],
+            "player_state": result["player_states"][idx],
+            "distance_from_target": result["distances_from_target"][idx],
+            "penalties": result["penalties"][idx],
+            "timeout_count": result["timeout_count"][idx],
+            "error_count": result["error_count"][idx],
+            "winner": player_name in winners,
+            "total_time": total_times.get(player_name, np.nan),
+            "validation_numeric": validation_counts.get("numeric", 0),
+            "validation_sympy": validation_counts.get("sympy", 0),
+        }
+        for phase in constants.timing_phases:
+            row["{}_ns".format(phase)] = player_timings.get(player_name, {}).get(phase, {}).get("total_ns", 0)
+        rows.append(row)
+    return rows
+
+
+def _arrow_schema():
+    return pa.schema([(name, pa.string() if dtype == "str" else pa.from_numpy_dtype(np.dtype(dtype))) for name, dtype in columns])
+
+
+def _typed_frame(data):
+    return pd.DataFrame({name: np.asarray(data[name], dtype=object if dtype == "str" else dtype) for name, dtype in columns}, columns=column_names)
+
+
+class ResultWriter:
+    """Columnar writer of tournament results, buffering exploded rows and writing them a row group at a time.
+
+    Writes Parquet with pyarrow, or with results_format "jsonl" or without pyarrow one json object of column
+    lists per row group. Both are read back by load_results. Rows are only on disk once their row group is
+    written, close the writer to write the last one. A jsonl file cut short by a crash loses only the row
+    group being written, a Parquet file is only readable after close.
+    """
+    def __init__(self, path, row_group_size=default_row_group_size):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.games = 0
+        self.buffer = {name: [] for name in column_names}
+        self.buffered = 0
+        if path.endswith(".parquet"):
+            if pq is None:
+                raise ImportError("Writing {} needs pyarrow, use a .jsonl path instead".format(path))
+            self.schema = _arrow_schema()
+            self.writer = pq.ParquetWriter(path, self.schema)
+            self.file = None
+        else:
+            self.writer = None
+            self.file = open(path, "w")
+
+    def write(self, result):
+        for row in explode_result(result, self.games):
+            for name in column_names:
+                self.buffer[name].append(row[name])
+            self.buffered += 1
+        self.games += 1
+        if self.buffered >= self.row_group_size:
+            self.flush()
+
+    def write_all(self, results):
+        for result in results:
+            self.write(result)
+
+    def flush(self):
+        if not self.buffered:
+            return
+        if self.writer is not None:
+            self.writer.write_table(pa.Table.from_pydict(self.buffer, schema=self.schema))
+        else:
+            self.file.write(json.dumps(self.buffer, default=_json_default))
+            self.file.write("\n")
+            self.file.flush()
+        self.buffer = {name: [] for name in column_names}
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+        else:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError("{} isn't json serializable".format(type(value)))
+
+
+def _load_jsonl(path):
+    data = {name: [] for name in column_names}
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                row_group = json.loads(line)
+            except json.JSONDecodeError:
+                # row group cut short by a crash
+                break
+            for name in column_names:
+                data[name].extend(row_group[name])
+    return _typed_frame(data)
+
+
+def _load_csv(path):
+    # aggregate_results.csv of earlier runs, its list cells are python literals
+    literal_columns = ["player_names", "skills", "scores", "player_states", "distances_from_target", "start", "target", "penalties",
+                       "timeout_count", "error_count", "winner_list", "total_time_sorted", "validation_counts", "phase_timings"]
+    df = pd.read_csv(path, converters={name: ast.literal_eval for name in literal_columns}, dtype={"map": str})
+    data = {name: [] for name in column_names}
+    for game, result in enumerate(df.to_dict("records")):
+        for row in explode_result(result, game):
+            for name in column_names:
+                data[name].append(row[name])
+    return _typed_frame(data)
+
+
+def load_results(path):
+    """Reads a results store into a typed frame with one row per player of each game, see columns.
+
+    Args:
+        path (str): results.parquet or results.jsonl written by ResultWriter, or an aggregate_results.csv
+
+    Returns:
+        pd.DataFrame: typed columns, map, player_name and player_state as categoricals
+    """
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise ImportError("Reading {} needs pyarrow".format(path))
+        frame = pq.read_table(path).to_pandas()
+    elif path.endswith(".csv"):
+        frame = _load_csv(path)
+    else:
+        frame = _load_jsonl(path)
+    for name in ["map", "player_name", "player_state"]:
+        frame[name] = frame[name].astype("category")
+    return frame
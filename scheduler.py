@@ -0,0 +1,81 @@
+import sqlite3
+
+
+def unit_key(config):
+    return (config["map"], tuple(config["player_list"]), config["skill"])
+
+
+def _key_str(key):
+    return "{}|{}|{}".format(key[0], ",".join(key[1]), key[2])
+
+
+class DurationHistory:
+    """SQLite record of the mean wall time of a game per (map, players, skill), kept across tournament runs."""
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS durations (key TEXT PRIMARY KEY, players TEXT NOT NULL, total REAL NOT NULL, count INTEGER NOT NULL)")
+        self.connection.commit()
+        rows = self.connection.execute("SELECT key, players, total, count FROM durations").fetchall()
+        self.means = {key: total/count for key, _, total, count in rows}
+        player_totals = dict()
+        for _, players, total, count in rows:
+            sums = player_totals.setdefault(players, [0., 0])
+            sums[0] += total
+            sums[1] += count
+        self.player_means = {players: total/count for players, (total, count) in player_totals.items()}
+        self.default = sum(total for _, _, total, _ in rows)/max(1, sum(count for _, _, _, count in rows)) if rows else 1.
+
+    def estimate(self, config):
+        """Expected seconds for a config, from its own history, else its players' on any map, else all games."""
+        key = unit_key(config)
+        if _key_str(key) in self.means:
+            return self.means[_key_str(key)]
+        return self.player_means.get(",".join(key[1]), self.default)
+
+    def record(self, config, seconds):
+        key = unit_key(config)
+        self.connection.execute("INSERT INTO durations (key, players, total, count) VALUES (?, ?, ?, 1) ON CONFLICT(key) DO UPDATE SET total = total + excluded.total, count = count + 1",
+                                (_key_str(key), ",".join(key[1]), seconds))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def plan_units(configs, estimate, workers, split_factor=2):
+    """Groups configs into work units that each run in one worker, longest first.
+
+    Configs of one (map, players, skill) form a unit, so a worker runs them back to back and reuses the player
+    precomputation and in-process caches of that map. A unit expected to take longer than 1/(workers*split_factor)
+    of the run is split so it can't hold up the end of the run alone. Units are then ordered
+    longest-processing-time first, so the pool's workers pick up the long units early and the short ones fill the tail.
+
+    Args:
+        configs (list): tournament configs
+        estimate (callable): expected seconds of a config
+        workers (int): number of pool workers
+        split_factor (int): units per worker below which units are split
+
+    Returns:
+        list: lists of configs, in submission order
+    """
+    groups = dict()
+    for config in configs:
+        groups.setdefault(unit_key(config), []).append(config)
+    total = sum(estimate(config) for config in configs)
+    limit = total/(workers*split_factor)
+
+    units = []
+    for group in groups.values():
+        unit, unit_seconds = [], 0.
+        for config in group:
+            seconds = estimate(config)
+            if unit and unit_seconds + seconds > limit:
+                units.append((unit_seconds, unit))
+                unit, unit_seconds = [], 0.
+            unit.append(config)
+            unit_seconds += seconds
+        units.append((unit_seconds, unit))
+    units.sort(key=lambda unit: -unit[0])
+    return [unit for _, unit in units]
@@ -0,0 +1,82 @@
+import os
+import logging
+import numpy as np
+from multiprocessing import shared_memory
+import map_compiler
+
+_alignment = 64
+_attached = []
+
+
+class SharedMap:
+    """Compiled geometry of one map published in a shared memory block by the process that owns it.
+
+    The arrays come from the map's sidecar when it is current, otherwise they are built in memory. Other
+    processes attach read-only with attach(descriptor), the owner must close() the block when they are done.
+    """
+    def __init__(self, map_path, logger=None):
+        logger = logger or logging.getLogger(__name__)
+        with open(map_path, "rb") as f:
+            map_source_hash = map_compiler.source_hash(f.read())
+        compiled = map_compiler.load_compiled(map_path, map_source_hash, logger)
+        if compiled is None:
+            arrays, meta = map_compiler.build_compiled(map_path, logger=logger)
+        else:
+            arrays, meta = compiled.arrays, compiled.meta
+
+        layout = dict()
+        size = 0
+        for name, array in arrays.items():
+            layout[name] = (size, array.dtype.str, array.shape)
+            size += -(-array.nbytes//_alignment)*_alignment
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, array in arrays.items():
+            offset, dtype, shape = layout[name]
+            np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)[...] = array
+        self.descriptor = {"map": map_path, "name": self.shm.name, "layout": layout, "meta": meta}
+        logger.info("Shared map {} in {} ({} bytes)".format(map_path, self.shm.name, size))
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach(descriptor):
+    """Attaches to a SharedMap and registers it as the compiled map of its path in this process.
+
+    Args:
+        descriptor (dict): SharedMap.descriptor
+
+    Returns:
+        map_compiler.CompiledMap: compiled map over read-only views of the shared block
+    """
+    shm = shared_memory.SharedMemory(name=descriptor["name"])
+    # the block stays mapped for the life of the process, the views below point into it
+    _attached.append(shm)
+    arrays = dict()
+    for name, (offset, dtype, shape) in descriptor["layout"].items():
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        array.flags.writeable = False
+        arrays[name] = array
+    compiled = map_compiler.CompiledMap(arrays, descriptor["meta"], "shm:{}".format(descriptor["name"]))
+    map_compiler.register_shared(descriptor["map"], compiled)
+    return compiled
+
+
+def attach_all(descriptors):
+    """Process pool initializer attaching to every shared map."""
+    for descriptor in descriptors:
+        attach(descriptor)
+
+
+def share_maps(map_paths, logger=None):
+    """Publishes the compiled geometry of each distinct map once.
+
+    Returns:
+        list: SharedMap per distinct map, in order of first appearance
+    """
+    seen = dict()
+    for map_path in map_paths:
+        if os.path.abspath(map_path) not in seen:
+            seen[os.path.abspath(map_path)] = SharedMap(map_path, logger)
+    return list(seen.values())
@@ -0,0 +1,26 @@
+import os
+import sys
+import pytest
+
+# the simulator modules live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def require_golf_game():
+    """Skips the calling test module where golf_game can't be imported.
+
+    golf_game imports every player, and g6 needs scikit-geometry, which is installed by conda_requirements.sh only.
+    """
+    pytest.importorskip("skgeom")
+
+
+def game_args(map_name="simple.json", seed=42, skill=50, **overrides):
+    """Headless GolfGame args as tournament.py builds them, for a map in maps/default."""
+    import argparse
+    import constants
+    args = dict(address="127.0.0.1", automatic=False, disable_logging=True, disable_timeout=False, log_path=None,
+                map=os.path.join(ROOT, "maps", "default", map_name), no_browser=False, no_gui=True, port=8080, seed=seed,
+                skill=skill, engine=constants.default_headless_engine, summary_only=False, sandbox=False, replay_path=None)
+    args.update(overrides)
+    return argparse.Namespace(**args)
@@ -0,0 +1,14 @@
+import math
+
+
+class Player:
+    """Test player whose every shot depends on its private rng, importable by sandbox workers."""
+    def __init__(self, skill, rng, logger, golf_map, start, target, map_path, precomp_dir):
+        self.skill = skill
+        self.rng = rng
+
+    def play(self, score, golf_map, target, curr_loc, prev_loc, prev_landing_point, prev_admissible):
+        required_dist = float(curr_loc.distance(target))
+        distance = min(200 + self.skill, required_dist/1.1)*self.rng.uniform(0.3, 0.9)
+        angle = math.atan2(float(target.y - curr_loc.y), float(target.x - curr_loc.x)) + self.rng.normal(0, 0.2)
+        return (distance, angle)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import constants
+import analytics
+import results_store
+
+
+def game_result(player_name, score, state, trial=1, penalties=0):
+    return {
+        "trial": trial, "seed": trial, "player_names": [player_name], "map": "maps/default/simple.json", "skills": [50],
+        "scores": [score], "player_states": [state], "distances_from_target": [0.0 if state == "S" else 120.0],
+        "distance_source_to_target": 721.1, "start": [100.0, 100.0], "target": [700.0, 500.0], "penalties": [penalties],
+        "timeout_count": [0], "error_count": [0], "winner_list": [player_name] if state == "S" else [],
+        "total_time_sorted": [(player_name, 0.1)], "validation_counts": [{"numeric": score, "sympy": 0}], "phase_timings": None,
+    }
+
+
+def results_frame(results):
+    rows = [row for game, result in enumerate(results) for row in results_store.explode_result(result, game)]
+    return pd.DataFrame(rows, columns=results_store.column_names)
+
+
+def test_failed_game_counts_max_tries_strokes():
+    # an invalid action ends the game as "F" with the low score it had so far
+    frame = results_frame([game_result("Quitter", 2, "F"), game_result("Finisher", 5, "S")])
+    table = analytics.aggregate(frame, ["player_name"], n_resamples=100).set_index("player_name")
+    assert table.loc["Quitter", "mean_strokes"] == constants.max_tries
+    assert table.loc["Quitter", "median_strokes"] == constants.max_tries
+    assert table.loc["Quitter", "mean_strokes_low"] == constants.max_tries
+    assert table.loc["Finisher", "mean_strokes"] == 5
+    assert table.loc["Finisher", "rank"] == 1 and table.loc["Quitter", "rank"] == 2
+    assert table.loc["Quitter", "success_rate"] == 0 and table.loc["Finisher", "success_rate"] == 1
+
+
+def test_rates_and_intervals():
+    results = [game_result("A", 4, "S", trial, penalties=trial % 2) for trial in range(1, 41)] + [game_result("A", 3, "F", 41)]
+    table = analytics.aggregate(results_frame(results), ["map", "player_name"], n_resamples=500, seed=1)
+    row = table.iloc[0]
+    assert row["games"] == 41
+    assert np.isclose(row["mean_strokes"], (40*4 + constants.max_tries)/41)
+    assert np.isclose(row["penalty_rate"], 20/(40*4 + 3))
+    assert row["mean_strokes_low"] <= row["mean_strokes"] <= row["mean_strokes_high"]
+    assert row["success_rate_low"] <= row["success_rate"] <= row["success_rate_high"]
+
+
+def test_analyze_caches_by_file_hash(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    with results_store.ResultWriter(path) as writer:
+        writer.write_all([game_result("A", 4, "S"), game_result("B", 2, "F")])
+    cache_path = str(tmp_path / "analytics_cache.sqlite")
+    first = analytics.analyze(path, [["player_name"]], n_resamples=50, cache_path=cache_path)
+    cache = analytics.AggregateCache(cache_path)
+    key = analytics.AggregateCache.key(analytics.results_hash(path), ["player_name"], 50, 0.95, 0)
+    assert cache.get(key) is not None
+    cache.close()
+    second = analytics.analyze(path, [["player_name"]], n_resamples=50, cache_path=cache_path)
+    pd.testing.assert_frame_equal(first[0][1], second[0][1])
@@ -0,0 +1,61 @@
+import pytest
+from conftest import require_golf_game, game_args
+
+require_golf_game()
+import golf_game
+from golf_game import GolfGame
+from utils import to_numeric_point
+import replay
+import rng_player
+
+
+@pytest.fixture(autouse=True)
+def rng_default_player(monkeypatch):
+    monkeypatch.setattr(golf_game, "DefaultPLayer", rng_player.Player)
+
+
+def final_state(game):
+    state = game.get_state(include_trajectories=True)
+    # think times are measured, everything else follows from the seed
+    shots = [[{key: value for key, value in shot.items() if key != "think_time"} for shot in trajectory] for trajectory in state["trajectories"]]
+    return state["scores"], state["player_states"], shots
+
+
+def play_shots(game, count):
+    # one shot at a time like GolfGameBatch, a turn of play() lasts until the player's game ends
+    for _ in range(count):
+        player_idx, action = game.next_action()
+        shot = game.golf.resolve_shots([to_numeric_point(game.curr_locs[player_idx])], float(action[0]), float(action[1]), game.skills[player_idx], game.noise_rngs[player_idx])
+        game.apply_shot(player_idx, action, game.step_play_dict_from_shot(player_idx, float(action[0]), shot))
+
+
+@pytest.mark.parametrize("sandbox", [False, True])
+def test_resumed_game_matches_uninterrupted_game(tmp_path, sandbox):
+    uninterrupted = GolfGame(["d"], game_args("simple.json", seed=7, sandbox=sandbox))
+    uninterrupted.play_all()
+    expected = final_state(uninterrupted)
+    assert expected[0][0] > 3
+
+    checkpoint_path = str(tmp_path / "game.ckpt")
+    interrupted = GolfGame(["d"], game_args("simple.json", seed=7, sandbox=sandbox))
+    play_shots(interrupted, 3)
+    interrupted.save_checkpoint(checkpoint_path)
+
+    resumed = GolfGame(["d"], game_args("simple.json", seed=None, sandbox=sandbox, resume=checkpoint_path))
+    resumed.play_all()
+    assert final_state(resumed) == expected
+
+
+def test_replay_after_resume_records_the_game_seed(tmp_path):
+    checkpoint_path = str(tmp_path / "game.ckpt")
+    interrupted = GolfGame(["d"], game_args("simple.json", seed=7))
+    play_shots(interrupted, 2)
+    interrupted.save_checkpoint(checkpoint_path)
+
+    resumed = GolfGame(["d"], game_args("simple.json", seed=None, resume=checkpoint_path))
+    resumed.play_all()
+    replay_path = str(tmp_path / "game.npz")
+    resumed.save_replay(replay_path)
+    recorded = replay.Replay(replay_path)
+    assert recorded.seed == 7
+    assert recorded.scores == resumed.scores
@@ -0,0 +1,51 @@
+import os
+import json
+import numpy as np
+import pytest
+import geometry
+from conftest import ROOT
+
+maps = ["default/simple.json", "default/zig.json", "g1/g1_map.json", "g6/snake.json", "g7/complex.json"]
+
+
+def map_edges(map_name):
+    with open(os.path.join(ROOT, "maps", map_name), "r") as f:
+        return geometry.polygon_edges(json.load(f)["map"])
+
+
+def random_points(edges, count, rng):
+    # the bounding box grown by a margin, plus the vertices so boundary cases are queried as well
+    low = edges[:, :2].min(axis=0) - 20
+    high = edges[:, :2].max(axis=0) + 20
+    return np.concatenate([rng.uniform(low, high, size=(count, 2)), edges[:, :2]])
+
+
+@pytest.mark.parametrize("map_name", maps)
+def test_points_in_polygon_matches_brute_force(map_name):
+    edges = map_edges(map_name)
+    points = random_points(edges, 2000, np.random.default_rng(0))
+    index = geometry.EdgeGridIndex(edges)
+    np.testing.assert_array_equal(index.points_in_polygon(points), geometry.points_in_polygon(points, edges))
+
+
+@pytest.mark.parametrize("map_name", maps)
+def test_segments_admissible_matches_brute_force(map_name):
+    edges = map_edges(map_name)
+    rng = np.random.default_rng(1)
+    starts = random_points(edges, 2000, rng)
+    # short and long segments, some of them ending on a vertex
+    ends = starts + rng.normal(0, 1, size=starts.shape)*rng.choice([5, 50, 300], size=(len(starts), 1))
+    ends[::7] = edges[rng.integers(0, len(edges), size=len(ends[::7])), :2]
+    index = geometry.EdgeGridIndex(edges)
+    expected = geometry.segments_admissible(starts, ends, edges)
+    assert expected.any() and not expected.all()
+    np.testing.assert_array_equal(index.segments_admissible(starts, ends), expected)
+
+
+@pytest.mark.parametrize("map_name", maps)
+def test_query_box_finds_the_edge_under_the_box(map_name):
+    edges = map_edges(map_name)
+    index = geometry.EdgeGridIndex(edges)
+    midpoints = (edges[:, :2] + edges[:, 2:])/2
+    for edge_id, (x, y) in enumerate(midpoints):
+        assert edge_id in index.query_box(x - 1, y - 1, x + 1, y + 1)
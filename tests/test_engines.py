@@ -0,0 +1,30 @@
+import pytest
+from conftest import require_golf_game, game_args
+
+require_golf_game()
+from golf_game import GolfGame
+
+maps = ["simple.json", "zig.json", "step.json", "../g1/g1_map.json", "../g7/complex.json"]
+point_keys = ["start", "landing", "final"]
+
+
+def played_game(map_name, seed, engine):
+    game = GolfGame(["d"], game_args(map_name, seed=seed, engine=engine))
+    game.play_all()
+    return game.get_state(include_trajectories=True)
+
+
+@pytest.mark.parametrize("map_name", maps)
+def test_numeric_engine_matches_sympy_engine(map_name):
+    numeric = played_game(map_name, 3, "numeric")
+    exact = played_game(map_name, 3, "sympy")
+    assert numeric["scores"] == exact["scores"]
+    assert numeric["player_states"] == exact["player_states"]
+    assert numeric["penalties"] == exact["penalties"]
+    assert len(numeric["trajectories"][0]) == len(exact["trajectories"][0])
+    for numeric_shot, exact_shot in zip(numeric["trajectories"][0], exact["trajectories"][0]):
+        assert numeric_shot["admissible"] == exact_shot["admissible"]
+        assert numeric_shot["reached_target"] == exact_shot["reached_target"]
+        for key in point_keys:
+            # the sympy engine keeps 15 significant digits
+            assert numeric_shot[key] == pytest.approx(exact_shot[key], abs=1e-6)
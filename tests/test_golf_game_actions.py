@@ -0,0 +1,35 @@
+import pytest
+from conftest import require_golf_game, game_args
+
+require_golf_game()
+import golf_game
+from golf_game import GolfGame
+
+
+def action_player(action):
+    class Player:
+        def __init__(self, skill, rng, logger, golf_map, start, target, map_path, precomp_dir):
+            pass
+
+        def play(self, *args, **kwargs):
+            return action
+    return Player
+
+
+@pytest.mark.parametrize("action", [(10**400, 0.), (100., -10**400), (float("nan"), 0.), (float("inf"), 0.), None, (1.,)])
+def test_invalid_action_fails_player_without_crashing(monkeypatch, action):
+    monkeypatch.setattr(golf_game, "DefaultPLayer", action_player(action))
+    game = GolfGame(["d"], game_args())
+    game.play_all()
+    state = game.get_state()
+    assert state["player_states"] == ["F"]
+    assert state["error_count"] == [0]
+
+
+def test_valid_numeric_action_is_played(monkeypatch):
+    monkeypatch.setattr(golf_game, "DefaultPLayer", action_player((50, 0.5)))
+    game = GolfGame(["d"], game_args())
+    game.play_all()
+    state = game.get_state()
+    assert state["validation_counts"][0]["numeric"] > 0
+    assert state["scores"][0] > 0
@@ -0,0 +1,36 @@
+import pytest
+from conftest import require_golf_game, game_args
+
+require_golf_game()
+import golf_game
+from golf_game import GolfGame
+from golf_game_batch import GolfGameBatch
+import rng_player
+
+maps = ["simple.json", "step.json", "../g1/g1_map.json"]
+seeds = [1, 2, 3, 4]
+
+
+def outcome(state):
+    # think times are measured, everything else follows from the seed
+    shots = [[{key: value for key, value in shot.items() if key != "think_time"} for shot in trajectory] for trajectory in state["trajectories"]]
+    return state["scores"], state["player_states"], state["penalties"], state["distances_from_target"], state["skills"], shots
+
+
+@pytest.mark.parametrize("player", ["default", "rng"])
+@pytest.mark.parametrize("map_name", maps)
+def test_batch_games_match_games_run_alone(monkeypatch, map_name, player):
+    if player == "rng":
+        monkeypatch.setattr(golf_game, "DefaultPLayer", rng_player.Player)
+    player_list = ["d", "d"]
+    batch = GolfGameBatch(player_list, [game_args(map_name, seed=seed, skill=None) for seed in seeds])
+    batch.play_all()
+    for seed, state in zip(seeds, batch.get_states(include_trajectories=True)):
+        alone = GolfGame(player_list, game_args(map_name, seed=seed, skill=None))
+        alone.play_all()
+        assert outcome(state) == outcome(alone.get_state(include_trajectories=True))
+
+
+def test_batch_rejects_mixed_maps():
+    with pytest.raises(ValueError):
+        GolfGameBatch(["d"], [game_args("simple.json"), game_args("zig.json")])
@@ -0,0 +1,33 @@
+import pytest
+from conftest import require_golf_game, game_args
+
+require_golf_game()
+import golf_game
+from golf_game import GolfGame
+import rng_player
+
+
+@pytest.fixture(autouse=True)
+def rng_group_player(monkeypatch):
+    # group 1 plays with rng_player, which draws from its rng on every shot
+    monkeypatch.setattr(golf_game, "G1_Player", rng_player.Player)
+
+
+def player_outcome(player_list, player_name, seed):
+    game = GolfGame(player_list, game_args("simple.json", seed=seed, skill=None))
+    game.play_all()
+    state = game.get_state(include_trajectories=True)
+    idx = state["player_names"].index(player_name)
+    shots = [{key: value for key, value in shot.items() if key != "think_time"} for shot in state["trajectories"][idx]]
+    return state["skills"][idx], state["scores"][idx], state["player_states"][idx], shots
+
+
+@pytest.mark.parametrize("seed", [5, 6])
+@pytest.mark.parametrize("player_list", [["1", "d"], ["d", "1"], ["1", "1", "d"]])
+def test_player_outcome_doesnt_depend_on_the_lineup(player_list, seed):
+    assert player_outcome(player_list, "Default Player", seed) == player_outcome(["d"], "Default Player", seed)
+
+
+@pytest.mark.parametrize("player_list", [["d", "1"], ["1", "d", "d"]])
+def test_rng_player_outcome_doesnt_depend_on_the_lineup(player_list):
+    assert player_outcome(player_list, "Group 1", 5) == player_outcome(["1"], "Group 1", 5)
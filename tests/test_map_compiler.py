@@ -0,0 +1,88 @@
+import os
+import shutil
+import logging
+import numpy as np
+import pytest
+import geometry
+import map_compiler
+import shared_map
+from golf_map import GolfMap
+from conftest import ROOT
+
+maps = ["default/zig.json", "g7/complex.json", "g6/snake.json"]
+index_arrays = ["edges", "cell_edges", "cell_start", "row_edges", "row_start"]
+
+
+@pytest.fixture(autouse=True)
+def no_shared_maps(monkeypatch):
+    monkeypatch.setattr(map_compiler, "_shared_maps", dict())
+
+
+def copied_map(tmp_path, map_name):
+    path = str(tmp_path / os.path.basename(map_name))
+    shutil.copy(os.path.join(ROOT, "maps", map_name), path)
+    return path
+
+
+def load_map(map_path, use_compiled=True):
+    return GolfMap(map_path, logging.getLogger(__name__), use_compiled=use_compiled)
+
+
+def polygon_area(vertices):
+    x, y = vertices[:, 0], vertices[:, 1]
+    return abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))/2
+
+
+def assert_matches_source(golf, compiled, source):
+    assert golf.compiled is compiled
+    np.testing.assert_array_equal(golf.vertices, source.vertices)
+    assert golf.vertices_hash == source.vertices_hash == compiled.vertices_hash
+    assert golf.start == source.start and golf.target == source.target
+    for name in index_arrays:
+        np.testing.assert_array_equal(getattr(golf.edge_index, name), getattr(source.edge_index, name), err_msg=name)
+    points = np.random.default_rng(0).uniform(compiled.bbox[:2], compiled.bbox[2:], size=(500, 2))
+    np.testing.assert_array_equal(golf.edge_index.points_in_polygon(points), source.edge_index.points_in_polygon(points))
+
+
+@pytest.mark.parametrize("map_name", maps)
+def test_compile_load_round_trip(tmp_path, map_name):
+    map_path = copied_map(tmp_path, map_name)
+    source = load_map(map_path, use_compiled=False)
+    map_compiler.compile_map(map_path, resolutions=[32])
+    golf = load_map(map_path)
+    assert golf.compiled is not None and isinstance(golf.compiled.vertices, np.memmap)
+    assert_matches_source(golf, golf.compiled, source)
+    # a constrained triangulation covers the non-convex map exactly
+    triangles = golf.compiled.vertices[golf.compiled.triangles]
+    assert sum(polygon_area(triangle) for triangle in triangles) == pytest.approx(polygon_area(source.vertices))
+    centroids = triangles.mean(axis=1)
+    assert geometry.points_in_polygon(centroids, source.edges).all()
+
+
+def test_edited_map_ignores_stale_sidecar(tmp_path):
+    map_path = copied_map(tmp_path, "g7/complex.json")
+    map_compiler.compile_map(map_path, resolutions=[32])
+    with open(map_path, "a") as f:
+        f.write("\n")
+    assert load_map(map_path).compiled is None
+
+
+def test_triangulate_needs_constrained_triangulation(monkeypatch):
+    shapely = pytest.importorskip("shapely")
+    monkeypatch.delattr(shapely, "constrained_delaunay_triangles", raising=False)
+    with pytest.raises(ImportError):
+        map_compiler.triangulate(np.array([[0., 0.], [2., 0.], [2., 2.], [1., 1.], [0., 2.]]))
+
+
+def test_shared_map_attach_round_trip(tmp_path):
+    map_path = copied_map(tmp_path, "g7/complex.json")
+    source = load_map(map_path, use_compiled=False)
+    shared = shared_map.share_maps([map_path, map_path])
+    try:
+        assert len(shared) == 1
+        compiled = shared_map.attach(shared[0].descriptor)
+        assert not compiled.vertices.flags.writeable
+        assert_matches_source(load_map(map_path), compiled, source)
+    finally:
+        for block in shared:
+            block.close()
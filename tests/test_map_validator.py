@@ -0,0 +1,54 @@
+import os
+import json
+import subprocess
+import sys
+import pytest
+import map_validator
+from conftest import ROOT
+
+SQUARE = [[0, 0], [100, 0], [100, 100], [0, 100]]
+
+
+def test_accepts_simple_map():
+    errors, warnings = map_validator.validate_map({"map": SQUARE, "start": [10, 10], "target": [90, 90]})
+    assert errors == [] and warnings == []
+
+
+def test_accepts_shipped_map():
+    with open(os.path.join(ROOT, "maps", "default", "simple.json")) as f:
+        assert map_validator.validate_map(json.load(f))[0] == []
+
+
+def test_repeated_vertex_is_only_a_warning():
+    errors, warnings = map_validator.validate_map({"map": SQUARE[:2] + [[100, 0]] + SQUARE[2:], "start": [10, 10], "target": [90, 90]})
+    assert errors == [] and len(warnings) == 1
+
+
+@pytest.mark.parametrize("map_json, message", [
+    ({"map": [[0, 0], [100, 100], [100, 0], [0, 60]], "start": [10, 50], "target": [90, 50]}, "intersect"),
+    ({"map": SQUARE + [[100, 0]], "start": [10, 10], "target": [90, 90]}, "duplicates"),
+    ({"map": [[0, 0], [50, 0], [100, 0]], "start": [10, 10], "target": [90, 90]}, "no area"),
+    ({"map": SQUARE, "start": [150, 10], "target": [90, 90]}, "start point"),
+    ({"map": SQUARE, "start": [10, 10]}, "missing \"target\""),
+    ({"map": SQUARE, "start": [10, 10], "target": "middle"}, "target should be"),
+    ({"map": [[0, 0], ["a"], [1, 1]], "start": [10, 10], "target": [90, 90]}, "list of [x, y] pairs"),
+    ({"generated": ["a.json"]}, "missing \"map\""),
+    ([1, 2], "should be an object"),
+])
+def test_rejects_invalid_map(map_json, message):
+    errors, _ = map_validator.validate_map(map_json)
+    assert any(message in error for error in errors), errors
+    with pytest.raises(map_validator.MapValidationError):
+        map_validator.check_map(map_json)
+
+
+def test_cli_reports_non_maps_and_continues(tmp_path):
+    (tmp_path / "manifest.json").write_text(json.dumps({"generated": ["a.json"]}))
+    (tmp_path / "broken.json").write_text("not json")
+    (tmp_path / "square.json").write_text(json.dumps({"map": SQUARE, "start": [10, 10], "target": [90, 90]}))
+    paths = sorted(str(path) for path in tmp_path.iterdir())
+    completed = subprocess.run([sys.executable, os.path.join(ROOT, "map_validator.py")] + paths, capture_output=True, text=True, cwd=ROOT)
+    assert completed.returncode == 1
+    assert "manifest.json: invalid" in completed.stdout
+    assert "broken.json: invalid" in completed.stdout
+    assert "square.json: valid" in completed.stdout
@@ -0,0 +1,27 @@
+import pytest
+from conftest import require_golf_game, game_args
+
+require_golf_game()
+import golf_game
+from golf_game import GolfGame
+import rng_player
+
+
+def outcome(game):
+    state = game.get_state(include_trajectories=True)
+    # think times are measured, everything else follows from the seed
+    shots = [[{key: value for key, value in shot.items() if key != "think_time"} for shot in trajectory] for trajectory in state["trajectories"]]
+    return state["player_names"], state["skills"], state["scores"], state["player_states"], state["penalties"], state["winner_list"], shots
+
+
+@pytest.mark.parametrize("seed", [3, 0])
+def test_parallel_players_match_sequential_game(monkeypatch, seed):
+    # pool workers are forked, so they see the patched class
+    monkeypatch.setattr(golf_game, "G1_Player", rng_player.Player)
+    player_list = ["1", "d", "d"]
+    parallel = GolfGame(player_list, game_args("simple.json", seed=seed, skill=None, parallel_players=True))
+    parallel.play_all()
+    # an unseeded game replays with the entropy it drew
+    sequential = GolfGame(player_list, game_args("simple.json", seed=seed or parallel.seed_sequence.entropy, skill=None))
+    sequential.play_all()
+    assert outcome(parallel) == outcome(sequential)
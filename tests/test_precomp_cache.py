@@ -0,0 +1,70 @@
+import os
+import time
+import multiprocessing
+import pytest
+from precomp_cache import load_or_compute
+
+
+class CrashWhilePickled:
+    """Kills the process in the middle of pickling, after part of the pickle is written."""
+    def __reduce__(self):
+        os._exit(3)
+
+
+class Unpicklable:
+    def __reduce__(self):
+        raise TypeError("can't pickle Unpicklable")
+
+
+def slow_compute(calls_path):
+    with open(calls_path, "a") as f:
+        f.write("compute\n")
+    time.sleep(0.3)
+    return {"table": list(range(1000))}
+
+
+def load_in_process(path, calls_path, results):
+    results.put(load_or_compute(path, lambda: slow_compute(calls_path)))
+
+
+def crash_in_process(path):
+    load_or_compute(path, lambda: ["partial {}".format(idx) for idx in range(100000)] + [CrashWhilePickled()])
+
+
+def test_concurrent_callers_compute_once(tmp_path):
+    path = str(tmp_path / "map_skill-10.pkl")
+    calls_path = str(tmp_path / "calls.txt")
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [context.Process(target=load_in_process, args=(path, calls_path, results)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    loaded = [results.get(timeout=30) for _ in processes]
+    for process in processes:
+        process.join(30)
+    assert loaded == [{"table": list(range(1000))}]*4
+    with open(calls_path, "r") as f:
+        assert f.read() == "compute\n"
+
+
+def test_crash_mid_write_leaves_no_pickle(tmp_path):
+    path = str(tmp_path / "map_skill-10.pkl")
+    process = multiprocessing.get_context("fork").Process(target=crash_in_process, args=(path,))
+    process.start()
+    process.join(30)
+    assert process.exitcode == 3
+    partial = [file_name for file_name in os.listdir(str(tmp_path)) if file_name.endswith(".tmp")]
+    assert len(partial) == 1 and os.path.getsize(str(tmp_path / partial[0])) > 0
+    assert not os.path.exists(path)
+    # the lock died with the process, the next caller computes again
+    assert load_or_compute(path, lambda: "computed") == "computed"
+    assert load_or_compute(path, lambda: pytest.fail("computed twice")) == "computed"
+
+
+def test_failed_compute_or_dump_leaves_no_files(tmp_path):
+    path = str(tmp_path / "map.pkl")
+    with pytest.raises(ZeroDivisionError):
+        load_or_compute(path, lambda: 1/0)
+    with pytest.raises(TypeError):
+        load_or_compute(path, Unpicklable)
+    assert sorted(os.listdir(str(tmp_path))) == ["map.pkl.lock"]
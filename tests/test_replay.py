@@ -0,0 +1,118 @@
+import os
+import logging
+import numpy as np
+import pytest
+import replay
+from golf_map import GolfMap
+from trajectory import Trajectory
+from conftest import ROOT
+
+map_path = os.path.join(ROOT, "maps", "default", "simple.json")
+
+
+class RecordingApp:
+    """Records the calls ReplayGame makes to GolfApp."""
+    def __init__(self):
+        self.plotted = []
+        self.labels = []
+
+    def match_display_with_game(self):
+        pass
+
+    def plot(self, shot, shown):
+        self.plotted.append((shot.to_dict(), shown))
+
+    def set_label_text(self, text, label_num=0):
+        self.labels.append(text)
+
+    def update_score_table(self):
+        pass
+
+    def display_player(self, player_idx):
+        pass
+
+
+def random_trajectory(rng, shots):
+    trajectory = Trajectory()
+    for _ in range(shots):
+        start, landing, final = rng.uniform(0, 800, size=(3, 2))
+        trajectory.append(start, landing, final, bool(rng.integers(2)), False, *rng.uniform(0, 250, size=4), rng.uniform(0, 1))
+    return trajectory
+
+
+def write_game(path, seed, trajectories):
+    vertices_hash = GolfMap(map_path, logging.getLogger(__name__)).vertices_hash
+    replay.write_replay(path, map_path, vertices_hash, ["Group 1", "Default Player"], [40, 70], seed, "numeric", [len(trajectory) for trajectory in trajectories], ["S", "F"], trajectories)
+
+
+@pytest.mark.parametrize("seed", [2**64 - 1, 7, None])
+def test_write_read_round_trip(tmp_path, seed):
+    rng = np.random.default_rng(0)
+    trajectories = [random_trajectory(rng, 4), random_trajectory(rng, 10)]
+    path = str(tmp_path / "game.npz")
+    write_game(path, seed, trajectories)
+    with np.load(path, allow_pickle=False) as data:
+        assert str(data["seed"]) == ("" if seed is None else str(seed))
+    recorded = replay.Replay(path)
+    assert recorded.seed == seed
+    assert recorded.engine == "numeric"
+    assert recorded.map == map_path
+    assert recorded.player_names == ["Group 1", "Default Player"]
+    assert recorded.skills == [40, 70]
+    assert recorded.scores == [4, 10] and recorded.player_states == ["S", "F"]
+    assert recorded.map_hash == GolfMap(map_path, logging.getLogger(__name__)).vertices_hash
+    for recorded_trajectory, trajectory in zip(recorded.trajectories, trajectories):
+        np.testing.assert_array_equal(recorded_trajectory.records, trajectory.records)
+        assert recorded_trajectory.to_list() == trajectory.to_list()
+
+
+def test_player_without_shots_round_trips(tmp_path):
+    trajectories = [Trajectory(), random_trajectory(np.random.default_rng(1), 3)]
+    path = str(tmp_path / "game.npz")
+    write_game(path, None, trajectories)
+    recorded = replay.Replay(path)
+    assert [len(trajectory) for trajectory in recorded.trajectories] == [0, 3]
+
+
+def test_replay_game_plays_back_the_recorded_shots(tmp_path):
+    rng = np.random.default_rng(2)
+    trajectories = [random_trajectory(rng, 2), random_trajectory(rng, 3)]
+    path = str(tmp_path / "game.npz")
+    write_game(path, 5, trajectories)
+    game = replay.ReplayGame(path)
+    app = RecordingApp()
+    game.set_app(app)
+    assert game.player_states == ["NP", "NP"]
+    game.play(run_stepwise=True)
+    assert game.scores == [1, 0] and game.player_states == ["P", "NP"]
+    game.play()
+    assert game.get_current_player() == "Default Player"
+    assert game.scores == [2, 0] and game.player_states == ["S", "NP"]
+    game.play()
+    assert game.is_game_ended()
+    assert game.scores == [2, 3] and game.player_states == ["S", "F"]
+    assert [shot for shot, _ in app.plotted] == trajectories[0].to_list() + trajectories[1].to_list()
+    assert [shown for _, shown in app.plotted] == [1, 2, 1, 2, 3]
+
+
+def test_play_all_reaches_the_recorded_result(tmp_path):
+    rng = np.random.default_rng(3)
+    path = str(tmp_path / "game.npz")
+    write_game(path, 5, [random_trajectory(rng, 2), random_trajectory(rng, 3)])
+    game = replay.ReplayGame(path)
+    game.set_app(RecordingApp())
+    game.play_all()
+    assert game.is_game_ended()
+    assert game.scores == [2, 3] and game.player_states == ["S", "F"]
+    assert [len(played) for played in game.played] == [2, 3]
+
+
+def test_edited_map_rejects_the_replay(tmp_path):
+    path = str(tmp_path / "game.npz")
+    write_game(path, 5, [Trajectory(), Trajectory()])
+    with np.load(path) as data:
+        arrays = dict(data)
+    arrays["map_hash"] = np.array("0"*64)
+    np.savez_compressed(path, **arrays)
+    with pytest.raises(ValueError):
+        replay.ReplayGame(path)
@@ -0,0 +1,94 @@
+import os
+import json
+import logging
+import numpy as np
+import pytest
+import sympy
+import constants
+from golf_map import GolfMap
+from conftest import ROOT
+
+maps = ["default/simple.json", "default/zig.json", "g1/g1_map.json"]
+skill = 50
+# small concave maps with integer vertices, sympy's encloses takes seconds per shot on the float vertices of real maps
+sympy_maps = {
+    "l_shape": {"map": [[0, 0], [600, 0], [600, 200], [200, 200], [200, 600], [0, 600]], "start": [100, 500], "target": [500, 100]},
+    "notch": {"map": [[0, 0], [700, 0], [700, 500], [400, 500], [350, 150], [300, 500], [0, 500]], "start": [100, 400], "target": [600, 400]},
+}
+
+
+def load_map(map_path):
+    return GolfMap(map_path, logging.getLogger(__name__), use_compiled=False)
+
+
+def random_shots(golf, count, rng):
+    # from the start and from inside points, with putts and distances beyond the skill's reach
+    inside = golf.vertices[rng.integers(0, len(golf.vertices), size=count)]*0.6 + golf.start_np*0.4
+    starts = np.where(rng.random((count, 1)) < 0.5, golf.start_np, inside)
+    reach = constants.max_dist + skill
+    distances = np.select([rng.random(count) < 0.2, rng.random(count) < 0.9], [rng.uniform(1, constants.min_putter_dist, count), rng.uniform(constants.min_putter_dist, reach, count)], reach + 10)
+    angles = rng.uniform(-np.pi, np.pi, size=count)
+    return starts, distances, angles
+
+
+def sympy_shot(golf, start, distance, actual_distance, actual_angle):
+    """Landing, final point, admissible and reached_target of one shot by the rules of GolfGame.__move_sympy."""
+    point = sympy.Point2D
+    cos, sin = np.cos(actual_angle), np.sin(actual_angle)
+    if constants.min_putter_dist <= distance <= constants.max_dist + skill:
+        landing_point = point(start[0] + actual_distance*cos, start[1] + actual_distance*sin)
+        final_point = point(start[0] + (1. + constants.extra_roll)*actual_distance*cos, start[1] + (1. + constants.extra_roll)*actual_distance*sin)
+    elif distance < constants.min_putter_dist:
+        landing_point = point(*start)
+        final_point = point(start[0] + actual_distance*cos, start[1] + actual_distance*sin)
+    else:
+        # a shot beyond reach doesn't move, sympy makes its segment a point
+        landing_point = point(*start)
+        final_point = point(*start)
+    segment_land = sympy.geometry.Segment2D(landing_point, final_point)
+    reached_target = segment_land.distance(golf.target) <= constants.target_radius
+    if reached_target:
+        final_point = segment_land.projection(golf.target)
+        segment_land = sympy.geometry.Segment2D(landing_point, final_point)
+    admissible = bool(golf.golf_map.encloses(segment_land) and not golf.golf_map.intersection(segment_land))
+    return [float(landing_point.x), float(landing_point.y)], [float(final_point.x), float(final_point.y)], admissible, bool(reached_target) and admissible
+
+
+@pytest.mark.parametrize("map_name", maps)
+def test_batch_matches_shots_resolved_one_by_one(map_name):
+    golf = load_map(os.path.join(ROOT, "maps", map_name))
+    rng = np.random.default_rng(0)
+    starts, distances, angles = random_shots(golf, 500, rng)
+    actual_distances, actual_angles = golf.draw_shot_noise(distances, angles, skill, rng)
+    # a small chunk size also covers shots split across geometry calls
+    batch = golf.resolve_noisy_shots(starts, distances, actual_distances, actual_angles, skill, chunk_size=64)
+    for shot_idx in range(len(starts)):
+        single = golf.resolve_noisy_shots(starts[shot_idx], distances[shot_idx], actual_distances[shot_idx], actual_angles[shot_idx], skill)
+        for key, values in single.items():
+            np.testing.assert_array_equal(batch[key][shot_idx], values[0], err_msg=key)
+
+
+@pytest.mark.parametrize("map_name", sorted(sympy_maps))
+def test_batch_matches_sympy_rules(tmp_path, map_name):
+    map_path = str(tmp_path / "{}.json".format(map_name))
+    with open(map_path, "w") as f:
+        json.dump(sympy_maps[map_name], f)
+    golf = load_map(map_path)
+    rng = np.random.default_rng(1)
+    starts, distances, angles = random_shots(golf, 30, rng)
+    batch = golf.resolve_shots(starts, distances, angles, skill, rng)
+    assert batch["admissible"].any() and not batch["admissible"].all()
+    for shot_idx in range(len(starts)):
+        landing_point, final_point, admissible, reached_target = sympy_shot(golf, starts[shot_idx], distances[shot_idx], batch["actual_distances"][shot_idx], batch["actual_angles"][shot_idx])
+        assert batch["landing_points"][shot_idx] == pytest.approx(landing_point, abs=1e-6)
+        assert batch["final_points"][shot_idx] == pytest.approx(final_point, abs=1e-6)
+        assert batch["admissible"][shot_idx] == admissible
+        assert batch["reached_target"][shot_idx] == reached_target
+
+
+def test_single_shot_draws_noise_like_move():
+    golf = load_map(os.path.join(ROOT, "maps", "default", "simple.json"))
+    shot = golf.resolve_shots(golf.start_np, 150., 0.3, skill, np.random.default_rng(5))
+    rng = np.random.default_rng(5)
+    assert shot["actual_distances"][0] == rng.normal(150., 150./skill)
+    assert shot["actual_angles"][0] == rng.normal(0.3, 1/(2*skill))
@@ -0,0 +1,102 @@
+import os
+import shutil
+import itertools
+import pytest
+from conftest import require_golf_game, ROOT
+
+require_golf_game()
+import constants
+import golf_game
+import result_cache
+from result_cache import ResultCache, game_key
+import rng_player
+
+
+@pytest.fixture
+def map_path(tmp_path):
+    path = str(tmp_path / "simple.json")
+    shutil.copy(os.path.join(ROOT, "maps", "default", "simple.json"), path)
+    return path
+
+
+def key_of(map_path, **overrides):
+    key_args = dict(player_list=["d"], skill=50, seed=7, engine="numeric")
+    key_args.update(overrides)
+    return game_key(map_path, **key_args)
+
+
+def test_same_game_same_key(map_path):
+    assert key_of(map_path) == key_of(map_path)
+    assert key_of(map_path, seed=None) is None
+
+
+@pytest.mark.parametrize("overrides", [dict(skill=60), dict(seed=8), dict(engine="sympy"), dict(player_list=["1"]), dict(player_list=["d", "d"])])
+def test_game_settings_change_the_key(map_path, overrides):
+    assert key_of(map_path, **overrides) != key_of(map_path)
+
+
+def test_map_content_changes_the_key(map_path):
+    key = key_of(map_path)
+    with open(map_path, "a") as f:
+        f.write("\n")
+    assert key_of(map_path) != key
+
+
+def test_player_source_changes_the_key(map_path, monkeypatch):
+    key = key_of(map_path)
+    monkeypatch.setattr(golf_game, "DefaultPLayer", rng_player.Player)
+    assert key_of(map_path) != key
+
+
+def test_engine_version_changes_the_key(map_path, monkeypatch):
+    key = key_of(map_path)
+    monkeypatch.setattr(constants, "engine_version", constants.engine_version + 1)
+    assert key_of(map_path) != key
+
+
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path)
+    assert cache.get("a") is None
+    cache.put("a", {"scores": [4]})
+    cache.put(None, {"scores": [5]})
+    assert cache.get(None) is None
+    cache.close()
+    cache = ResultCache(path)
+    assert cache.get("a") == {"scores": [4]}
+    cache.close()
+
+
+def result_size(result):
+    return len(result_cache.pickle.dumps(result, protocol=result_cache.pickle.HIGHEST_PROTOCOL))
+
+
+def test_put_evicts_least_recently_used(tmp_path, monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(result_cache.time, "time", lambda: next(clock))
+    path = str(tmp_path / "cache.sqlite")
+    size = result_size({"key": "a"})
+    cache = ResultCache(path, max_bytes=int(3.5*size), evict_fraction=0.6)
+    for key in "abc":
+        cache.put(key, {"key": key})
+    cache.get("a")
+    # the fourth result goes over the limit, evicting the least recently used down to 60% of it
+    cache.put("d", {"key": "d"})
+    assert cache.total_bytes == 2*size
+    # no close, a crashed run keeps the limit too
+    reopened = ResultCache(path)
+    assert reopened.total_bytes == 2*size
+    assert [reopened.get(key) for key in "abcd"] == [{"key": "a"}, None, None, {"key": "d"}]
+    reopened.close()
+    cache.close()
+
+
+def test_replacing_a_result_doesnt_count_twice(tmp_path):
+    size = result_size({"key": "a"})
+    cache = ResultCache(str(tmp_path / "cache.sqlite"), max_bytes=2*size)
+    for _ in range(5):
+        cache.put("a", {"key": "a"})
+    cache.put("b", {"key": "b"})
+    assert cache.total_bytes == 2*size
+    assert cache.get("a") == {"key": "a"}
+    cache.close()
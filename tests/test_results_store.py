@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+import constants
+import results_store
+
+# the columns tournament.py writes to aggregate_results.csv, golf_game.return_vals after its extra columns
+csv_columns = ["trial", "seed", "player_names", "map", "skills", "scores", "player_states", "distances_from_target", "distance_source_to_target",
+               "start", "target", "penalties", "timeout_count", "error_count", "winner_list", "total_time_sorted", "validation_counts", "phase_timings"]
+
+
+def game_result(trial):
+    phase_timings = {"players": {name: {phase: {"total_ns": 1000*trial + idx, "count": 3, "max_ns": 500} for idx, phase in enumerate(constants.timing_phases)} for name in ["Group 1", "Group 2"]}}
+    return {
+        "trial": trial, "seed": np.uint64(2**63 + trial), "player_names": ["Group 1", "Group 2"], "map": "maps/default/simple.json",
+        "skills": [40, 40], "scores": [4, 10], "player_states": ["S", "F"], "distances_from_target": [0.0, 87.5],
+        "distance_source_to_target": 721.1, "start": [100.0, 100.0], "target": [700.0, 500.0], "penalties": [0, trial],
+        "timeout_count": [0, 1], "error_count": [0, 0], "winner_list": ["Group 1"], "total_time_sorted": [("Group 1", 0.25), ("Group 2", 1.5)],
+        "validation_counts": [{"numeric": 8, "sympy": 0}, {"numeric": 19, "sympy": 1}], "phase_timings": phase_timings,
+    }
+
+
+def expected_frame(results):
+    rows = [row for game, result in enumerate(results) for row in results_store.explode_result(result, game)]
+    frame = results_store._typed_frame({name: [row[name] for row in rows] for name in results_store.column_names})
+    for name in ["map", "player_name", "player_state"]:
+        frame[name] = frame[name].astype("category")
+    return frame
+
+
+@pytest.mark.parametrize("results_format", ["jsonl", "parquet"])
+def test_writer_round_trip(tmp_path, results_format):
+    if results_format == "parquet":
+        pytest.importorskip("pyarrow")
+    results = [game_result(trial) for trial in range(1, 6)]
+    path = results_store.results_path(str(tmp_path), results_format)
+    # a row group size that splits the games over several row groups
+    with results_store.ResultWriter(path, row_group_size=3) as writer:
+        writer.write(results[0])
+        writer.write_all(results[1:])
+    frame = results_store.load_results(path)
+    pd.testing.assert_frame_equal(frame, expected_frame(results))
+    assert frame["seed"].dtype == np.uint64 and frame["seed"].iloc[0] == 2**63 + 1
+    assert frame["winner"].tolist() == [True, False]*5
+    assert frame["think_ns"].tolist()[:2] == [1000, 1000]
+
+
+def test_jsonl_cut_short_keeps_written_row_groups(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    with results_store.ResultWriter(path, row_group_size=2) as writer:
+        writer.write_all([game_result(trial) for trial in range(1, 4)])
+    with open(path, "r") as f:
+        lines = f.readlines()
+    with open(path, "w") as f:
+        f.writelines(lines[:2] + [lines[2][:len(lines[2])//2]])
+    pd.testing.assert_frame_equal(results_store.load_results(path), expected_frame([game_result(trial) for trial in range(1, 3)]))
+
+
+def test_csv_loads_like_the_store(tmp_path):
+    results = [game_result(trial) for trial in range(1, 4)]
+    csv_path = str(tmp_path / "aggregate_results.csv")
+    pd.DataFrame(results, columns=csv_columns).to_csv(csv_path, index=False)
+    pd.testing.assert_frame_equal(results_store.load_results(csv_path), expected_frame(results))
@@ -0,0 +1,56 @@
+from scheduler import DurationHistory, plan_units, unit_key
+
+maps = ["maps/default/simple.json", "maps/g1/g1_map.json", "maps/g7/complex.json"]
+
+
+def tournament_configs(trials=4):
+    return [{"map": map_path, "skill": skill, "player_list": [player], "trial": trial, "seed": trial}
+            for map_path in maps for skill in [10, 70] for player in ["1", "2"] for trial in range(1, trials + 1)]
+
+
+def config_ids(configs):
+    return sorted((config["map"], config["skill"], config["player_list"][0], config["trial"]) for config in configs)
+
+
+def test_units_keep_map_players_and_skill_together(tmp_path):
+    configs = tournament_configs()
+    history = DurationHistory(str(tmp_path / "durations.sqlite"))
+    # no history, every config is estimated alike and no unit is split
+    units = plan_units(configs, history.estimate, workers=2)
+    assert len(units) == len(maps)*2*2
+    assert all(len(set(unit_key(config) for config in unit)) == 1 for unit in units)
+    assert config_ids(config for unit in units for config in unit) == config_ids(configs)
+    history.close()
+
+
+def test_long_units_are_split_and_run_first(tmp_path):
+    configs = tournament_configs()
+    history = DurationHistory(str(tmp_path / "durations.sqlite"))
+    slow = [config for config in configs if config["map"] == maps[2] and config["player_list"] == ["2"] and config["skill"] == 10]
+    for config in configs:
+        history.record(config, 30. if config in slow else 1.)
+    history.close()
+
+    history = DurationHistory(str(tmp_path / "durations.sqlite"))
+    assert history.estimate(slow[0]) == 30.
+    units = plan_units(configs, history.estimate, workers=4)
+    estimates = [sum(history.estimate(config) for config in unit) for unit in units]
+    assert estimates == sorted(estimates, reverse=True)
+    # the slow group holds most of the run, it is split into units of one config each and submitted first
+    assert units[:len(slow)] == [[config] for config in slow]
+    assert all(len(set(unit_key(config) for config in unit)) == 1 for unit in units)
+    assert config_ids(config for unit in units for config in unit) == config_ids(configs)
+    history.close()
+
+
+def test_estimate_falls_back_to_players_then_all_games(tmp_path):
+    history = DurationHistory(str(tmp_path / "durations.sqlite"))
+    history.record({"map": maps[0], "skill": 10, "player_list": ["1"]}, 2.)
+    history.record({"map": maps[0], "skill": 10, "player_list": ["1"]}, 4.)
+    history.record({"map": maps[0], "skill": 10, "player_list": ["2"]}, 9.)
+    history.close()
+    history = DurationHistory(str(tmp_path / "durations.sqlite"))
+    assert history.estimate({"map": maps[0], "skill": 10, "player_list": ["1"]}) == 3.
+    assert history.estimate({"map": maps[1], "skill": 40, "player_list": ["1"]}) == 3.
+    assert history.estimate({"map": maps[1], "skill": 40, "player_list": ["3"]}) == 5.
+    history.close()
@@ -0,0 +1,66 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from time_budget import TimeBudget
+from utils import TimeoutException
+
+limit = 0.2
+
+
+def sleep_past_budget():
+    time.sleep(2)
+
+
+def budget_run(budget, func, *args, **kwargs):
+    try:
+        return "returned", budget.run(func, *args, **kwargs)
+    except TimeoutException:
+        return "timeout", None
+
+
+def in_worker_thread(func, *args):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(func, *args).result()
+
+
+@pytest.mark.parametrize("thread", ["main", "worker"])
+def test_sleep_past_fractional_budget_times_out(thread):
+    budget = TimeBudget(limit)
+    run = budget_run if thread == "main" else lambda *args: in_worker_thread(budget_run, *args)
+    start = time.perf_counter()
+    assert run(budget, sleep_past_budget) == ("timeout", None)
+    assert time.perf_counter() - start < limit + 0.5
+    assert limit <= budget.wall_used < limit + 0.5
+    assert budget.exhausted()
+    # a spent budget fails the next call without running it
+    calls = []
+    assert run(budget, calls.append, 1) == ("timeout", None)
+    assert calls == []
+
+
+@pytest.mark.parametrize("thread", ["main", "worker"])
+def test_fast_calls_are_charged_their_own_time(thread):
+    budget = TimeBudget(limit)
+    run = budget_run if thread == "main" else lambda *args: in_worker_thread(budget_run, *args)
+    charged = 0.
+    for value in range(5):
+        assert run(budget, time.sleep, 0.01) == ("returned", None)
+        assert 0.01 <= budget.last_wall < 0.05
+        charged += budget.last_wall
+        assert run(budget, abs, -value) == ("returned", value)
+        charged += budget.last_wall
+    assert budget.wall_used == pytest.approx(charged)
+    assert budget.remaining() == pytest.approx(limit - charged)
+
+
+def test_worker_thread_errors_reach_the_caller():
+    budget = TimeBudget(limit)
+    with pytest.raises(ZeroDivisionError):
+        in_worker_thread(budget.run, lambda: 1/0)
+    assert not budget.exhausted()
+
+
+def test_unenforced_calls_run_past_the_budget():
+    budget = TimeBudget(0.05)
+    assert budget.run(time.sleep, 0.1, enforce=False) is None
+    assert budget.exhausted() and budget.remaining() == 0.
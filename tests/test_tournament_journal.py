@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from tournament_journal import TournamentJournal, config_key
+
+setup = {"players": ["1", "2"], "skills": [10, 40], "trials": 2, "maps": ["maps/default/simple.json"]}
+
+
+def config(trial, seed, player="1"):
+    return {"map": "maps/default/simple.json", "skill": 10, "player_list": [player], "trial": trial, "seed": seed}
+
+
+def test_resume_reuses_entropy_and_completed_configs(tmp_path):
+    path = str(tmp_path / "journal.sqlite")
+    journal = TournamentJournal(path)
+    entropy = journal.start(None, setup)
+    seeds = np.random.SeedSequence(entropy).generate_state(2, dtype=np.uint64)
+    journal.record(config(1, seeds[0]), {"scores": [4]})
+    # no close, the record is committed as the config completes
+    resumed = TournamentJournal(path)
+    assert resumed.start(None, setup) == entropy
+    assert resumed.start(entropy, setup) == entropy
+    completed = resumed.completed()
+    assert list(completed) == [config_key(config(1, seeds[0]))]
+    assert completed[config_key(config(1, seeds[0]))] == (seeds[0], {"scores": [4]})
+    assert config_key(config(2, seeds[1])) not in completed
+    journal.close()
+    resumed.close()
+
+
+def test_record_replaces_the_result_of_a_config(tmp_path):
+    journal = TournamentJournal(str(tmp_path / "journal.sqlite"))
+    journal.start(5, setup)
+    journal.record(config(1, 11), {"scores": [4]})
+    journal.record(config(1, 12), {"scores": [6]})
+    journal.record(config(1, 11, player="2"), {"scores": [3]})
+    assert journal.completed() == {config_key(config(1, 12)): (12, {"scores": [6]}), config_key(config(1, 11, player="2")): (11, {"scores": [3]})}
+    journal.close()
+
+
+@pytest.mark.parametrize("entropy, changed_setup", [(5, dict(setup, trials=3)), (6, setup)])
+def test_resume_rejects_a_different_run(tmp_path, entropy, changed_setup):
+    path = str(tmp_path / "journal.sqlite")
+    journal = TournamentJournal(path)
+    journal.start(5, setup)
+    journal.close()
+    journal = TournamentJournal(path)
+    with pytest.raises(ValueError):
+        journal.start(entropy, changed_setup)
+    journal.close()
@@ -0,0 +1,89 @@
+import signal
+import threading
+import time
+from utils import TimeoutException, timeout_handler
+
+
+class TimeBudget:
+    """Aggregate time budget of one player, measured with perf_counter (wall) and thread_time (cpu).
+
+    Calls are enforced against the remaining wall time with sub-second precision. On the main thread a
+    SIGALRM interval timer interrupts the call, elsewhere the call runs in a daemon thread that is abandoned
+    once its deadline passes, so games can run in threads or executors.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.wall_used = 0.
+        self.cpu_used = 0.
+        self.last_wall = 0.
+        self.last_cpu = 0.
+
+    def remaining(self):
+        return max(0., self.limit - self.wall_used)
+
+    def exhausted(self):
+        return self.wall_used >= self.limit
+
+    def run(self, func, *args, enforce=True, **kwargs):
+        """Calls func(*args, **kwargs) and charges its time to the budget.
+
+        Args:
+            func (callable): function to call
+            enforce (bool): raise TimeoutException once the remaining budget is used up
+
+        Returns:
+            the return value of func
+        """
+        deadline = self.remaining() if enforce else None
+        if deadline is not None and deadline <= 0:
+            raise TimeoutException
+        use_signal = deadline is not None and hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+        if deadline is None or use_signal:
+            return self.__run_here(func, args, kwargs, deadline)
+        return self.__run_in_thread(func, args, kwargs, deadline)
+
+    def __charge(self, wall, cpu):
+        self.last_wall = wall
+        self.last_cpu = cpu
+        self.wall_used += wall
+        self.cpu_used += cpu
+
+    def __run_here(self, func, args, kwargs, deadline):
+        previous_handler = None
+        if deadline is not None:
+            previous_handler = signal.signal(signal.SIGALRM, timeout_handler)
+            signal.setitimer(signal.ITIMER_REAL, deadline)
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if deadline is not None:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous_handler)
+            self.__charge(time.perf_counter() - start_wall, time.thread_time() - start_cpu)
+
+    def __run_in_thread(self, func, args, kwargs, deadline):
+        outcome = dict()
+
+        def target():
+            start_cpu = time.thread_time()
+            try:
+                outcome["result"] = func(*args, **kwargs)
+            except BaseException as e:
+                outcome["error"] = e
+            outcome["cpu"] = time.thread_time() - start_cpu
+
+        worker = threading.Thread(target=target, daemon=True)
+        start_wall = time.perf_counter()
+        worker.start()
+        worker.join(deadline)
+        wall = time.perf_counter() - start_wall
+        if worker.is_alive():
+            # python threads can't be killed, the call is abandoned and its cpu time is unknown
+            self.__charge(wall, 0.)
+            raise TimeoutException
+        self.__charge(wall, outcome["cpu"])
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
@@ -7,27 +7,53 @@ import numpy as np
 import pandas as pd
 import itertools
 from tqdm import tqdm
+import constants
 from golf_game import GolfGame, return_vals
-from multiprocessing import Pool
+from golf_game_batch import GolfGameBatch
+from result_cache import ResultCache, game_key
+from shared_map import share_maps, attach_all
+from tournament_journal import TournamentJournal, config_key
+from scheduler import DurationHistory, plan_units
+from results_store import ResultWriter, results_path, default_row_group_size
+from utils import slugify
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import traceback
+import time
 
 
-def generate_args(map, skill, log_path, seed):
-    args = argparse.Namespace(address='127.0.0.1', automatic=False, disable_logging=True, disable_timeout=False, log_path=log_path, map=map, no_browser=False, no_gui=True, port=8080, seed=seed, skill=skill)
+def generate_args(map, skill, log_path, seed, sandbox=False, replay_path=None):
+    args = argparse.Namespace(address='127.0.0.1', automatic=False, disable_logging=True, disable_timeout=False, log_path=log_path, map=map, no_browser=False, no_gui=True, port=8080, seed=seed, skill=skill, engine=constants.default_headless_engine, summary_only=True, sandbox=sandbox, replay_path=replay_path)
     return args
 
 
-def worker(config):
-    global RESULT_DIR, extra_df_cols
+def config_args(config):
+    global SANDBOX, REPLAY_DIR
     log_path = None
-    args = generate_args(map=config["map"], skill=config["skill"], log_path=log_path, seed=config["seed"])
-    golf_game = GolfGame(player_list=config["player_list"], args=args)
-    golf_game.play_all()
-    result = golf_game.get_state()
+    replay_path = None
+    if REPLAY_DIR:
+        replay_path = os.path.join(REPLAY_DIR, "{}.npz".format(slugify("{}-{}-{}-{}".format(config["map"], config["skill"], "-".join(config["player_list"]), config["trial"]))))
+    return generate_args(map=config["map"], skill=config["skill"], log_path=log_path, seed=config["seed"], sandbox=SANDBOX, replay_path=replay_path)
+
+
+def add_extra_cols(result, config):
+    global extra_df_cols
     for df_col in extra_df_cols:
         result[df_col] = config[df_col]
     return result
 
+
+def worker(config):
+    golf_game = GolfGame(player_list=config["player_list"], args=config_args(config))
+    golf_game.play_all()
+    return add_extra_cols(golf_game.get_state(), config)
+
+
+def batch_worker(configs):
+    # configs share map and players, they differ only by trial and seed
+    golf_game_batch = GolfGameBatch(player_list=configs[0]["player_list"], args_list=[config_args(config) for config in configs])
+    golf_game_batch.play_all()
+    return [add_extra_cols(result, config) for result, config in zip(golf_game_batch.get_states(), configs)]
+
 def worker_exc(config):
     try:
         return (None, None, worker(config))
@@ -35,6 +61,27 @@ def worker_exc(config):
         tb = traceback.format_exc()
         return (e, tb, config)
 
+def batch_worker_exc(configs):
+    try:
+        return [(None, None, result) for result in batch_worker(configs)]
+    except Exception as e:
+        tb = traceback.format_exc()
+        return [(e, tb, config) for config in configs]
+
+def unit_worker_exc(configs, batch):
+    # the configs of a work unit share map, players and skill and run back to back in one worker
+    if batch:
+        start = time.perf_counter()
+        outcomes = batch_worker_exc(configs)
+        seconds = (time.perf_counter() - start)/len(configs)
+        return [outcome + (seconds,) for outcome in outcomes]
+    outcomes = []
+    for config in configs:
+        start = time.perf_counter()
+        outcome = worker_exc(config)
+        outcomes.append(outcome + (time.perf_counter() - start,))
+    return outcomes
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -43,8 +90,23 @@ if __name__ == "__main__":
     parser.add_argument("--trials", "-t", default=5, type=int, help="Number of trials for each config")
     parser.add_argument("--maps", "-m", default="tournament_maps.json", help="Json for tournament maps")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose")
+    parser.add_argument("--sandbox", action="store_true", help="Run players in worker processes reused across the games of each tournament worker")
+    parser.add_argument("--batch", action="store_true", help="Run the trials of each config side by side in one GolfGameBatch")
+    parser.add_argument("--cache_path", help="SQLite result cache, defaults to result_cache.sqlite in result_dir")
+    parser.add_argument("--cache_max_mb", default=1024, type=int, help="Size limit of the result cache, least recently used results are evicted")
+    parser.add_argument("--no_cache", action="store_true", help="Rerun every config instead of reusing cached results")
+    parser.add_argument("--replay_dir", help="Directory to write a binary replay of every game to")
+    parser.add_argument("--durations_path", help="SQLite history of game durations used to schedule work units, defaults to durations.sqlite in result_dir")
+    parser.add_argument("--resume", action="store_true", help="Continue the tournament in result_dir with its recorded seed entropy, running only configs without a recorded result")
+    parser.add_argument("--results_format", choices=["parquet", "jsonl"], help="Format of the results store in result_dir, parquet if pyarrow is installed, else jsonl")
+    parser.add_argument("--row_group_size", default=default_row_group_size, type=int, help="Player rows buffered per row group of the results store")
+    parser.add_argument("--csv", action="store_true", help="Also write the results to aggregate_results.csv")
     args = parser.parse_args()
     RESULT_DIR = args.result_dir
+    SANDBOX = args.sandbox
+    REPLAY_DIR = args.replay_dir
+    if REPLAY_DIR:
+        os.makedirs(REPLAY_DIR, exist_ok=True)
     os.makedirs(RESULT_DIR, exist_ok=True)
 
     PLAYERS_LIST = list(map(str, range(1, 10)))
@@ -56,7 +118,14 @@ if __name__ == "__main__":
     extra_df_cols = ["trial", "seed"]
     all_df_cols = extra_df_cols+return_vals
 
-    seed_sequence = np.random.SeedSequence(args.seed_entropy)
+    # completed configs are committed to the journal one by one, a resumed run regenerates the same seeds from its entropy
+    journal_path = os.path.join(RESULT_DIR, "journal.sqlite")
+    if not args.resume and os.path.isfile(journal_path):
+        os.remove(journal_path)
+    journal = TournamentJournal(journal_path)
+    durations = DurationHistory(args.durations_path or os.path.join(RESULT_DIR, "durations.sqlite"))
+    setup = {"players": PLAYERS_LIST, "skills": SKILLS, "trials": TRIALS, "maps": MAPS}
+    seed_sequence = np.random.SeedSequence(journal.start(args.seed_entropy, setup))
     print("Using seed sequence with entropy {}".format(seed_sequence.entropy))
     with open(os.path.join(RESULT_DIR, "config.txt"), "w") as f:
         f.write("Seed entropy {}\n".format(seed_sequence.entropy))
@@ -88,43 +157,107 @@ if __name__ == "__main__":
         tournament_configs.append(config)
 
     out_fn = os.path.join(RESULT_DIR, "aggregate_results.csv")
+
+    recorded_results = []
+    pending_configs = []
+    completed = journal.completed()
+    for config in tournament_configs:
+        recorded = completed.get(config_key(config))
+        if recorded is not None and recorded[0] == config["seed"]:
+            recorded_results.append(recorded[1])
+        else:
+            pending_configs.append(config)
+    if args.resume:
+        print("Resuming with {} completed configs".format(len(recorded_results)))
+
+    cache = None
+    cached_results = []
+    if not args.no_cache:
+        cache = ResultCache(args.cache_path or os.path.join(RESULT_DIR, "result_cache.sqlite"), max_bytes=args.cache_max_mb*1024**2)
+        file_hashes = dict()
+        uncached_configs = []
+        for config in pending_configs:
+            # replays are only written by games that run, so nothing is reused while writing them
+            config["cache_key"] = None if REPLAY_DIR else game_key(config["map"], config["player_list"], config["skill"], config["seed"], constants.default_headless_engine, file_hashes)
+            result = cache.get(config["cache_key"])
+            if result is None:
+                uncached_configs.append(config)
+            else:
+                cached_results.append(add_extra_cols(result, config))
+                journal.record(config, cached_results[-1])
+        pending_configs = uncached_configs
+        print("Reusing {} cached results, running {} configs".format(len(cached_results), len(pending_configs)))
     
     precomp_dir = os.path.join("precomp")
-    if os.path.isdir(precomp_dir):
+    if os.path.isdir(precomp_dir) and not args.resume:
         shutil.rmtree(precomp_dir)
     
     err_dir = os.path.join(RESULT_DIR, "errors")
-    if os.path.isdir(err_dir):
+    if os.path.isdir(err_dir) and not args.resume:
         shutil.rmtree(err_dir)
-    os.makedirs(err_dir)
+    os.makedirs(err_dir, exist_ok=True)
+    # a resumed run keeps the error files of earlier runs and numbers its own after them
+    error_offset = len([fn for fn in os.listdir(err_dir) if fn.startswith("error_")])
 
-    with open(out_fn, "w") as csvf:
-        with open(os.path.join(err_dir, "all_errors.txt"), "w") as all_ef:
-            header_df = pd.DataFrame([], columns=all_df_cols)
-            header_df.to_csv(csvf, index=False, header=True)
-            csvf.flush()
+    csvf = open(out_fn, "w") if args.csv else None
+    with ResultWriter(results_path(RESULT_DIR, args.results_format), row_group_size=args.row_group_size) as store:
+        with open(os.path.join(err_dir, "all_errors.txt"), "a" if args.resume else "w") as all_ef:
+            if csvf is not None:
+                header_df = pd.DataFrame([], columns=all_df_cols)
+                header_df.to_csv(csvf, index=False, header=True)
+                csvf.flush()
             errors = 0
-            with Pool() as p:
-                for exc, tb, result in tqdm(p.imap(worker_exc, tournament_configs), total=len(tournament_configs)):
-                    if exc is not None:
-                        # handle exception
-                        errors += 1
-                        print("Error processing config", file=sys.stderr)
-                        print(config, file=sys.stderr)
-                        if args.verbose:
-                            print(tb, file=sys.stderr)
-                        all_ef.write(str(config))
-                        all_ef.write("\n")
-                        with open(os.path.join(err_dir, "error_{}.txt".format(errors)), "w") as ef:
-                            ef.write("Error processing config")
-                            ef.write("\n")
-                            ef.write(str(config))
-                            ef.write("\n")
-                            ef.write(tb)
-                            ef.write("\n")
-
-                    else:
-                        df = pd.DataFrame([result], columns=all_df_cols)
-                        df.to_csv(csvf, index=False, header=False)
-                        csvf.flush()
-        print("Completed with {} errors".format(errors))
\ No newline at end of file
+            store.write_all(recorded_results + cached_results)
+            if csvf is not None and (recorded_results or cached_results):
+                pd.DataFrame(recorded_results + cached_results, columns=all_df_cols).to_csv(csvf, index=False, header=False)
+                csvf.flush()
+            # map geometry is built once here and attached read-only by every worker
+            shared_maps = share_maps([config["map"] for config in pending_configs])
+            try:
+                # executor workers aren't daemonic, so they can start sandboxed player processes
+                workers = os.cpu_count() or 1
+                units = plan_units(pending_configs, durations.estimate, workers)
+                with ProcessPoolExecutor(max_workers=workers, initializer=attach_all, initargs=([shared_map.descriptor for shared_map in shared_maps],)) as p:
+                    futures = {p.submit(unit_worker_exc, unit, args.batch): unit for unit in units}
+                    progress = tqdm(total=len(pending_configs))
+                    for future in as_completed(futures):
+                        for config, (exc, tb, result, seconds) in zip(futures[future], future.result()):
+                            progress.update(1)
+                            if exc is not None:
+                                # handle exception
+                                errors += 1
+                                print("Error processing config", file=sys.stderr)
+                                print(config, file=sys.stderr)
+                                if args.verbose:
+                                    print(tb, file=sys.stderr)
+                                all_ef.write(str(config))
+                                all_ef.write("\n")
+                                with open(os.path.join(err_dir, "error_{}.txt".format(error_offset + errors)), "w") as ef:
+                                    ef.write("Error processing config")
+                                    ef.write("\n")
+                                    ef.write(str(config))
+                                    ef.write("\n")
+                                    ef.write(tb)
+                                    ef.write("\n")
+
+                            else:
+                                durations.record(config, seconds)
+                                journal.record(config, result)
+                                if cache is not None:
+                                    cache.put(config["cache_key"], {k: v for k, v in result.items() if k not in extra_df_cols})
+                                store.write(result)
+                                if csvf is not None:
+                                    df = pd.DataFrame([result], columns=all_df_cols)
+                                    df.to_csv(csvf, index=False, header=False)
+                                    csvf.flush()
+                    progress.close()
+            finally:
+                for shared_map in shared_maps:
+                    shared_map.close()
+    if csvf is not None:
+        csvf.close()
+    journal.close()
+    durations.close()
+    if cache is not None:
+        cache.close()
+    print("Completed with {} errors".format(errors))
\ No newline at end of file
@@ -0,0 +1,63 @@
+import json
+import pickle
+import sqlite3
+import numpy as np
+
+
+def config_key(config):
+    """Identifies a tournament config independently of its position in the run."""
+    return "{}|{}|{}|{}".format(config["map"], config["skill"], ",".join(config["player_list"]), config["trial"])
+
+
+class TournamentJournal:
+    """SQLite record of the completed configs of a tournament run, committed as each config completes.
+
+    The seed entropy and the tournament setup are stored when the run starts, so a resumed run regenerates the
+    same seed for every config and only runs the configs without a recorded result.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS completed (key TEXT PRIMARY KEY, seed TEXT NOT NULL, result BLOB NOT NULL)")
+        self.connection.commit()
+
+    def start(self, entropy, setup):
+        """Records the seed entropy and setup of a new run, or checks them against the recorded ones on resume.
+
+        Args:
+            entropy (int): seed entropy of the run, None to reuse the recorded one or draw a new one
+            setup (dict): json serializable players, skills, trials and maps of the run
+
+        Returns:
+            int: seed entropy of the run
+
+        Raises:
+            ValueError: if the journal was started with a different entropy or setup
+        """
+        rows = dict(self.connection.execute("SELECT key, value FROM meta").fetchall())
+        setup_json = json.dumps(setup, sort_keys=True)
+        if rows:
+            if rows["setup"] != setup_json:
+                raise ValueError("Tournament setup differs from the one recorded in {}".format(self.path))
+            recorded_entropy = int(rows["entropy"])
+            if entropy is not None and entropy != recorded_entropy:
+                raise ValueError("Seed entropy {} differs from {} recorded in {}".format(entropy, recorded_entropy, self.path))
+            return recorded_entropy
+        if entropy is None:
+            entropy = np.random.SeedSequence().entropy
+        self.connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [("entropy", str(entropy)), ("setup", setup_json)])
+        self.connection.commit()
+        return entropy
+
+    def completed(self):
+        """Returns config key to (seed, result) of every recorded config."""
+        return {key: (int(seed), pickle.loads(result)) for key, seed, result in self.connection.execute("SELECT key, seed, result FROM completed")}
+
+    def record(self, config, result):
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        self.connection.execute("INSERT OR REPLACE INTO completed (key, seed, result) VALUES (?, ?, ?)", (config_key(config), str(config["seed"]), blob))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,108 @@
+import numpy as np
+import constants
+
+shot_dtype = np.dtype([
+    ("start", np.float64, (2,)),
+    ("landing", np.float64, (2,)),
+    ("final", np.float64, (2,)),
+    ("admissible", np.bool_),
+    ("reached_target", np.bool_),
+    ("intended_distance", np.float64),
+    ("intended_angle", np.float64),
+    ("actual_distance", np.float64),
+    ("actual_angle", np.float64),
+    ("think_time", np.float64),
+])
+
+
+class Shot:
+    """Accessor for one row of a Trajectory, reads straight from the backing array."""
+    __slots__ = ("_records", "_idx")
+
+    def __init__(self, records, idx):
+        self._records = records
+        self._idx = idx
+
+    def __getattr__(self, name):
+        if name in shot_dtype.names:
+            return self._records[name][self._idx]
+        raise AttributeError("{} has no attribute {}".format(type(self).__name__, name))
+
+    @property
+    def observed_landing(self):
+        """np.ndarray: landing point if the shot was admissible, else the start"""
+        return self.landing if self.admissible else self.start
+
+    @property
+    def observed_final(self):
+        """np.ndarray: final point if the shot was admissible, else the start"""
+        return self.final if self.admissible else self.start
+
+    def to_dict(self):
+        return {name: self._records[name][self._idx].tolist() for name in shot_dtype.names}
+
+
+class Trajectory:
+    """Per-player shot history backed by a growable structured numpy array of shot_dtype records.
+
+    Holds only floats and flags, so it is small and cheap to pickle back from tournament workers.
+    """
+    __slots__ = ("_records", "_size")
+
+    def __init__(self, capacity=constants.max_tries):
+        self._records = np.zeros(max(1, capacity), dtype=shot_dtype)
+        self._size = 0
+
+    @classmethod
+    def from_records(cls, records):
+        """Trajectory holding a copy of the given shot_dtype records."""
+        trajectory = cls(len(records))
+        trajectory._records[:len(records)] = records
+        trajectory._size = len(records)
+        return trajectory
+
+    def append(self, start, landing, final, admissible, reached_target, intended_distance, intended_angle, actual_distance, actual_angle, think_time):
+        if self._size == len(self._records):
+            self._records = np.concatenate([self._records, np.zeros(len(self._records), dtype=shot_dtype)])
+        record = self._records[self._size]
+        record["start"] = start
+        record["landing"] = landing
+        record["final"] = final
+        record["admissible"] = admissible
+        record["reached_target"] = reached_target
+        record["intended_distance"] = intended_distance
+        record["intended_angle"] = intended_angle
+        record["actual_distance"] = actual_distance
+        record["actual_angle"] = actual_angle
+        record["think_time"] = think_time
+        self._size += 1
+
+    @property
+    def records(self):
+        """np.ndarray: view of the filled shot_dtype records"""
+        return self._records[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [Shot(self._records, i) for i in range(*idx.indices(self._size))]
+        if idx < 0:
+            idx += self._size
+        if not 0 <= idx < self._size:
+            raise IndexError("shot index out of range")
+        return Shot(self._records, idx)
+
+    def __iter__(self):
+        for idx in range(self._size):
+            yield Shot(self._records, idx)
+
+    def last_location(self, default):
+        """Observed final point of the last shot, default if no shot was played."""
+        if self._size == 0:
+            return np.asarray(default, dtype=np.float64)
+        return self[-1].observed_final
+
+    def to_list(self):
+        return [shot.to_dict() for shot in self]
@@ -61,3 +61,7 @@ def isiterable(obj):
 
 def count_iterable(i):
     return sum(1 for e in i)
+
+
+def to_numeric_point(point):
+    return (float(point.x), float(point.y))